@@ -0,0 +1,44 @@
+"""Price bar store
+
+Revision ID: 002
+Revises: 001
+Create Date: 2024-02-01 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Create price_bars table (PK doubles as the per-series range index)
+    op.create_table('price_bars',
+        sa.Column('symbol', sa.String(length=20), nullable=False),
+        sa.Column('interval', sa.String(length=10), nullable=False),
+        sa.Column('ts', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('open', sa.Float(), nullable=True),
+        sa.Column('high', sa.Float(), nullable=True),
+        sa.Column('low', sa.Float(), nullable=True),
+        sa.Column('close', sa.Float(), nullable=True),
+        sa.Column('volume', sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint('symbol', 'interval', 'ts')
+    )
+
+    # Create price_bar_series table
+    op.create_table('price_bar_series',
+        sa.Column('symbol', sa.String(length=20), nullable=False),
+        sa.Column('interval', sa.String(length=10), nullable=False),
+        sa.Column('timezone', sa.String(length=64), nullable=False),
+        sa.Column('covered_from', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_bar_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('symbol', 'interval')
+    )
+
+def downgrade() -> None:
+    op.drop_table('price_bar_series')
+    op.drop_table('price_bars')
@@ -0,0 +1,30 @@
+"""Unique portfolio symbol per user
+
+Revision ID: 003
+Revises: 002
+Create Date: 2024-02-15 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Keep only the most recently updated row of any duplicated (user_id, symbol)
+    op.execute("""
+        DELETE FROM portfolios p
+        USING portfolios q
+        WHERE p.user_id = q.user_id
+          AND p.symbol = q.symbol
+          AND (COALESCE(p.updated_at, p.created_at), p.portfolio_id)
+            < (COALESCE(q.updated_at, q.created_at), q.portfolio_id)
+    """)
+    op.create_unique_constraint('uq_portfolios_user_symbol', 'portfolios', ['user_id', 'symbol'])
+
+def downgrade() -> None:
+    op.drop_constraint('uq_portfolios_user_symbol', 'portfolios', type_='unique')
@@ -0,0 +1,28 @@
+"""Conversation keyset pagination index
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-03-01 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Serves "WHERE user_id = ? AND (created_at, conversation_id) < (?, ?) ORDER BY ... LIMIT n"
+    # in either direction without a sort, whatever the page depth
+    op.create_index(
+        'ix_conversations_user_created',
+        'conversations',
+        ['user_id', 'created_at', 'conversation_id'],
+        unique=False
+    )
+
+def downgrade() -> None:
+    op.drop_index('ix_conversations_user_created', table_name='conversations')
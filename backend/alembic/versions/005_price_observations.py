@@ -0,0 +1,51 @@
+"""Partitioned price observations and OHLCV rollups
+
+Revision ID: 005
+Revises: 004
+Create Date: 2024-03-15 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Rows live in one partition per UTC day, which the observation store
+    # creates ahead of time and drops after the retention period
+    op.create_table('price_observations',
+        sa.Column('symbol', sa.String(length=20), nullable=False),
+        sa.Column('observed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('price', sa.Numeric(precision=15, scale=4), nullable=False),
+        sa.Column('volume', sa.BigInteger(), nullable=True),
+        sa.Column('data_source', sa.String(length=50), nullable=True),
+        sa.PrimaryKeyConstraint('symbol', 'observed_at'),
+        postgresql_partition_by='RANGE (observed_at)'
+    )
+
+    # Catches writes before the first maintenance run (or for a day it has not
+    # created yet); the store moves those rows into the daily partition
+    op.execute("CREATE TABLE price_observations_default PARTITION OF price_observations DEFAULT")
+
+    # Create price_rollups table (PK doubles as the per-series range index)
+    op.create_table('price_rollups',
+        sa.Column('symbol', sa.String(length=20), nullable=False),
+        sa.Column('interval', sa.String(length=10), nullable=False),
+        sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('open', sa.Numeric(precision=15, scale=4), nullable=False),
+        sa.Column('high', sa.Numeric(precision=15, scale=4), nullable=False),
+        sa.Column('low', sa.Numeric(precision=15, scale=4), nullable=False),
+        sa.Column('close', sa.Numeric(precision=15, scale=4), nullable=False),
+        sa.Column('volume', sa.BigInteger(), nullable=True),
+        sa.Column('samples', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('symbol', 'interval', 'bucket')
+    )
+
+def downgrade() -> None:
+    op.drop_table('price_rollups')
+    # Dropping the parent drops every partition
+    op.drop_table('price_observations')
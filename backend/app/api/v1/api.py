@@ -1,10 +1,17 @@
-from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, portfolio
+from fastapi import APIRouter, Depends
+from app.core.deps import upstream_request_context
+from app.api.v1.endpoints import auth, users, portfolio, analytics, transactions, conversations
 from app.api.v1 import market
 
 api_router = APIRouter()
 
+# Routers that call the market data upstream get a per-request deadline for queued calls
+upstream = [Depends(upstream_request_context)]
+
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
-api_router.include_router(portfolio.router, prefix="/portfolio", tags=["portfolio"])
-api_router.include_router(market.router, prefix="/market", tags=["market"])
\ No newline at end of file
+api_router.include_router(portfolio.router, prefix="/portfolio", tags=["portfolio"], dependencies=upstream)
+api_router.include_router(transactions.router, prefix="/transactions", tags=["transactions"])
+api_router.include_router(conversations.router, prefix="/conversations", tags=["conversations"])
+api_router.include_router(market.router, prefix="/market", tags=["market"], dependencies=upstream)
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"], dependencies=upstream)
\ No newline at end of file
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+import numpy as np
+import structlog
+
+from app.core.deps import get_current_user
+from app.models.user import User
+from app.services.analytics import PerformanceAnalyzer, get_performance_analyzer, summarize
+
+router = APIRouter()
+logger = structlog.get_logger()
+
+@router.get("/performance")
+async def get_performance(
+    include_series: bool = Query(False, description="Include the daily value/TWR/drawdown series"),
+    current_user: User = Depends(get_current_user),
+    analyzer: PerformanceAnalyzer = Depends(get_performance_analyzer)
+):
+    """Time-weighted return, XIRR and drawdown reconstructed from investment history"""
+    try:
+        series = await analyzer.get_performance(current_user.user_id)
+        response = {
+            "start_date": str(series.dates[0]) if len(series) else None,
+            "as_of": str(series.dates[-1]) if len(series) else None,
+            **summarize(series),
+        }
+        if include_series:
+            response["series"] = {
+                "date": np.datetime_as_string(series.dates, unit="D").tolist(),
+                "value": series.value.tolist(),
+                "net_flow": series.flows.tolist(),
+                "twr": (series.wealth - 1.0).tolist(),
+                "drawdown": series.drawdown.tolist(),
+            }
+        return response
+
+    except Exception as e:
+        logger.error("Failed to compute performance", error=str(e), user_id=str(current_user.user_id))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to compute performance"
+        )
@@ -5,14 +5,15 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import structlog
 
-from app.core.deps import get_db
+from app.core.database import release_connection
+from app.core.deps import get_current_user, get_db
+from app.core.password_hasher import PasswordHasher, PasswordHasherBusy, get_password_hasher
+from app.core.principal_cache import invalidate_principal
 from app.core.config import settings
 from app.models.user import User, RiskTolerance
 from app.schemas.auth import Token, UserLogin, UserRegister
 from app.schemas.user import UserResponse
 from app.utils.security import (
-    verify_password,
-    get_password_hash,
     create_access_token,
     create_refresh_token,
 )
@@ -20,10 +21,18 @@ from app.utils.security import (
 router = APIRouter()
 logger = structlog.get_logger()
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserRegister,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    hasher: PasswordHasher = Depends(get_password_hasher)
 ):
     """Register a new user"""
     try:
@@ -38,8 +47,9 @@ async def register(
                 detail="Email already registered"
             )
 
-        # Create new user
-        hashed_password = get_password_hash(user_data.password)
+        # Create new user (bcrypt takes ~250ms; don't hold a pooled connection through it)
+        await release_connection(db)
+        hashed_password = await hasher.hash(user_data.password)
         db_user = User(
             email=user_data.email,
             password_hash=hashed_password,
@@ -49,12 +59,16 @@ async def register(
         db.add(db_user)
         await db.commit()
         await db.refresh(db_user)
+        # Drop any "unknown user" entry cached for this email before it existed
+        await invalidate_principal(db_user.email)
 
         logger.info("User registered successfully", email=user_data.email)
         return db_user
 
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     except Exception as e:
         logger.error("Registration failed", error=str(e), email=user_data.email)
         raise HTTPException(
@@ -65,7 +79,8 @@ async def register(
 @router.post("/login", response_model=Token)
 async def login(
     user_credentials: UserLogin,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    hasher: PasswordHasher = Depends(get_password_hasher)
 ):
     """Login and get access token"""
     try:
@@ -73,8 +88,9 @@ async def login(
         stmt = select(User).where(User.email == user_credentials.email)
         result = await db.execute(stmt)
         user = result.scalar_one_or_none()
+        await release_connection(db)
 
-        if not user or not verify_password(user_credentials.password, user.password_hash):
+        if not user or not await hasher.verify(user_credentials.password, user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
@@ -104,6 +120,8 @@ async def login(
 
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     except Exception as e:
         logger.error("Login failed", error=str(e), email=user_credentials.email)
         raise HTTPException(
@@ -114,8 +132,9 @@ async def login(
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    hasher: PasswordHasher = Depends(get_password_hasher)
 ):
     """OAuth2 compatible token endpoint"""
     user_credentials = UserLogin(email=form_data.username, password=form_data.password)
-    return await login(user_credentials, db)
\ No newline at end of file
+    return await login(user_credentials, db, hasher)
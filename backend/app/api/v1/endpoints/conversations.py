@@ -0,0 +1,137 @@
+from datetime import datetime
+from typing import Optional
+import base64
+import json
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+import structlog
+
+from app.core.deps import get_db, get_current_user
+from app.models.conversation import Conversation
+from app.models.user import User
+from app.schemas.conversation import ConversationCreate, ConversationPage, ConversationResponse
+
+router = APIRouter()
+logger = structlog.get_logger()
+
+LIST_COLUMNS = [
+    Conversation.conversation_id,
+    Conversation.user_id,
+    Conversation.message_type,
+    Conversation.content,
+    Conversation.created_at,
+]
+
+def _encode_cursor(created_at: datetime, conversation_id: uuid.UUID) -> str:
+    payload = json.dumps([created_at.isoformat(), str(conversation_id)]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def _decode_cursor(cursor: str):
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, conversation_id = json.loads(payload)
+        return datetime.fromisoformat(created_at), uuid.UUID(conversation_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+@router.get("/", response_model=ConversationPage)
+async def list_conversations(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    include_metadata: bool = Query(False, description="Include message_metadata (JSONB) in list items"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Page through the user's messages, newest first by default
+
+    Keyset pagination on (created_at, conversation_id) backed by
+    ix_conversations_user_created, so every page costs one index range scan
+    of ``limit`` rows regardless of depth. Metadata is left out unless
+    asked for, which also keeps the JSONB column from being read.
+    """
+    position = _decode_cursor(cursor) if cursor else None
+    key = tuple_(Conversation.created_at, Conversation.conversation_id)
+
+    try:
+        columns = LIST_COLUMNS + ([Conversation.message_metadata] if include_metadata else [])
+        stmt = select(*columns).where(Conversation.user_id == current_user.user_id)
+        if order == "desc":
+            if position:
+                stmt = stmt.where(key < tuple_(*position))
+            stmt = stmt.order_by(Conversation.created_at.desc(), Conversation.conversation_id.desc())
+        else:
+            if position:
+                stmt = stmt.where(key > tuple_(*position))
+            stmt = stmt.order_by(Conversation.created_at, Conversation.conversation_id)
+
+        result = await db.execute(stmt.limit(limit + 1))
+        rows = [dict(row._mapping) for row in result.all()]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(rows[-1]["created_at"], rows[-1]["conversation_id"])
+
+        return {"items": rows, "next_cursor": next_cursor}
+
+    except Exception as e:
+        logger.error("Failed to list conversations", error=str(e), user_id=str(current_user.user_id))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to list conversations"
+        )
+
+@router.post("/", response_model=ConversationResponse, status_code=status.HTTP_201_CREATED)
+async def create_conversation(
+    message: ConversationCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Append a message to the user's conversation history"""
+    try:
+        stmt = (
+            insert(Conversation)
+            .values(
+                user_id=current_user.user_id,
+                message_type=message.message_type,
+                content=message.content,
+                message_metadata=message.message_metadata
+            )
+            .returning(Conversation)
+        )
+        result = await db.execute(stmt)
+        conversation = result.scalar_one()
+        await db.commit()
+        return conversation
+
+    except Exception as e:
+        logger.error("Failed to save conversation", error=str(e), user_id=str(current_user.user_id))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to save conversation"
+        )
+
+@router.get("/{conversation_id}", response_model=ConversationResponse)
+async def get_conversation(
+    conversation_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get one message including its metadata"""
+    stmt = select(Conversation).where(
+        Conversation.conversation_id == conversation_id,
+        Conversation.user_id == current_user.user_id
+    )
+    result = await db.execute(stmt)
+    conversation = result.scalar_one_or_none()
+
+    if conversation is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation not found"
+        )
+    return conversation
@@ -1,13 +1,24 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, func, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert
 import structlog
 
+from app.core.database import release_connection
 from app.core.deps import get_db, get_current_user
 from app.models.user import User
 from app.models.portfolio import Portfolio
-from app.schemas.portfolio import PortfolioCreate, PortfolioResponse, PortfolioUpdate
+from app.schemas.portfolio import (
+    PortfolioBatchRequest,
+    PortfolioBatchResponse,
+    PortfolioCreate,
+    PortfolioResponse,
+    PortfolioUpdate,
+    PortfolioValuation,
+)
+from app.services.market_data import MarketDataService, get_market_data_service
+from app.services.valuation import value_portfolio
 
 router = APIRouter()
 logger = structlog.get_logger()
@@ -32,6 +43,38 @@ async def get_portfolio(
             detail="Failed to fetch portfolio"
         )
 
+@router.get("/valuation", response_model=PortfolioValuation)
+async def get_portfolio_valuation(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    market: MarketDataService = Depends(get_market_data_service)
+):
+    """Value all positions at current prices with one query and one batched quote lookup"""
+    try:
+        stmt = (
+            select(Portfolio)
+            .where(Portfolio.user_id == current_user.user_id)
+            .order_by(Portfolio.symbol)
+        )
+        result = await db.execute(stmt)
+        positions = result.scalars().all()
+
+        symbols = list(dict.fromkeys(position.symbol.upper() for position in positions))
+        # Don't hold a pooled connection while waiting on the quote provider
+        await release_connection(db)
+        quotes, errors = await market.get_quotes(symbols) if symbols else ({}, {})
+        quotes = {position.symbol: quotes[position.symbol.upper()]
+                  for position in positions if position.symbol.upper() in quotes}
+
+        return value_portfolio(positions, quotes, errors)
+
+    except Exception as e:
+        logger.error("Failed to value portfolio", error=str(e), user_id=str(current_user.user_id))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to value portfolio"
+        )
+
 @router.post("/", response_model=PortfolioResponse, status_code=status.HTTP_201_CREATED)
 async def add_portfolio_item(
     portfolio_data: PortfolioCreate,
@@ -40,32 +83,29 @@ async def add_portfolio_item(
 ):
     """Add a new portfolio item"""
     try:
-        # Check if symbol already exists for this user
-        stmt = select(Portfolio).where(
-            Portfolio.user_id == current_user.user_id,
-            Portfolio.symbol == portfolio_data.symbol
+        # The (user_id, symbol) unique constraint makes the existence check atomic
+        stmt = (
+            insert(Portfolio)
+            .values(
+                user_id=current_user.user_id,
+                symbol=portfolio_data.symbol,
+                quantity=portfolio_data.quantity,
+                average_price=portfolio_data.average_price,
+                purchase_date=portfolio_data.purchase_date
+            )
+            .on_conflict_do_nothing(constraint="uq_portfolios_user_symbol")
+            .returning(Portfolio)
         )
         result = await db.execute(stmt)
-        existing = result.scalar_one_or_none()
+        db_portfolio = result.scalar_one_or_none()
 
-        if existing:
+        if db_portfolio is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Symbol {portfolio_data.symbol} already exists in portfolio"
             )
 
-        # Create new portfolio item
-        db_portfolio = Portfolio(
-            user_id=current_user.user_id,
-            symbol=portfolio_data.symbol,
-            quantity=portfolio_data.quantity,
-            average_price=portfolio_data.average_price,
-            purchase_date=portfolio_data.purchase_date
-        )
-
-        db.add(db_portfolio)
         await db.commit()
-        await db.refresh(db_portfolio)
 
         logger.info("Portfolio item added", symbol=portfolio_data.symbol, user_id=str(current_user.user_id))
         return db_portfolio
@@ -79,6 +119,85 @@ async def add_portfolio_item(
             detail="Failed to add portfolio item"
         )
 
+@router.patch("/", response_model=PortfolioBatchResponse)
+async def batch_update_portfolio(
+    batch: PortfolioBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create, overwrite and delete many positions in one transaction
+
+    Upserts are keyed by symbol and run as one INSERT ... ON CONFLICT
+    statement, deletes as one DELETE ... RETURNING.
+    """
+    upsert_symbols = [item.symbol for item in batch.upsert]
+    if len(set(upsert_symbols)) != len(upsert_symbols):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Duplicate symbols in upsert")
+    conflicting = set(upsert_symbols) & set(batch.delete)
+    if conflicting:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Symbols both upserted and deleted: {', '.join(sorted(conflicting))}"
+        )
+
+    try:
+        created, updated, deleted = [], [], []
+        if batch.upsert:
+            stmt = insert(Portfolio).values([
+                {
+                    "user_id": current_user.user_id,
+                    "symbol": item.symbol,
+                    "quantity": item.quantity,
+                    "average_price": item.average_price,
+                    "purchase_date": item.purchase_date
+                }
+                for item in batch.upsert
+            ])
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_portfolios_user_symbol",
+                set_={
+                    "quantity": stmt.excluded.quantity,
+                    "average_price": stmt.excluded.average_price,
+                    "purchase_date": func.coalesce(stmt.excluded.purchase_date, Portfolio.purchase_date),
+                    "updated_at": func.now()
+                }
+            ).returning(Portfolio, literal_column("xmax = 0").label("inserted"))
+            result = await db.execute(stmt)
+            for portfolio, inserted in result.all():
+                (created if inserted else updated).append(portfolio)
+
+        if batch.delete:
+            stmt = (
+                delete(Portfolio)
+                .where(Portfolio.user_id == current_user.user_id, Portfolio.symbol.in_(batch.delete))
+                .returning(Portfolio.symbol)
+            )
+            result = await db.execute(stmt)
+            deleted = list(result.scalars().all())
+
+        await db.commit()
+
+        logger.info(
+            "Portfolio batch applied",
+            created=len(created),
+            updated=len(updated),
+            deleted=len(deleted),
+            user_id=str(current_user.user_id)
+        )
+        return {
+            "created": created,
+            "updated": updated,
+            "deleted": deleted,
+            "not_found": [symbol for symbol in dict.fromkeys(batch.delete) if symbol not in set(deleted)]
+        }
+
+    except Exception as e:
+        logger.error("Failed to apply portfolio batch", error=str(e), user_id=str(current_user.user_id))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to apply portfolio batch"
+        )
+
 @router.put("/{portfolio_id}", response_model=PortfolioResponse)
 async def update_portfolio_item(
     portfolio_id: str,
@@ -88,10 +207,15 @@ async def update_portfolio_item(
 ):
     """Update a portfolio item"""
     try:
-        # Get portfolio item
-        stmt = select(Portfolio).where(
-            Portfolio.portfolio_id == portfolio_id,
-            Portfolio.user_id == current_user.user_id
+        values = portfolio_update.model_dump(exclude_none=True)
+        stmt = (
+            update(Portfolio)
+            .where(
+                Portfolio.portfolio_id == portfolio_id,
+                Portfolio.user_id == current_user.user_id
+            )
+            .values(**values, updated_at=func.now())
+            .returning(Portfolio)
         )
         result = await db.execute(stmt)
         portfolio = result.scalar_one_or_none()
@@ -102,16 +226,7 @@ async def update_portfolio_item(
                 detail="Portfolio item not found"
             )
 
-        # Update fields
-        if portfolio_update.quantity is not None:
-            portfolio.quantity = portfolio_update.quantity
-        if portfolio_update.average_price is not None:
-            portfolio.average_price = portfolio_update.average_price
-        if portfolio_update.purchase_date is not None:
-            portfolio.purchase_date = portfolio_update.purchase_date
-
         await db.commit()
-        await db.refresh(portfolio)
 
         logger.info("Portfolio item updated", portfolio_id=portfolio_id, user_id=str(current_user.user_id))
         return portfolio
@@ -133,21 +248,22 @@ async def delete_portfolio_item(
 ):
     """Delete a portfolio item"""
     try:
-        # Get portfolio item
-        stmt = select(Portfolio).where(
-            Portfolio.portfolio_id == portfolio_id,
-            Portfolio.user_id == current_user.user_id
+        stmt = (
+            delete(Portfolio)
+            .where(
+                Portfolio.portfolio_id == portfolio_id,
+                Portfolio.user_id == current_user.user_id
+            )
+            .returning(Portfolio.portfolio_id)
         )
         result = await db.execute(stmt)
-        portfolio = result.scalar_one_or_none()
 
-        if not portfolio:
+        if result.scalar_one_or_none() is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Portfolio item not found"
             )
 
-        await db.delete(portfolio)
         await db.commit()
 
         logger.info("Portfolio item deleted", portfolio_id=portfolio_id, user_id=str(current_user.user_id))
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.deps import get_db, get_current_user
+from app.models.user import User
+from app.services.transaction_import import ImportValidationError, import_transactions
+
+router = APIRouter()
+logger = structlog.get_logger()
+
+@router.post("/import")
+async def import_transactions_csv(
+    request: Request,
+    chunk_size: int = Query(10000, ge=100, le=100000),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Bulk import a broker transactions CSV (raw text/csv request body) and rebuild portfolios
+
+    Columns: symbol, transaction_type (buy/sell), quantity, price,
+    transaction_date (ISO 8601). The body is streamed, so file size is not
+    limited by memory; the import is all-or-nothing.
+    """
+    try:
+        return await import_transactions(db, current_user.user_id, request.stream(), chunk_size=chunk_size)
+
+    except ImportValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": str(e), "errors": e.errors}
+        )
+    except Exception as e:
+        logger.error("Transaction import failed", error=str(e), user_id=str(current_user.user_id))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Transaction import failed"
+        )
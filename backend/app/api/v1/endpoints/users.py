@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import update
 import structlog
 
 from app.core.deps import get_db, get_current_user
+from app.core.principal_cache import invalidate_principal
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdate
 
@@ -25,14 +27,27 @@ async def update_user_profile(
     """Update user profile"""
     try:
         # Update user fields
+        values = {}
         if profile_update.risk_tolerance is not None:
-            current_user.risk_tolerance = profile_update.risk_tolerance
+            values["risk_tolerance"] = profile_update.risk_tolerance
+        if not values:
+            return current_user
 
+        # current_user may be a detached cached principal, so write with an
+        # explicit UPDATE and drop the cached entry afterwards
+        stmt = (
+            update(User)
+            .where(User.user_id == current_user.user_id)
+            .values(**values)
+            .returning(User)
+        )
+        result = await db.execute(stmt)
+        user = result.scalar_one()
         await db.commit()
-        await db.refresh(current_user)
+        await invalidate_principal(user.email)
 
-        logger.info("User profile updated", user_id=str(current_user.user_id))
-        return current_user
+        logger.info("User profile updated", user_id=str(user.user_id))
+        return user
 
     except Exception as e:
         logger.error("Profile update failed", error=str(e), user_id=str(current_user.user_id))
@@ -1,16 +1,43 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from typing import Dict, List, Optional
-import yfinance as yf
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import asyncio
+import json
 import structlog
-import pandas as pd
 
-from app.core.database import get_db
-from app.models.market_data import MarketData
-from app.core.deps import get_current_user
+from app.core.config import settings
+from app.core.deps import get_current_user, get_streaming_user, get_websocket_user
 from app.models.user import User
+from app.schemas.market import BatchQuoteRequest
+from app.services.market_data import (
+    IndexSnapshotRefresher,
+    MarketDataService,
+    MarketDataTimeout,
+    MarketDataUnavailable,
+    MarketSnapshotWriter,
+    PriceObservationStore,
+    QuoteHub,
+    get_index_refresher,
+    get_market_data_service,
+    get_observation_store,
+    get_quote_hub,
+    get_snapshot_writer,
+)
+from app.services.symbols import SymbolIndex, get_symbol_index
+from app.services.market_data.serialization import (
+    ARROW_STREAM,
+    HISTORY_MEDIA_TYPES,
+    MSGPACK,
+    NDJSON,
+    encode_arrow,
+    encode_msgpack,
+    history_columns,
+    history_rows,
+    iter_ndjson,
+    negotiate_history_media_type,
+)
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -18,114 +45,100 @@ router = APIRouter()
 @router.get("/quote/{symbol}")
 async def get_stock_quote(
     symbol: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    market: MarketDataService = Depends(get_market_data_service),
+    writer: MarketSnapshotWriter = Depends(get_snapshot_writer)
 ):
     """個別株式の最新価格を取得"""
     try:
-        # Yahoo Finance APIから株価データを取得
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
-        history = ticker.history(period="1d")
+        # キャッシュ経由で株価データを取得（ミス時のみ外部APIを呼び出す）
+        quote_data = await market.get_quote(symbol)
 
-        if history.empty:
+        if quote_data is None:
             raise HTTPException(status_code=404, detail=f"Stock data not found for symbol: {symbol}")
 
-        latest = history.iloc[-1]
-        previous_close = info.get('regularMarketPreviousClose', latest['Close'])
-        current_price = latest['Close']
-        change = current_price - previous_close
-        change_percent = (change / previous_close) * 100 if previous_close else 0
-
-        quote_data = {
-            "symbol": symbol.upper(),
-            "name": info.get('longName', symbol),
-            "current_price": float(current_price),
-            "previous_close": float(previous_close),
-            "change": float(change),
-            "change_percent": float(change_percent),
-            "volume": int(latest.get('Volume', 0)),
-            "market_cap": info.get('marketCap'),
-            "pe_ratio": info.get('forwardPE'),
-            "dividend_yield": info.get('dividendYield'),
-            "fifty_two_week_high": info.get('fiftyTwoWeekHigh'),
-            "fifty_two_week_low": info.get('fiftyTwoWeekLow'),
-            "last_updated": datetime.now().isoformat()
-        }
-
-        # データベースに保存
-        market_data = MarketData(
-            symbol=symbol.upper(),
-            price=current_price,
-            volume=int(latest.get('Volume', 0)),
-            change_percent=change_percent,
-            last_updated=datetime.now(),
-            data_source="yahoo_finance"
-        )
-
-        # 既存データがあれば更新、なければ新規作成
-        existing = await db.get(MarketData, symbol.upper())
-        if existing:
-            existing.price = current_price
-            existing.volume = int(latest.get('Volume', 0))
-            existing.change_percent = change_percent
-            existing.last_updated = datetime.now()
-        else:
-            db.add(market_data)
-
-        await db.commit()
+        # market_dataへの保存はwrite-behindでまとめて行う（リクエスト毎の書き込みはしない）
+        writer.record([quote_data], market.provider.name)
 
         return quote_data
 
+    except HTTPException:
+        raise
+    except MarketDataTimeout:
+        raise HTTPException(status_code=504, detail="Market data provider timed out")
+    except MarketDataUnavailable:
+        # 上流のレート上限に達しているか、キューが満杯
+        raise HTTPException(status_code=503, detail="Market data provider is busy, retry later")
     except Exception as e:
         logger.error("Failed to get stock quote", symbol=symbol, error=str(e))
         raise HTTPException(status_code=500, detail="Failed to fetch stock data")
 
-@router.get("/index")
-async def get_market_indices(
-    current_user: User = Depends(get_current_user)
-):
-    """主要市場指数を取得"""
-    try:
-        indices = {
-            "^N225": "日経平均株価",
-            "^GSPC": "S&P 500",
-            "^IXIC": "NASDAQ",
-            "^DJI": "ダウ・ジョーンズ",
-            "USDJPY=X": "USD/JPY"
-        }
+def _parse_symbols(symbols: List[str]) -> List[str]:
+    """カンマ区切り・重複を正規化し、バッチ上限を検証"""
+    parsed = list(dict.fromkeys(
+        part.strip().upper()
+        for symbol in symbols
+        for part in symbol.split(",")
+        if part.strip()
+    ))
+    if not parsed:
+        raise HTTPException(status_code=400, detail="At least one symbol is required")
+    if len(parsed) > settings.MARKET_DATA_MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many symbols: {len(parsed)} (max {settings.MARKET_DATA_MAX_BATCH_SIZE})"
+        )
+    return parsed
 
-        results = {}
+async def _get_batch_quotes(symbols: List[str], market: MarketDataService, writer: MarketSnapshotWriter) -> Dict:
+    try:
+        quotes, errors = await market.get_quotes(symbols)
+        writer.record(quotes.values(), market.provider.name)
 
-        for symbol, name in indices.items():
-            try:
-                ticker = yf.Ticker(symbol)
-                history = ticker.history(period="2d")
+        return {
+            "quotes": quotes,
+            "errors": errors,
+            "requested": len(symbols)
+        }
 
-                if not history.empty:
-                    latest = history.iloc[-1]
-                    previous = history.iloc[-2] if len(history) > 1 else latest
+    except Exception as e:
+        logger.error("Failed to get batch quotes", symbols=symbols, error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to fetch stock data")
 
-                    current_price = latest['Close']
-                    previous_close = previous['Close']
-                    change = current_price - previous_close
-                    change_percent = (change / previous_close) * 100
+@router.get("/quotes")
+async def get_stock_quotes(
+    symbols: List[str] = Query(..., description="Comma separated or repeated symbols"),
+    current_user: User = Depends(get_current_user),
+    market: MarketDataService = Depends(get_market_data_service),
+    writer: MarketSnapshotWriter = Depends(get_snapshot_writer)
+):
+    """複数銘柄の最新価格を一括取得"""
+    return await _get_batch_quotes(_parse_symbols(symbols), market, writer)
 
-                    results[symbol] = {
-                        "symbol": symbol,
-                        "name": name,
-                        "current_price": float(current_price),
-                        "change": float(change),
-                        "change_percent": float(change_percent),
-                        "volume": int(latest.get('Volume', 0)),
-                        "last_updated": datetime.now().isoformat()
-                    }
+@router.post("/quotes")
+async def post_stock_quotes(
+    request: BatchQuoteRequest,
+    current_user: User = Depends(get_current_user),
+    market: MarketDataService = Depends(get_market_data_service),
+    writer: MarketSnapshotWriter = Depends(get_snapshot_writer)
+):
+    """複数銘柄の最新価格を一括取得（URL長を気にせず銘柄を渡せるPOST版）"""
+    return await _get_batch_quotes(_parse_symbols(request.symbols), market, writer)
 
-            except Exception as e:
-                logger.warning("Failed to get index data", symbol=symbol, error=str(e))
-                continue
+@router.get("/index")
+async def get_market_indices(
+    current_user: User = Depends(get_current_user),
+    refresher: IndexSnapshotRefresher = Depends(get_index_refresher)
+):
+    """主要市場指数を取得（バックグラウンドで更新されたスナップショットを返す）"""
+    try:
+        snapshot = await refresher.get_snapshot()
 
-        return {"indices": results}
+        return {
+            "indices": snapshot.indices,
+            "as_of": snapshot.as_of.isoformat(),
+            "age_seconds": round(snapshot.age_seconds, 3)
+        }
 
     except Exception as e:
         logger.error("Failed to get market indices", error=str(e))
@@ -134,30 +147,23 @@ async def get_market_indices(
 @router.get("/search")
 async def search_stocks(
     q: str,
-    limit: Optional[int] = 10,
-    current_user: User = Depends(get_current_user)
+    limit: int = Query(10, ge=1, le=settings.SYMBOL_SEARCH_MAX_RESULTS),
+    current_user: User = Depends(get_current_user),
+    index: SymbolIndex = Depends(get_symbol_index)
 ):
-    """株式銘柄検索"""
-    try:
-        if len(q) < 1:
-            return {"results": []}
-
-        # 簡単な検索実装（実際の実装では検索サービスを使用）
-        ticker = yf.Ticker(q.upper())
-        info = ticker.info
-
-        if info and info.get('longName'):
-            result = {
-                "symbol": q.upper(),
-                "name": info.get('longName', ''),
-                "sector": info.get('sector', ''),
-                "industry": info.get('industry', ''),
-                "market_cap": info.get('marketCap'),
-                "currency": info.get('currency', 'USD')
-            }
-            return {"results": [result]}
+    """株式銘柄検索
 
-        return {"results": []}
+    銘柄マスタのメモリ内インデックスを検索する（上流APIは呼ばない）。
+    ティッカー・英語名・日本語名・別名の前方一致、部分一致、タイプミスを
+    許容するあいまい一致の順で、同順位は時価総額の大きい順に返す。
+    """
+    try:
+        return {
+            "results": [
+                {**record.as_dict(), "match": match}
+                for record, match in index.search(q, limit)
+            ]
+        }
 
     except Exception as e:
         logger.error("Failed to search stocks", query=q, error=str(e))
@@ -168,35 +174,209 @@ async def get_stock_history(
     symbol: str,
     period: str = "1y",  # 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max
     interval: str = "1d",  # 1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo
-    current_user: User = Depends(get_current_user)
+    layout: str = Query("rows", pattern="^(rows|columns)$"),  # columns: {"date": [...], "open": [...], ...}
+    accept: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    market: MarketDataService = Depends(get_market_data_service)
 ):
-    """株価履歴データを取得"""
+    """株価履歴データを取得
+
+    Acceptヘッダーに応じてJSON / Arrow IPC / MessagePack / NDJSON（ストリーミング）で返す
+    """
+    media_type = negotiate_history_media_type(accept)
+    if media_type is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Supported media types: {', '.join(sorted(set(HISTORY_MEDIA_TYPES.values())))}"
+        )
+
     try:
-        ticker = yf.Ticker(symbol)
-        history = ticker.history(period=period, interval=interval)
+        history = await market.get_history(symbol, period=period, interval=interval)
 
         if history.empty:
             raise HTTPException(status_code=404, detail=f"No historical data found for symbol: {symbol}")
 
-        # データを辞書形式に変換
-        data = []
-        for date, row in history.iterrows():
-            data.append({
-                "date": date.isoformat(),
-                "open": float(row['Open']),
-                "high": float(row['High']),
-                "low": float(row['Low']),
-                "close": float(row['Close']),
-                "volume": int(row['Volume']) if not pd.isna(row['Volume']) else 0
-            })
+        metadata = {"symbol": symbol.upper(), "period": period, "interval": interval}
+        headers = {"Vary": "Accept"}
+
+        # バイナリ形式はPython辞書を経由せずDataFrameから直接エンコード（CPU処理はスレッドプールで実行）
+        if media_type == ARROW_STREAM:
+            content = await run_in_threadpool(encode_arrow, history, metadata)
+            return Response(content, media_type=ARROW_STREAM, headers=headers)
+        if media_type == MSGPACK:
+            content = await run_in_threadpool(encode_msgpack, history, metadata)
+            return Response(content, media_type=MSGPACK, headers=headers)
+        if media_type == NDJSON:
+            return StreamingResponse(iter_ndjson(history, metadata), media_type=NDJSON, headers=headers)
+
+        # DataFrameのNumPy配列から直接変換（行ごとのiterrowsは使わない）
+        data = history_columns(history) if layout == "columns" else history_rows(history)
 
         return {
             "symbol": symbol.upper(),
             "period": period,
             "interval": interval,
+            "layout": layout,
             "data": data
         }
 
+    except HTTPException:
+        raise
+    except MarketDataTimeout:
+        raise HTTPException(status_code=504, detail="Market data provider timed out")
+    except MarketDataUnavailable:
+        # 上流のレート上限に達しているか、キューが満杯
+        raise HTTPException(status_code=503, detail="Market data provider is busy, retry later")
     except Exception as e:
         logger.error("Failed to get stock history", symbol=symbol, error=str(e))
-        raise HTTPException(status_code=500, detail="Failed to fetch historical data")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to fetch historical data")
+
+@router.get("/observations/{symbol}")
+async def get_price_observations(
+    symbol: str,
+    interval: str = Query("1m", pattern="^(raw|1m|1h|1d)$"),
+    start: Optional[datetime] = Query(None, description="Defaults to 24 hours before end"),
+    end: Optional[datetime] = Query(None, description="Defaults to now"),
+    current_user: User = Depends(get_current_user),
+    store: PriceObservationStore = Depends(get_observation_store)
+):
+    """取得済み株価の記録（raw）または1分/1時間/1日のOHLCV集計を取得
+
+    上流APIは呼ばず、price_observations / price_rollups のみを参照する
+    """
+    # タイムゾーン指定のない日時はUTCとして扱う
+    end = end.replace(tzinfo=end.tzinfo or timezone.utc) if end else datetime.now(timezone.utc)
+    start = start.replace(tzinfo=start.tzinfo or timezone.utc) if start else end - timedelta(days=1)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    try:
+        data = await store.get_observations(symbol, interval, start, end)
+        return {
+            "symbol": symbol.upper(),
+            "interval": interval,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "data": data
+        }
+
+    except Exception as e:
+        logger.error("Failed to get price observations", symbol=symbol, error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to fetch price observations")
+
+def _parse_stream_symbols(symbols: List[str]) -> List[str]:
+    parsed = list(dict.fromkeys(
+        part.strip().upper()
+        for symbol in symbols
+        for part in symbol.split(",")
+        if part.strip()
+    ))
+    if len(parsed) > settings.MARKET_STREAM_MAX_SYMBOLS:
+        raise ValueError(f"Too many symbols (max {settings.MARKET_STREAM_MAX_SYMBOLS})")
+    return parsed
+
+@router.websocket("/stream")
+async def stream_quotes(
+    websocket: WebSocket,
+    symbols: List[str] = Query([]),
+    current_user: Optional[User] = Depends(get_websocket_user),
+    hub: QuoteHub = Depends(get_quote_hub)
+):
+    """リアルタイム株価ストリーム（WebSocket）
+
+    接続: /market/stream?token=<access_token>&symbols=AAPL,MSFT
+    クライアント → {"action": "subscribe" | "unsubscribe", "symbols": [...]}
+    サーバー → {"type": "quote", "data": {...}} / {"type": "error", "detail": ...}
+    """
+    if current_user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscriber = hub.connect()
+
+    def apply(action: str, requested: List[str]) -> None:
+        try:
+            parsed = _parse_stream_symbols(requested)
+            if action == "subscribe":
+                if len(subscriber.symbols | set(parsed)) > settings.MARKET_STREAM_MAX_SYMBOLS:
+                    raise ValueError(f"Too many symbols (max {settings.MARKET_STREAM_MAX_SYMBOLS})")
+                hub.subscribe(subscriber, parsed)
+            elif action == "unsubscribe":
+                hub.unsubscribe(subscriber, parsed)
+            else:
+                raise ValueError(f"Unknown action: {action}")
+        except ValueError as e:
+            # 送信は送信タスクに一本化するため、エラーもキュー経由で返す
+            subscriber.publish({"type": "error", "detail": str(e)})
+
+    async def receive() -> None:
+        while True:
+            message = await websocket.receive_json()
+            symbols_value = message.get("symbols") or []
+            apply(message.get("action"), symbols_value if isinstance(symbols_value, list) else [str(symbols_value)])
+
+    async def send() -> None:
+        while True:
+            update = await subscriber.next_update()
+            if update is None:
+                return
+            await websocket.send_json(update)
+
+    if symbols:
+        apply("subscribe", symbols)
+
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(send())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                logger.warning("Quote stream closed with error", error=str(error))
+        if subscriber.closed.is_set():
+            # 処理が追いつかないクライアントは切断
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+    finally:
+        hub.disconnect(subscriber)
+
+@router.get("/stream/sse")
+async def stream_quotes_sse(
+    symbols: List[str] = Query(..., description="Comma separated or repeated symbols"),
+    current_user: User = Depends(get_streaming_user),
+    hub: QuoteHub = Depends(get_quote_hub)
+):
+    """リアルタイム株価ストリーム（Server-Sent Events、WebSocketが使えない環境向け）"""
+    try:
+        parsed = _parse_stream_symbols(symbols)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not parsed:
+        raise HTTPException(status_code=400, detail="At least one symbol is required")
+
+    subscriber = hub.connect()
+    hub.subscribe(subscriber, parsed)
+
+    async def events():
+        try:
+            while True:
+                try:
+                    update = await asyncio.wait_for(
+                        subscriber.next_update(),
+                        timeout=settings.MARKET_STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if update is None:
+                    return
+                yield f"event: {update['type']}\ndata: {json.dumps(update)}\n\n"
+        finally:
+            hub.disconnect(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,286 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import json
+import time
+import structlog
+
+from app.core.singleflight import SingleFlight
+
+logger = structlog.get_logger()
+
+MISSING = object()
+
+
+class CacheStats:
+    """Hit/miss/eviction counters for a cache"""
+
+    def __init__(self):
+        self.local_hits = 0
+        self.remote_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.remote_errors = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.local_hits + self.remote_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "remote_hits": self.remote_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "remote_errors": self.remote_errors,
+            "hit_ratio": (self.local_hits + self.remote_hits) / lookups if lookups else 0.0,
+        }
+
+
+class TTLCache:
+    """In-process LRU cache with per-entry TTL and a size bound"""
+
+    def __init__(self, max_entries: int, default_ttl: float, stats: Optional[CacheStats] = None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.stats = stats or CacheStats()
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        """Return the cached value or MISSING"""
+        entry = self._data.get(key)
+        if entry is None:
+            return MISSING
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.stats.expirations += 1
+            return MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisCache:
+    """Shared Redis tier; failures degrade to cache misses
+
+    After a Redis error the tier is skipped for ``retry_after`` seconds so
+    an unreachable Redis costs one failed round-trip, not one per request.
+    """
+
+    def __init__(self, url: str, prefix: str = "pia:", retry_after: float = 30.0, stats: Optional[CacheStats] = None):
+        self.url = url
+        self.prefix = prefix
+        self.retry_after = retry_after
+        self.stats = stats or CacheStats()
+        self._client = None
+        self._disabled_until = 0.0
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis.asyncio as redis
+            self._client = redis.from_url(self.url)
+        return self._client
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._disabled_until
+
+    def _failed(self, op: str, error: Exception) -> None:
+        self.stats.remote_errors += 1
+        self._disabled_until = time.monotonic() + self.retry_after
+        logger.warning("Redis cache unavailable", op=op, error=str(error), retry_after=self.retry_after)
+
+    async def get(self, key: str) -> Tuple[Optional[bytes], float]:
+        """Return (value, remaining ttl in seconds); value is None on miss"""
+        if not self.available:
+            return None, 0.0
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                value, pttl = await pipe.get(self.prefix + key).pttl(self.prefix + key).execute()
+            return value, max(pttl, 0) / 1000
+        except Exception as e:
+            self._failed("get", e)
+            return None, 0.0
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not self.available or not keys:
+            return [None] * len(keys)
+        try:
+            return await self.client.mget([self.prefix + key for key in keys])
+        except Exception as e:
+            self._failed("get_many", e)
+            return [None] * len(keys)
+
+    async def set_many(self, items: Dict[str, bytes], ttl: float) -> None:
+        if not self.available or not items or ttl <= 0:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(self.prefix + key, value, px=int(ttl * 1000))
+                await pipe.execute()
+        except Exception as e:
+            self._failed("set_many", e)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if not self.available or ttl <= 0:
+            return
+        try:
+            await self.client.set(self.prefix + key, value, px=int(ttl * 1000))
+        except Exception as e:
+            self._failed("set", e)
+
+    async def delete(self, key: str) -> None:
+        if not self.available:
+            return
+        try:
+            await self.client.delete(self.prefix + key)
+        except Exception as e:
+            self._failed("delete", e)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+def json_dumps(value: Any) -> bytes:
+    return json.dumps(value, default=str).encode()
+
+
+def json_loads(data: bytes) -> Any:
+    return json.loads(data)
+
+
+class TieredCache:
+    """Read-through cache: in-process LRU first, then Redis, then the loader
+
+    Values held in the local tier are shared between callers and must be
+    treated as read-only. With a SingleFlight, concurrent local misses for
+    the same key share one remote lookup and at most one loader call.
+    ``local_ttl`` caps how long the local tier keeps an entry (0 skips it),
+    for values whose invalidation must reach every worker through Redis.
+    """
+
+    def __init__(
+        self,
+        local: TTLCache,
+        remote: Optional[RedisCache] = None,
+        flights: Optional[SingleFlight] = None,
+        local_ttl: Optional[float] = None,
+    ):
+        self.local = local
+        self.remote = remote
+        self.flights = flights
+        self.local_ttl = local_ttl
+        self.stats = local.stats
+        if remote is not None:
+            remote.stats = self.stats
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: float,
+        dumps: Callable[[Any], bytes] = json_dumps,
+        loads: Callable[[bytes], Any] = json_loads,
+    ) -> Any:
+        value = self.local.get(key)
+        if value is not MISSING:
+            self.stats.local_hits += 1
+            return value
+
+        if self.flights is not None:
+            return await self.flights.do(key, lambda: self._load(key, loader, ttl, dumps, loads))
+        return await self._load(key, loader, ttl, dumps, loads)
+
+    def _local_ttl(self, ttl: float) -> float:
+        return ttl if self.local_ttl is None else min(ttl, self.local_ttl)
+
+    async def _load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: float,
+        dumps: Callable[[Any], bytes],
+        loads: Callable[[bytes], Any],
+    ) -> Any:
+        if self.remote is not None:
+            data, remaining = await self.remote.get(key)
+            if data is not None:
+                self.stats.remote_hits += 1
+                value = loads(data)
+                self.local.set(key, value, self._local_ttl(min(ttl, remaining) if remaining else ttl))
+                return value
+
+        self.stats.misses += 1
+        value = await loader()
+        self.local.set(key, value, self._local_ttl(ttl))
+        if self.remote is not None:
+            await self.remote.set(key, dumps(value), ttl)
+        return value
+
+    async def get_many(
+        self,
+        keys: List[str],
+        ttl: float,
+        loads: Callable[[bytes], Any] = json_loads,
+    ) -> Dict[str, Any]:
+        """Return cached values for the keys that hit either tier (one MGET for the rest)"""
+        found: Dict[str, Any] = {}
+        pending = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is MISSING:
+                pending.append(key)
+            else:
+                self.stats.local_hits += 1
+                found[key] = value
+
+        if pending and self.remote is not None:
+            for key, data in zip(pending, await self.remote.get_many(pending)):
+                if data is not None:
+                    self.stats.remote_hits += 1
+                    found[key] = loads(data)
+                    self.local.set(key, found[key], self._local_ttl(ttl))
+
+        self.stats.misses += len(keys) - len(found)
+        return found
+
+    async def set_many(
+        self,
+        items: Dict[str, Any],
+        ttl: float,
+        dumps: Callable[[Any], bytes] = json_dumps,
+    ) -> None:
+        for key, value in items.items():
+            self.local.set(key, value, self._local_ttl(ttl))
+        if self.remote is not None:
+            await self.remote.set_many({key: dumps(value) for key, value in items.items()}, ttl)
+
+    async def invalidate(self, key: str) -> None:
+        self.local.delete(key)
+        if self.remote is not None:
+            await self.remote.delete(key)
+
+    async def close(self) -> None:
+        if self.remote is not None:
+            await self.remote.close()
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -22,6 +22,12 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    AUTH_PRINCIPAL_CACHE_TTL: int = 30  # seconds, 0 disables the authenticated user cache
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 10000  # verified JWT payloads kept until their exp
+
+    # Password hashing (bcrypt runs on a dedicated thread pool)
+    PASSWORD_HASH_MAX_WORKERS: int = 0  # 0 = CPU count - 1 (min 1), leaving a core for the event loop
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # pending operations beyond the workers before 503
 
     # External APIs
     OPENAI_API_KEY: str = ""
@@ -31,16 +37,107 @@ class Settings(BaseSettings):
     # CORS
     ALLOWED_HOSTS: List[str] = ["http://localhost:3000", "http://localhost:8000"]
 
+    # Market data provider
+    MARKET_DATA_PROVIDER: str = "yahoo"  # yahoo, fake
+    MARKET_DATA_MAX_WORKERS: int = 8
+    MARKET_DATA_MAX_CONCURRENCY: int = 16
+    MARKET_DATA_TIMEOUT_SECONDS: float = 10.0
+    MARKET_DATA_FAKE_LATENCY: float = 0.0  # seconds, fake provider only
+    MARKET_DATA_MAX_BATCH_SIZE: int = 100  # symbols per /market/quotes request
+
+    # Upstream call scheduling: one rate budget shared by all calls, served by priority class
+    MARKET_DATA_RATE_LIMIT: float = 5.0  # upstream calls per second; 0 disables scheduling
+    MARKET_DATA_RATE_BURST: int = 20
+    MARKET_DATA_QUEUE_LIMITS: Dict[str, int] = {"interactive": 200, "history": 100, "background": 500}
+    MARKET_DATA_QUEUE_TIMEOUTS: Dict[str, float] = {"interactive": 5.0, "history": 15.0, "background": 120.0}  # max queue wait
+    MARKET_DATA_REQUEST_DEADLINE_SECONDS: float = 20.0  # upstream work for an API request is dropped after this
+    MARKET_DATA_THROTTLE_RETRIES: int = 3
+    MARKET_DATA_THROTTLE_BACKOFF_SECONDS: float = 0.5  # first pause after a throttle, doubling per repeat
+    MARKET_DATA_THROTTLE_BACKOFF_MAX_SECONDS: float = 8.0
+    MARKET_DATA_FAKE_RATE_LIMIT: float = 0.0  # fake provider only: calls/second before it throttles
+
+    # Local OHLCV bar store (price_bars); intraday is left to the cache
+    BAR_STORE_ENABLED: bool = True
+    BAR_STORE_INTERVALS: List[str] = ["1d", "5d", "1wk", "1mo", "3mo"]
+
+    # Write-behind of latest quotes into market_data
+    MARKET_SNAPSHOT_FLUSH_SECONDS: float = 5.0
+    MARKET_SNAPSHOT_MAX_PENDING: int = 2000  # symbols buffered before an early flush
+    MARKET_SNAPSHOT_MAX_BUFFERED: int = 20000  # symbols kept while the database is unavailable; oldest dropped beyond
+
+    # Append-only quote log (price_observations, daily partitions) and its 1m/1h/1d rollups
+    PRICE_OBSERVATIONS_ENABLED: bool = True
+    PRICE_OBSERVATION_RETENTION_DAYS: int = 7  # raw partitions older than this are dropped
+    PRICE_OBSERVATION_PARTITIONS_AHEAD: int = 3  # days of partitions created in advance
+    PRICE_OBSERVATIONS_MAX_BUFFERED: int = 100000  # unwritten observations kept; oldest dropped beyond
+    PRICE_ROLLUP_INTERVAL_SECONDS: float = 60.0
+    PRICE_ROLLUP_LOOKBACK_SECONDS: int = 600  # buckets re-aggregated per run; covers write-behind lag
+    PRICE_ROLLUP_RETENTION_DAYS: Dict[str, int] = {"1m": 30, "1h": 730}  # 1d rollups are kept
+
+    # Symbol search (/market/search) over the local symbol master
+    SYMBOL_MASTER_PATH: str = "data/symbols.csv"  # relative paths are resolved against backend/
+    SYMBOL_MASTER_RELOAD_SECONDS: float = 30.0  # poll for changes and hot reload; 0 disables
+    SYMBOL_SEARCH_MAX_RESULTS: int = 50
+    SYMBOL_SEARCH_ES_MIRROR: bool = False  # copy the master into ELASTICSEARCH_URL on every (re)load
+    SYMBOL_SEARCH_ES_ALIAS: str = "symbols"
+
+    # Market indices served by /market/index (symbol -> display name, JSON in env)
+    MARKET_INDICES: Dict[str, str] = {
+        "^N225": "日経平均株価",
+        "^GSPC": "S&P 500",
+        "^IXIC": "NASDAQ",
+        "^DJI": "ダウ・ジョーンズ",
+        "USDJPY=X": "USD/JPY"
+    }
+    MARKET_INDEX_REFRESH_SECONDS: int = 60
+
+    # Live quote streaming (/market/stream)
+    MARKET_STREAM_POLL_SECONDS: float = 5.0  # upstream poll per subscribed symbol
+    MARKET_STREAM_MAX_SYMBOLS: int = 50  # per client
+    MARKET_STREAM_MAX_QUEUE: int = 100  # pending updates per client
+    MARKET_STREAM_MAX_DROPPED: int = 500  # dropped updates before disconnecting a slow client
+    MARKET_STREAM_HEARTBEAT_SECONDS: float = 15.0
+
+    # Portfolio analytics
+    ANALYTICS_CACHE_MAX_USERS: int = 256  # users whose reconstructed series stay in memory
+    ANALYTICS_CACHE_TTL: int = 3600
+    ANALYTICS_REFRESH_SECONDS: int = 300  # recompute the latest day at most this often
+
     # Logging
     LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "auto"  # auto (console when DEBUG, else json), console, json
+    LOG_ASYNC: bool = True  # json: write from a background thread instead of the caller
+    LOG_QUEUE_SIZE: int = 10000  # records buffered for the writer; overflow is dropped and counted
+    LOG_SQL: Optional[bool] = None  # log SQL statements (sampled); None follows DEBUG
+    LOG_SAMPLE_RATES: Dict[str, float] = {  # event or logger name -> fraction kept
+        "Quote fetched": 0.01,
+        "Quotes fetched": 0.01,
+        "sqlalchemy.engine.Engine": 0.01
+    }
 
     # Cache
     CACHE_TTL_SECONDS: int = 300  # 5 minutes
     MARKET_DATA_CACHE_TTL: int = 60  # 1 minute
+    CACHE_MAX_ENTRIES: int = 10000  # in-process LRU bound
+    CACHE_REDIS_ENABLED: bool = True  # shared tier across workers
 
     # Rate limiting
-    RATE_LIMIT_REQUESTS: int = 100
+    RATE_LIMIT_REQUESTS: int = 100  # per user
     RATE_LIMIT_WINDOW: int = 60  # seconds
+    RATE_LIMIT_IP_REQUESTS: int = 1000  # per client IP, all users and anonymous; sized for offices/NATs
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORE: str = "memory"  # memory (per worker), redis (shared across workers)
+    RATE_LIMIT_MAX_KEYS: int = 100000  # clients tracked by the memory store
+    RATE_LIMIT_ROUTE_COSTS: Dict[str, float] = {  # path prefix [?param=value] -> tokens per request (default 1)
+        "/api/v1/market/history/": 5,
+        "/api/v1/market/history/?period=max": 20,
+        "/api/v1/market/quotes": 2,
+        "/api/v1/analytics/": 5,
+        "/api/v1/transactions/import": 10,
+        "/api/v1/auth/login": 5,
+        "/api/v1/auth/token": 5,
+        "/api/v1/auth/register": 5
+    }
 
     class Config:
         env_file = ".env"
@@ -1,19 +1,100 @@
+from typing import Any, AsyncGenerator, Dict
+import time
+from fastapi import HTTPException
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.metrics import DB_POOL_CHECKOUT, DB_POOL_TIMEOUTS, DB_POOL_WAIT, register_pool_collector
 import structlog
 
 logger = structlog.get_logger()
 
+class PoolStats:
+    """Connection pool wait time (acquiring a connection) and checkout duration (holding it), in seconds"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.checkins = 0
+        self.held_total = 0.0
+        self.held_max = 0.0
+
+    def record_wait(self, wait: float) -> None:
+        self.checkouts += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+    def record_held(self, held: float) -> None:
+        self.checkins += 1
+        self.held_total += held
+        self.held_max = max(self.held_max, held)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": self.wait_total / self.checkouts * 1000 if self.checkouts else 0.0,
+            "wait_max_ms": self.wait_max * 1000,
+            "checkout_avg_ms": self.held_total / self.checkins * 1000 if self.checkins else 0.0,
+            "checkout_max_ms": self.held_max * 1000,
+        }
+
+pool_stats = PoolStats()
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except Exception:
+            pool_stats.timeouts += 1
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        wait = time.perf_counter() - started
+        pool_stats.record_wait(wait)
+        DB_POOL_WAIT.observe(wait)
+        return record
+
 # Create async engine
 engine = create_async_engine(
     settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://"),
-    echo=settings.DEBUG,
+    # SQL is logged through the sampled logging pipeline (LOG_SQL), not engine echo
+    echo=False,
+    poolclass=InstrumentedPool,
     pool_pre_ping=True,
     pool_size=20,
     max_overflow=0
 )
 
+@event.listens_for(engine.sync_engine.pool, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checked_out_at"] = time.perf_counter()
+
+@event.listens_for(engine.sync_engine.pool, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    started = connection_record.info.pop("checked_out_at", None)
+    if started is not None:
+        held = time.perf_counter() - started
+        pool_stats.record_held(held)
+        DB_POOL_CHECKOUT.observe(held)
+
+def pool_status() -> Dict[str, Any]:
+    pool = engine.sync_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        **pool_stats.as_dict(),
+    }
+
+register_pool_collector(pool_status)
+
 # Session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -24,15 +105,28 @@ AsyncSessionLocal = async_sessionmaker(
 class Base(DeclarativeBase):
     pass
 
-# Dependency to get database session
-async def get_db() -> AsyncSession:
+# Request-scoped unit of work. FastAPI caches dependencies per request, so
+# get_current_user and the endpoint share this one session; it only checks
+# out a pooled connection when the first query runs.
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         try:
             yield session
             await session.commit()
+        except HTTPException:
+            await session.rollback()
+            raise
         except Exception as e:
             await session.rollback()
             logger.error("Database session error", error=str(e))
             raise
-        finally:
-            await session.close()
\ No newline at end of file
+
+async def release_connection(session: AsyncSession) -> None:
+    """Commit the session's transaction so its connection returns to the pool
+
+    Call before awaiting slow non-database work (upstream APIs); loaded
+    objects stay usable (expire_on_commit=False) and the next query checks
+    a connection out again.
+    """
+    if session.in_transaction():
+        await session.commit()
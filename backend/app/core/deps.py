@@ -1,34 +1,46 @@
-from typing import AsyncGenerator
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+import asyncio
+from fastapi import Depends, HTTPException, Query, Request, WebSocket, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.core.database import AsyncSessionLocal
+from starlette.requests import HTTPConnection
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_db, release_connection  # get_db re-exported for endpoints
+from app.core.principal_cache import get_principal_cache
 from app.models.user import User
+from app.services.market_data.upstream_context import set_upstream_context
 from app.utils.security import verify_token
 import structlog
 
 logger = structlog.get_logger()
 security = HTTPBearer()
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Get database session"""
-    async with AsyncSessionLocal() as session:
-        try:
-            yield session
-            await session.commit()
-        except Exception as e:
-            await session.rollback()
-            logger.error("Database session error", error=str(e))
-            raise
-        finally:
-            await session.close()
+async def _select_user(db: AsyncSession, email: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalar_one_or_none()
+
+async def _load_user_with_session(email: str) -> Optional[User]:
+    async with AsyncSessionLocal() as db:
+        return await _select_user(db, email)
+
+async def _load_user_and_release(db: AsyncSession, email: str) -> Optional[User]:
+    user = await _select_user(db, email)
+    # The endpoint may await upstream calls next; don't hold the connection through them
+    await release_connection(db)
+    return user
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
 ) -> User:
-    """Get current authenticated user"""
+    """Get current authenticated user
+
+    A principal cache miss is loaded on the request's shared session, whose
+    connection is released straight after, so authentication never leaves
+    it checked out. Requests coalesced onto that lookup wait on the first
+    request's session.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -45,10 +57,8 @@ async def get_current_user(
         if email is None:
             raise credentials_exception
 
-        # Get user from database
-        stmt = select(User).where(User.email == email)
-        result = await db.execute(stmt)
-        user = result.scalar_one_or_none()
+        # Get user from the principal cache, falling back to the database
+        user = await get_principal_cache().get_user(email, lambda: _load_user_and_release(db, email))
 
         if user is None:
             raise credentials_exception
@@ -63,4 +73,53 @@ async def get_current_user(
 
     except Exception as e:
         logger.error("Authentication error", error=str(e))
-        raise credentials_exception
\ No newline at end of file
+        raise credentials_exception
+
+async def _get_active_user_for_token(token: Optional[str]) -> Optional[User]:
+    """Resolve a bearer token to an active user with a short-lived session
+
+    Long-lived connections (WebSocket, SSE) use this instead of get_db so no
+    pooled connection is held for the lifetime of the stream.
+    """
+    payload = verify_token(token) if token else None
+    email = payload.get("sub") if payload else None
+    if email is None:
+        return None
+
+    user = await get_principal_cache().get_user(email, lambda: _load_user_with_session(email))
+    if user is None or not user.is_active:
+        return None
+    return user
+
+async def get_websocket_user(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None)
+) -> Optional[User]:
+    """Authenticate a WebSocket from its ?token= query parameter (browsers cannot set headers)"""
+    return await _get_active_user_for_token(token)
+
+async def get_streaming_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
+    token: Optional[str] = Query(None)
+) -> User:
+    """Authenticate a streaming response from the Bearer header or ?token= (for EventSource)"""
+    user = await _get_active_user_for_token(credentials.credentials if credentials else token)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+async def upstream_request_context(connection: HTTPConnection) -> None:
+    """Give upstream market data calls made for this request a deadline and a disconnect check
+
+    Queued calls are dropped once the deadline passes or the client has
+    gone. Each request runs in its own task, so nothing needs resetting.
+    """
+    if isinstance(connection, Request):
+        set_upstream_context(
+            deadline=asyncio.get_running_loop().time() + settings.MARKET_DATA_REQUEST_DEADLINE_SECONDS,
+            disconnected=connection.is_disconnected,
+        )
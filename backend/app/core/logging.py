@@ -1,33 +1,266 @@
-import structlog
+from typing import Any, BinaryIO, Dict, List, Optional
+import atexit
 import logging
+import queue
+import random
 import sys
+import threading
+import orjson
+import structlog
 from app.core.config import settings
+from app.core.metrics import LOG_QUEUE_DEPTH, LOG_RECORDS_DROPPED, LOG_RECORDS_SAMPLED_OUT
+
+SQL_LOGGER = "sqlalchemy.engine.Engine"
+
+_writer: Optional["LogWriter"] = None
+
+
+class LogWriter:
+    """Writes rendered log lines to a binary stream from a background thread
+
+    Callers only enqueue bytes, so a slow or blocked stdout never stalls
+    the event loop. The queue is bounded: when it is full the record is
+    dropped and counted instead of blocking. The thread writes whatever
+    has accumulated in one call, so bursts cost one syscall per batch.
+    """
+
+    def __init__(self, stream: BinaryIO, max_queue: int, threaded: bool = True, batch_size: int = 512):
+        self.stream = stream
+        self.threaded = threaded
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        if threaded:
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def write(self, line: bytes) -> None:
+        if not self.threaded:
+            self.stream.write(line + b"\n")
+            self.stream.flush()
+            return
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+
+    def _run(self) -> None:
+        while True:
+            line = self._queue.get()
+            batch: List[bytes] = []
+            stop = line is None
+            if not stop:
+                batch.append(line)
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    line = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if line is None:
+                    stop = True
+                else:
+                    batch.append(line)
+            if batch:
+                try:
+                    self.stream.write(b"\n".join(batch) + b"\n")
+                    self.stream.flush()
+                except Exception:
+                    self.dropped += len(batch)
+                    LOG_RECORDS_DROPPED.inc(len(batch))
+            if stop:
+                return
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Write out what is queued and stop the thread; later records are written inline"""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+        self.threaded = False
+
+
+class QueueLogger:
+    """structlog logger that hands rendered lines to the writer; ``name`` feeds add_logger_name"""
+
+    def __init__(self, writer: LogWriter, name: str):
+        self.writer = writer
+        self.name = name
+
+    def msg(self, message: bytes) -> None:
+        self.writer.write(message)
+
+    log = debug = info = warning = warn = error = critical = exception = fatal = msg
+
+
+class QueueLoggerFactory:
+    def __init__(self, writer: LogWriter):
+        self.writer = writer
+        # Reuse the stdlib factory's caller-module lookup for the logger name
+        self._names = structlog.stdlib.LoggerFactory(ignore_frame_names=[__name__])
+
+    def __call__(self, *args: Any) -> QueueLogger:
+        return QueueLogger(self.writer, self._names(*args).name)
+
+
+class EventSampler:
+    """Keeps a configured fraction of records per event name or logger name
+
+    Kept records carry ``sample_rate`` so aggregations can re-weight them.
+    Works both as a structlog processor and as a check for stdlib records.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        self.rates = {key: rate for key, rate in rates.items() if rate < 1.0}
+        self._sampled_out = {key: LOG_RECORDS_SAMPLED_OUT.labels(key) for key in self.rates}
+
+    def keep(self, key: str) -> bool:
+        rate = self.rates.get(key)
+        if rate is None or random.random() < rate:
+            return True
+        self._sampled_out[key].inc()
+        return False
+
+    def __call__(self, logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.rates:
+            return event_dict
+        key = event_dict.get("event")
+        if key not in self.rates:
+            key = getattr(logger, "name", None)
+            if key not in self.rates:
+                return event_dict
+        if not self.keep(key):
+            raise structlog.DropEvent
+        event_dict["sample_rate"] = self.rates[key]
+        return event_dict
+
+
+class QueueHandler(logging.Handler):
+    """Routes stdlib records (SQLAlchemy, uvicorn, ...) through sampling, JSON rendering and the writer"""
+
+    def __init__(self, writer: LogWriter, sampler: EventSampler, formatter: logging.Formatter):
+        super().__init__()
+        self.writer = writer
+        self.sampler = sampler
+        self.setFormatter(formatter)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if record.name in self.sampler.rates:
+                if not self.sampler.keep(record.name):
+                    return
+                record.sample_rate = self.sampler.rates[record.name]
+            self.writer.write(self.format(record).encode())
+        except Exception:
+            self.handleError(record)
+
+
+def _orjson_dumps(value: Any, **kwargs: Any) -> bytes:
+    return orjson.dumps(value, default=str)
+
+
+def _log_format() -> str:
+    if settings.LOG_FORMAT != "auto":
+        return settings.LOG_FORMAT
+    return "console" if settings.DEBUG else "json"
+
+
+def _sql_logging() -> bool:
+    return settings.DEBUG if settings.LOG_SQL is None else settings.LOG_SQL
+
 
 def setup_logging():
-    """Configure structured logging"""
+    """Configure structured logging
 
-    # Configure standard library logging
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=getattr(logging, settings.LOG_LEVEL.upper())
+    ``console`` (DEBUG default) renders human-readable lines synchronously.
+    ``json`` renders with orjson on the calling thread and writes from a
+    background thread through a bounded queue (LOG_ASYNC), with per-event
+    sampling (LOG_SAMPLE_RATES) for both structlog events and stdlib
+    loggers such as SQL statements (LOG_SQL).
+    """
+    global _writer
+    level = getattr(logging, settings.LOG_LEVEL.upper())
+    logging.getLogger(SQL_LOGGER).setLevel(logging.INFO if _sql_logging() else logging.WARNING)
+
+    if _log_format() == "console":
+        # Configure standard library logging
+        logging.basicConfig(
+            format="%(message)s",
+            stream=sys.stdout,
+            level=level
+        )
+
+        # Configure structlog
+        structlog.configure(
+            processors=[
+                structlog.stdlib.filter_by_level,
+                structlog.stdlib.add_logger_name,
+                structlog.stdlib.add_log_level,
+                structlog.stdlib.PositionalArgumentsFormatter(),
+                structlog.processors.TimeStamper(fmt="iso"),
+                structlog.processors.StackInfoRenderer(),
+                structlog.processors.format_exc_info,
+                structlog.processors.UnicodeDecoder(),
+                structlog.dev.ConsoleRenderer()
+            ],
+            context_class=dict,
+            logger_factory=structlog.stdlib.LoggerFactory(),
+            cache_logger_on_first_use=True,
+        )
+        return
+
+    close_logging()
+    _writer = LogWriter(sys.stdout.buffer, max_queue=settings.LOG_QUEUE_SIZE, threaded=settings.LOG_ASYNC)
+    LOG_QUEUE_DEPTH.set_function(_writer.qsize)
+    sampler = EventSampler(settings.LOG_SAMPLE_RATES)
+
+    shared = [
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        structlog.processors.TimeStamper(fmt="iso", utc=True),
+    ]
+    formatter = structlog.stdlib.ProcessorFormatter(
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(serializer=lambda value, **kwargs: _orjson_dumps(value).decode()),
+        ],
+        foreign_pre_chain=[*shared, structlog.stdlib.ExtraAdder(allow=["sample_rate"])],
     )
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(_writer, sampler, formatter)]
+    root.setLevel(level)
 
-    # Configure structlog
     structlog.configure(
         processors=[
-            structlog.stdlib.filter_by_level,
-            structlog.stdlib.add_logger_name,
-            structlog.stdlib.add_log_level,
+            sampler,
+            *shared,
             structlog.stdlib.PositionalArgumentsFormatter(),
-            structlog.processors.TimeStamper(fmt="iso"),
             structlog.processors.StackInfoRenderer(),
             structlog.processors.format_exc_info,
-            structlog.processors.UnicodeDecoder(),
-            structlog.processors.JSONRenderer() if not settings.DEBUG
-            else structlog.dev.ConsoleRenderer()
+            structlog.processors.JSONRenderer(serializer=_orjson_dumps),
         ],
+        wrapper_class=structlog.make_filtering_bound_logger(level),
         context_class=dict,
-        logger_factory=structlog.stdlib.LoggerFactory(),
+        logger_factory=QueueLoggerFactory(_writer),
         cache_logger_on_first_use=True,
-    )
\ No newline at end of file
+    )
+
+
+def close_logging() -> None:
+    """Flush and stop the background log writer (no-op in console mode)"""
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
+
+
+atexit.register(close_logging)
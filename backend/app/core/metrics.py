@@ -0,0 +1,214 @@
+from typing import Any, Callable, Collection, Dict, Iterable, Optional
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import REGISTRY, CounterMetricFamily, GaugeMetricFamily, Metric
+
+# Latency buckets (seconds) shared by HTTP and upstream histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Pool waits are normally sub-millisecond; finer buckets at the low end
+POOL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+UNMATCHED_ROUTE = "<unmatched>"
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, method and status",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+    ["method"],
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    buckets=POOL_BUCKETS,
+)
+DB_POOL_CHECKOUT = Histogram(
+    "db_pool_checkout_seconds",
+    "Time a database connection was held between checkout and checkin",
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Connection checkouts that failed (pool exhausted or connect error)",
+)
+UPSTREAM_DURATION = Histogram(
+    "market_data_upstream_duration_seconds",
+    "Upstream market data call latency by provider and method",
+    ["provider", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    "market_data_upstream_errors_total",
+    "Failed upstream market data calls by provider, method and error type",
+    ["provider", "method", "error"],
+)
+UPSTREAM_QUEUE_WAIT = Histogram(
+    "market_data_upstream_queue_wait_seconds",
+    "Time upstream calls waited for the scheduler's rate budget",
+    ["priority"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_SHED = Counter(
+    "market_data_upstream_shed_total",
+    "Upstream calls dropped before running (queue_full, deadline, disconnected)",
+    ["priority", "reason"],
+)
+UPSTREAM_RETRIES = Counter(
+    "market_data_upstream_retries_total",
+    "Upstream calls retried after the provider throttled them",
+    ["priority"],
+)
+
+LOG_QUEUE_DEPTH = Gauge(
+    "log_queue_depth",
+    "Log records waiting for the background writer",
+)
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "Log records dropped because the writer queue was full",
+)
+LOG_RECORDS_SAMPLED_OUT = Counter(
+    "log_records_sampled_out_total",
+    "Log records skipped by per-event sampling",
+    ["event"],
+)
+
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected with 429 by client kind (user or ip)",
+    ["kind"],
+)
+RATE_LIMIT_STORE_ERRORS = Counter(
+    "rate_limit_store_errors_total",
+    "Rate limit store failures (checks fell back to the in-process store)",
+)
+
+
+class PoolCollector:
+    """Reads pool size / checked out / overflow from the engine at scrape time"""
+
+    def __init__(self, status: Callable[[], Dict[str, Any]]):
+        self.status = status
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        status = self.status()
+        yield GaugeMetricFamily("db_pool_size", "Configured connection pool size", value=status["size"])
+        yield GaugeMetricFamily("db_pool_checked_out", "Connections currently checked out", value=status["checked_out"])
+        yield GaugeMetricFamily("db_pool_overflow", "Connections beyond pool_size (negative: unused slots)", value=status["overflow"])
+
+
+def register_pool_collector(status: Callable[[], Dict[str, Any]]) -> None:
+    REGISTRY.register(PoolCollector(status))
+
+
+class StatsCollector:
+    """Exports a component's in-process stats (its as_dict()) at scrape time
+
+    ``stats`` returns a flat dict, or None while the component has not been
+    created. Keys in ``counters`` are monotonic totals and become
+    ``{prefix}_{key}_total`` counters; every other numeric entry is a level
+    (size, depth, average) and becomes a ``{prefix}_{key}`` gauge. With
+    ``label`` it returns {label value: flat dict} instead (e.g. per
+    priority class). Non-numeric entries are skipped.
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        stats: Callable[[], Optional[Dict[str, Any]]],
+        label: Optional[str] = None,
+        counters: Collection[str] = (),
+    ):
+        self.prefix = prefix
+        self.stats = stats
+        self.label = label
+        self.counters = frozenset(counters)
+
+    def _family(self, key: str) -> Metric:
+        name = f"{self.prefix}_{key}"
+        documentation = f"{self.prefix.replace('_', ' ')}: {key.replace('_', ' ')}"
+        labels = [self.label] if self.label else None
+        if key in self.counters:
+            return CounterMetricFamily(name, documentation, labels=labels)
+        return GaugeMetricFamily(name, documentation, labels=labels)
+
+    def collect(self) -> Iterable[Metric]:
+        stats = self.stats()
+        if not stats:
+            return
+        rows = stats.items() if self.label else [(None, stats)]
+        families: Dict[str, Metric] = {}
+        for label_value, values in rows:
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                family = families.get(key)
+                if family is None:
+                    family = families[key] = self._family(key)
+                family.add_metric([label_value] if self.label else [], value)
+        yield from families.values()
+
+
+def register_stats_collector(
+    prefix: str,
+    stats: Callable[[], Optional[Dict[str, Any]]],
+    label: Optional[str] = None,
+    counters: Collection[str] = (),
+) -> None:
+    REGISTRY.register(StatsCollector(prefix, stats, label, counters))
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route latency and in-flight requests
+
+    The route label is the matched route's path template (set on the scope
+    by FastAPI's router), so cardinality is bounded by the number of
+    routes; unmatched paths share one label. Label children are cached,
+    making the per-request cost two dict lookups, one gauge inc/dec and
+    one histogram observe.
+    """
+
+    def __init__(self, app, exclude: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.exclude = frozenset(exclude)
+        self._in_flight: Dict[str, Any] = {}
+        self._durations: Dict[tuple, Any] = {}
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        in_flight = self._in_flight.get(method)
+        if in_flight is None:
+            in_flight = self._in_flight[method] = HTTP_REQUESTS_IN_FLIGHT.labels(method)
+        status_code = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            route = scope.get("route")
+            key = (method, route.path if route is not None else UNMATCHED_ROUTE, status_code)
+            duration = self._durations.get(key)
+            if duration is None:
+                duration = self._durations[key] = HTTP_REQUEST_DURATION.labels(key[0], key[1], str(key[2]))
+            duration.observe(elapsed)
+
+
+def render_metrics() -> bytes:
+    return generate_latest(REGISTRY)
+
@@ -0,0 +1,151 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import os
+import threading
+import time
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import register_stats_collector
+from app.utils.security import get_password_hash, verify_password
+
+logger = structlog.get_logger()
+
+
+class PasswordHasherBusy(Exception):
+    """Raised instead of queueing when the hasher's backlog is full"""
+
+
+class PasswordHasherStats:
+    """Operation counts plus queue-wait and hash-time totals/maxima (seconds)"""
+
+    def __init__(self):
+        self.hashes = 0
+        self.verifies = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.hash_time_total = 0.0
+        self.hash_time_max = 0.0
+
+    def record(self, queue_wait: float, hash_time: float) -> None:
+        self.queue_wait_total += queue_wait
+        self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+        self.hash_time_total += hash_time
+        self.hash_time_max = max(self.hash_time_max, hash_time)
+
+    def as_dict(self) -> Dict[str, Any]:
+        completed = self.hashes + self.verifies
+        return {
+            "hashes": self.hashes,
+            "verifies": self.verifies,
+            "rejected": self.rejected,
+            "queue_wait_avg_ms": self.queue_wait_total / completed * 1000 if completed else 0.0,
+            "queue_wait_max_ms": self.queue_wait_max * 1000,
+            "hash_time_avg_ms": self.hash_time_total / completed * 1000 if completed else 0.0,
+            "hash_time_max_ms": self.hash_time_max * 1000,
+        }
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing/verification on a dedicated thread pool
+
+    bcrypt releases the GIL while hashing, so the pool gives real
+    parallelism and the event loop keeps serving other requests. At most
+    ``max_workers + max_queue`` operations may be pending; beyond that
+    calls fail fast with PasswordHasherBusy instead of growing the backlog.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_pending = max_workers + max_queue
+        self.stats = PasswordHasherStats()
+        self._pending = 0
+        # Slots are released from worker threads
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hasher")
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def hash(self, password: str) -> str:
+        result = await self._run(get_password_hash, password)
+        self.stats.hashes += 1
+        return result
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        result = await self._run(verify_password, plain_password, hashed_password)
+        self.stats.verifies += 1
+        return result
+
+    async def _run(self, func: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.stats.rejected += 1
+                logger.warning("Password hasher saturated", pending=self._pending)
+                raise PasswordHasherBusy("Password hashing queue is full")
+            self._pending += 1
+
+        submitted = time.perf_counter()
+
+        def work():
+            started = time.perf_counter()
+            result = func(*args)
+            return result, started - submitted, time.perf_counter() - started
+
+        try:
+            future = self._executor.submit(work)
+        except BaseException:
+            self._release(None)
+            raise
+        # Release the slot when the thread is done with the job (or it was cancelled before
+        # starting), not when the awaiting request goes away while bcrypt is still running
+        future.add_done_callback(self._release)
+        result, queue_wait, hash_time = await asyncio.wrap_future(future)
+        self.stats.record(queue_wait, hash_time)
+        return result
+
+    def _release(self, future: Optional[Future]) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_password_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _password_hasher
+    if _password_hasher is None:
+        workers = settings.PASSWORD_HASH_MAX_WORKERS or max(1, (os.cpu_count() or 1) - 1)
+        _password_hasher = PasswordHasher(
+            max_workers=workers,
+            max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+        )
+    return _password_hasher
+
+
+def _hasher_stats() -> Optional[Dict[str, Any]]:
+    if _password_hasher is None:
+        return None
+    return {
+        "workers": _password_hasher.max_workers,
+        "max_pending": _password_hasher.max_pending,
+        "pending": _password_hasher.pending,
+        **_password_hasher.stats.as_dict(),
+    }
+
+
+# Served on /metrics only; auth endpoints expose no operational counters
+register_stats_collector("password_hasher", _hasher_stats, counters=("hashes", "verifies", "rejected"))
+
+
+def close_password_hasher() -> None:
+    global _password_hasher
+    if _password_hasher is not None:
+        _password_hasher.close()
+        _password_hasher = None
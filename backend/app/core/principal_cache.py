@@ -0,0 +1,89 @@
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+import uuid
+
+from app.core.cache import RedisCache, TieredCache, TTLCache
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.models.user import RiskTolerance, User
+
+
+def _dump_user(user: User) -> Dict[str, Any]:
+    return {
+        "user_id": str(user.user_id),
+        "email": user.email,
+        "risk_tolerance": user.risk_tolerance.value if user.risk_tolerance else None,
+        "is_active": user.is_active,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "updated_at": user.updated_at.isoformat() if user.updated_at else None,
+    }
+
+
+def _load_user(data: Dict[str, Any]) -> User:
+    """Fresh transient User per request, so callers never share a mutable instance"""
+    return User(
+        user_id=uuid.UUID(data["user_id"]),
+        email=data["email"],
+        risk_tolerance=RiskTolerance(data["risk_tolerance"]) if data["risk_tolerance"] else None,
+        is_active=data["is_active"],
+        created_at=datetime.fromisoformat(data["created_at"]) if data["created_at"] else None,
+        updated_at=datetime.fromisoformat(data["updated_at"]) if data["updated_at"] else None,
+    )
+
+
+class PrincipalCache:
+    """Short-TTL cache of authenticated users keyed by token subject (email)
+
+    Entries are plain column dicts without the password hash; each lookup
+    builds a detached User, so writes must go through explicit statements
+    and call ``invalidate``. A TTL of 0 disables the cache.
+    """
+
+    def __init__(self, ttl: float, cache: TieredCache):
+        self.ttl = ttl
+        self.cache = cache
+
+    @staticmethod
+    def key(email: str) -> str:
+        # Exact subject: emails are unique case-sensitively and looked up verbatim
+        return f"auth:principal:{email}"
+
+    async def get_user(self, email: str, loader: Callable[[], Awaitable[Optional[User]]]) -> Optional[User]:
+        if self.ttl <= 0:
+            return await loader()
+
+        async def load() -> Optional[Dict[str, Any]]:
+            user = await loader()
+            return _dump_user(user) if user is not None else None
+
+        data = await self.cache.get_or_load(self.key(email), load, ttl=self.ttl)
+        return _load_user(data) if data is not None else None
+
+    async def invalidate(self, email: str) -> None:
+        await self.cache.invalidate(self.key(email))
+
+
+_principal_cache: Optional[PrincipalCache] = None
+
+
+def get_principal_cache() -> PrincipalCache:
+    global _principal_cache
+    if _principal_cache is None:
+        local = TTLCache(max_entries=settings.CACHE_MAX_ENTRIES, default_ttl=settings.AUTH_PRINCIPAL_CACHE_TTL)
+        remote = RedisCache(settings.REDIS_URL) if settings.CACHE_REDIS_ENABLED else None
+        # With Redis, principals live only there so an invalidation reaches every worker
+        _principal_cache = PrincipalCache(
+            settings.AUTH_PRINCIPAL_CACHE_TTL,
+            TieredCache(local, remote, flights=SingleFlight(), local_ttl=0 if remote is not None else None),
+        )
+    return _principal_cache
+
+
+async def invalidate_principal(email: str) -> None:
+    """Drop a user's cached principal; call after changing or deactivating the user
+
+    With Redis the change is seen by every worker on its next request.
+    Without it only this process is invalidated: other workers keep the old
+    principal for up to AUTH_PRINCIPAL_CACHE_TTL seconds.
+    """
+    await get_principal_cache().invalidate(email)
@@ -0,0 +1,342 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+import json
+import math
+import time
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import RATE_LIMIT_REJECTIONS, RATE_LIMIT_STORE_ERRORS
+from app.utils.security import verify_token
+
+logger = structlog.get_logger()
+
+# (allowed, tokens left after this request, seconds until the request would fit)
+Decision = Tuple[bool, float, float]
+
+# KEYS[1] bucket; ARGV capacity, refill per second, cost. Uses the Redis clock so
+# every worker refills the same way; state is a hash of tokens and last refill
+# time, expiring once the bucket would be full again.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+else
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+end
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+# KEYS[1] bucket; ARGV capacity, tokens to give back. A bucket that has
+# expired is already full, so there is nothing to refund.
+REFUND_SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if tokens ~= nil then
+    redis.call('HSET', KEYS[1], 'tokens', tostring(math.min(tonumber(ARGV[1]), tokens + tonumber(ARGV[2]))))
+end
+return 1
+"""
+
+
+def _take(tokens: float, elapsed: float, capacity: float, rate: float, cost: float) -> Tuple[float, Decision]:
+    """Refill for ``elapsed`` seconds then try to spend ``cost``; returns (new tokens, decision)"""
+    tokens = min(capacity, tokens + max(elapsed, 0.0) * rate)
+    if tokens >= cost:
+        tokens -= cost
+        return tokens, (True, tokens, 0.0)
+    return tokens, (False, tokens, (cost - tokens) / rate)
+
+
+class MemoryBucketStore:
+    """Token buckets in a per-process dict (one worker, or per-worker limits)
+
+    Each check is one dict lookup and a few float operations. The LRU
+    bound caps memory under many distinct clients; an evicted bucket
+    simply starts full again.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> (tokens, monotonic time of last refill)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, cost: float, capacity: float, rate: float) -> Decision:
+        now = time.monotonic()
+        state = self._buckets.get(key)
+        if state is None:
+            tokens, decision = _take(capacity, 0.0, capacity, rate, cost)
+        else:
+            tokens, decision = _take(state[0], now - state[1], capacity, rate, cost)
+            self._buckets.move_to_end(key)
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return decision
+
+    async def refund(self, key: str, cost: float, capacity: float) -> None:
+        state = self._buckets.get(key)
+        if state is not None:
+            self._buckets[key] = (min(capacity, state[0] + cost), state[1])
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RedisBucketStore:
+    """Token buckets shared by all workers, updated atomically by a Lua script
+
+    One round-trip per check. If Redis fails, checks fall back to the
+    in-process ``fallback`` store for ``retry_after`` seconds, so limits
+    become per-worker instead of disappearing.
+    """
+
+    def __init__(self, url: str, fallback: MemoryBucketStore, prefix: str = "pia:ratelimit:", retry_after: float = 30.0):
+        self.url = url
+        self.fallback = fallback
+        self.prefix = prefix
+        self.retry_after = retry_after
+        self._client = None
+        self._script = None
+        self._refund_script = None
+        self._disabled_until = 0.0
+
+    def _register(self) -> None:
+        import redis.asyncio as redis
+        self._client = redis.from_url(self.url)
+        self._script = self._client.register_script(TOKEN_BUCKET_SCRIPT)
+        self._refund_script = self._client.register_script(REFUND_SCRIPT)
+
+    @property
+    def script(self):
+        if self._script is None:
+            self._register()
+        return self._script
+
+    @property
+    def refund_script(self):
+        if self._refund_script is None:
+            self._register()
+        return self._refund_script
+
+    def _failed(self, error: Exception) -> None:
+        RATE_LIMIT_STORE_ERRORS.inc()
+        self._disabled_until = time.monotonic() + self.retry_after
+        logger.warning("Redis rate limit store unavailable", error=str(error), retry_after=self.retry_after)
+
+    async def take(self, key: str, cost: float, capacity: float, rate: float) -> Decision:
+        if time.monotonic() < self._disabled_until:
+            return await self.fallback.take(key, cost, capacity, rate)
+        try:
+            allowed, tokens, retry_after = await self.script(keys=[self.prefix + key], args=[capacity, rate, cost])
+        except Exception as e:
+            self._failed(e)
+            return await self.fallback.take(key, cost, capacity, rate)
+        return bool(allowed), float(tokens), float(retry_after)
+
+    async def refund(self, key: str, cost: float, capacity: float) -> None:
+        if time.monotonic() < self._disabled_until:
+            await self.fallback.refund(key, cost, capacity)
+            return
+        try:
+            await self.refund_script(keys=[self.prefix + key], args=[capacity, cost])
+        except Exception as e:
+            # A lost refund only costs the client one request's tokens
+            self._failed(e)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+            self._script = None
+            self._refund_script = None
+
+
+class RouteCosts:
+    """Token cost per request from path-prefix rules
+
+    Keys are path prefixes, optionally with one ``?param=value`` condition
+    (``/api/v1/market/history/?period=max``); the longest matching prefix
+    wins and, for equal prefixes, a matching condition beats none. Paths
+    without a rule cost ``default``.
+    """
+
+    def __init__(self, costs: Dict[str, float], default: float = 1.0):
+        self.default = default
+        rules: List[Tuple[str, Optional[Tuple[str, str]], float]] = []
+        for pattern, cost in costs.items():
+            prefix, _, condition = pattern.partition("?")
+            param = tuple(condition.split("=", 1)) if "=" in condition else None
+            rules.append((prefix, param, float(cost)))
+        # Longest prefix first, conditional rules before the plain rule for the same prefix
+        self.rules = sorted(rules, key=lambda rule: (len(rule[0]), rule[1] is not None), reverse=True)
+
+    def cost(self, path: str, query_string: bytes = b"") -> float:
+        query: Optional[Dict[str, str]] = None
+        for prefix, param, cost in self.rules:
+            if not path.startswith(prefix):
+                continue
+            if param is None:
+                return cost
+            if query is None:
+                query = dict(parse_qsl(query_string.decode("latin-1")))
+            if query.get(param[0]) == param[1]:
+                return cost
+        return self.default
+
+
+class RateLimiter:
+    """Token buckets per user and per client IP, refilled evenly over ``window`` seconds
+
+    A user may burst up to ``requests`` tokens, then sustains
+    requests/window per second; a client address gets ``ip_requests``
+    (default: the same) across all of its traffic, authenticated or not,
+    so it should be sized for many users behind one NAT. Requests spend
+    their route's cost.
+    """
+
+    def __init__(self, store, requests: int, window: float, costs: RouteCosts, ip_requests: Optional[int] = None):
+        self.store = store
+        self.costs = costs
+        ip_requests = ip_requests or requests
+        # kind -> (capacity, refill per second)
+        self.limits = {"user": (float(requests), requests / window), "ip": (float(ip_requests), ip_requests / window)}
+
+    async def check(self, kind: str, identity: str, cost: float) -> Decision:
+        capacity, rate = self.limits[kind]
+        # A cost above capacity could never be paid; charge a full bucket instead
+        return await self.store.take(f"{kind}:{identity}", min(cost, capacity), capacity, rate)
+
+    async def refund(self, kind: str, identity: str, cost: float) -> None:
+        """Give back what ``check`` charged, for a request another bucket rejected"""
+        capacity, _ = self.limits[kind]
+        await self.store.refund(f"{kind}:{identity}", min(cost, capacity), capacity)
+
+
+def client_identity(scope) -> Tuple[Optional[str], str]:
+    """(subject of a valid bearer token or None, client address)
+
+    Token verification is cached by verify_token, so this costs a hash and
+    a dict lookup. Behind a proxy run uvicorn with --proxy-headers so the
+    client address is the real one.
+    """
+    user = None
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                payload = verify_token(token)
+                if payload and payload.get("sub"):
+                    user = payload["sub"]
+            break
+    client = scope.get("client")
+    return user, client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware enforcing the rate limiter per user and per client IP
+
+    Authenticated requests are charged to both the user's and the
+    address's bucket, so neither one account spread over many addresses
+    nor many accounts behind one address get past the limits; anonymous
+    requests only have the address bucket. A request rejected by either
+    bucket is refunded to the other, so it costs nothing. Over-limit requests get
+    429 with ``Retry-After`` (whole seconds) and never reach the app;
+    every limited response carries ``X-RateLimit-Limit`` /
+    ``X-RateLimit-Remaining`` of the tighter bucket.
+    """
+
+    def __init__(self, app, limiter: RateLimiter, exclude: Tuple[str, ...] = ("/health", "/metrics")):
+        self.app = app
+        self.limiter = limiter
+        self.exclude = frozenset(exclude)
+        self._limit_headers = {kind: str(int(capacity)).encode() for kind, (capacity, _) in limiter.limits.items()}
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        user, address = client_identity(scope)
+        cost = self.limiter.costs.cost(scope["path"], scope.get("query_string", b""))
+        checks = (("user", user), ("ip", address)) if user is not None else (("ip", address),)
+        tightest = None
+        charged = []
+        for kind, identity in checks:
+            allowed, remaining, retry_after = await self.limiter.check(kind, identity, cost)
+            if tightest is None or not allowed or remaining < tightest[1]:
+                tightest = (kind, remaining)
+            if not allowed:
+                for charged_kind, charged_identity in charged:
+                    await self.limiter.refund(charged_kind, charged_identity, cost)
+                break
+            charged.append((kind, identity))
+        kind, remaining = tightest
+        headers = [
+            (b"x-ratelimit-limit", self._limit_headers[kind]),
+            (b"x-ratelimit-remaining", str(int(remaining)).encode()),
+        ]
+
+        if not allowed:
+            RATE_LIMIT_REJECTIONS.labels(kind).inc()
+            body = json.dumps({"detail": "Rate limit exceeded"}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+                    *headers,
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), *headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _rate_limiter
+    if _rate_limiter is None:
+        store = MemoryBucketStore(settings.RATE_LIMIT_MAX_KEYS)
+        if settings.RATE_LIMIT_STORE == "redis":
+            store = RedisBucketStore(settings.REDIS_URL, fallback=store)
+        _rate_limiter = RateLimiter(
+            store,
+            settings.RATE_LIMIT_REQUESTS,
+            settings.RATE_LIMIT_WINDOW,
+            RouteCosts(settings.RATE_LIMIT_ROUTE_COSTS),
+            ip_requests=settings.RATE_LIMIT_IP_REQUESTS,
+        )
+    return _rate_limiter
+
+
+async def close_rate_limiter() -> None:
+    if _rate_limiter is not None and isinstance(_rate_limiter.store, RedisBucketStore):
+        await _rate_limiter.store.close()
@@ -0,0 +1,55 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key onto one in-flight task
+
+    The shared work runs as its own task, so a caller that is cancelled
+    (e.g. the client disconnected) does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = self._start(func)
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.coalesced += 1
+            self._join(task)
+        return await self._wait(task)
+
+    def _start(self, func: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Start the shared task (in a copy of the first caller's context)"""
+        return asyncio.ensure_future(func())
+
+    def _join(self, task: asyncio.Task) -> None:
+        """Called for every caller coalesced onto an in-flight task"""
+
+    async def _wait(self, task: asyncio.Task) -> Any:
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter went away
+            task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight,
+        }
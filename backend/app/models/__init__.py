@@ -3,11 +3,17 @@ from .portfolio import Portfolio
 from .investment_history import InvestmentHistory
 from .conversation import Conversation
 from .market_data import MarketData
+from .price_bar import PriceBar, PriceBarSeries
+from .price_observation import PriceObservation, PriceRollup
 
 __all__ = [
     "User",
     "Portfolio",
     "InvestmentHistory",
     "Conversation",
-    "MarketData"
+    "MarketData",
+    "PriceBar",
+    "PriceBarSeries",
+    "PriceObservation",
+    "PriceRollup"
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Numeric, Date, DateTime, ForeignKey
+from sqlalchemy import Column, String, Numeric, Date, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -7,6 +7,9 @@ from app.core.database import Base
 
 class Portfolio(Base):
     __tablename__ = "portfolios"
+    __table_args__ = (
+        UniqueConstraint("user_id", "symbol", name="uq_portfolios_user_symbol"),
+    )
 
     portfolio_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=False)
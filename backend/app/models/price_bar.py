@@ -0,0 +1,33 @@
+from sqlalchemy import Column, String, Float, BigInteger, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class PriceBar(Base):
+    """Stored OHLCV bar; past bars never change, so history is fetched from upstream once"""
+    __tablename__ = "price_bars"
+
+    symbol = Column(String(20), primary_key=True)
+    interval = Column(String(10), primary_key=True)
+    ts = Column(DateTime(timezone=True), primary_key=True)
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    volume = Column(BigInteger)
+
+    def __repr__(self):
+        return f"<PriceBar(symbol={self.symbol}, interval={self.interval}, ts={self.ts}, close={self.close})>"
+
+class PriceBarSeries(Base):
+    """Coverage of the stored bars for one (symbol, interval)"""
+    __tablename__ = "price_bar_series"
+
+    symbol = Column(String(20), primary_key=True)
+    interval = Column(String(10), primary_key=True)
+    timezone = Column(String(64), nullable=False, default="UTC")  # exchange tz of the upstream index
+    covered_from = Column(DateTime(timezone=True), nullable=False)  # bars are complete from here on
+    last_bar_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), default=func.now())
+
+    def __repr__(self):
+        return f"<PriceBarSeries(symbol={self.symbol}, interval={self.interval}, last_bar_at={self.last_bar_at})>"
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, String, Numeric, BigInteger, Integer, DateTime
+from app.core.database import Base
+
+class PriceObservation(Base):
+    """Append-only quote observation; range-partitioned by UTC day on observed_at (see migration 005)"""
+    __tablename__ = "price_observations"
+    __table_args__ = {"postgresql_partition_by": "RANGE (observed_at)"}
+
+    symbol = Column(String(20), primary_key=True)
+    observed_at = Column(DateTime(timezone=True), primary_key=True)  # upstream fetch time of the quote
+    price = Column(Numeric(15, 4), nullable=False)
+    volume = Column(BigInteger)
+    data_source = Column(String(50))
+
+    def __repr__(self):
+        return f"<PriceObservation(symbol={self.symbol}, observed_at={self.observed_at}, price={self.price})>"
+
+class PriceRollup(Base):
+    """OHLCV aggregate of observations per UTC-aligned 1m / 1h / 1d bucket"""
+    __tablename__ = "price_rollups"
+
+    symbol = Column(String(20), primary_key=True)
+    interval = Column(String(10), primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    open = Column(Numeric(15, 4), nullable=False)
+    high = Column(Numeric(15, 4), nullable=False)
+    low = Column(Numeric(15, 4), nullable=False)
+    close = Column(Numeric(15, 4), nullable=False)
+    volume = Column(BigInteger)  # last reported session volume in the bucket
+    samples = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<PriceRollup(symbol={self.symbol}, interval={self.interval}, bucket={self.bucket}, close={self.close})>"
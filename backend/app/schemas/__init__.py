@@ -1,6 +1,8 @@
 from .auth import *
 from .user import *
 from .portfolio import *
+from .market import *
+from .conversation import *
 
 __all__ = [
     "Token",
@@ -11,5 +13,13 @@ __all__ = [
     "UserUpdate",
     "PortfolioCreate",
     "PortfolioResponse",
-    "PortfolioUpdate"
+    "PortfolioUpdate",
+    "PortfolioBatchRequest",
+    "PortfolioBatchResponse",
+    "PortfolioWithMarketData",
+    "PortfolioValuation",
+    "BatchQuoteRequest",
+    "ConversationCreate",
+    "ConversationResponse",
+    "ConversationPage"
 ]
\ No newline at end of file
@@ -0,0 +1,25 @@
+from pydantic import BaseModel, Field, UUID4
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from app.models.conversation import MessageType
+
+class ConversationCreate(BaseModel):
+    message_type: MessageType
+    content: str = Field(min_length=1)
+    message_metadata: Optional[Dict[str, Any]] = None
+
+class ConversationResponse(BaseModel):
+    conversation_id: UUID4
+    user_id: UUID4
+    message_type: MessageType
+    content: str
+    message_metadata: Optional[Dict[str, Any]] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ConversationPage(BaseModel):
+    """One page of messages; pass next_cursor back as ?cursor= for the following page"""
+    items: List[ConversationResponse]
+    next_cursor: Optional[str] = None
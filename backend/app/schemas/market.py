@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class BatchQuoteRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "symbols": ["AAPL", "MSFT", "7203.T"]
+            }
+        }
@@ -1,8 +1,15 @@
-from pydantic import BaseModel, UUID4
-from typing import Optional
+from pydantic import BaseModel, Field, UUID4, field_validator
+from typing import Dict, List, Optional
 from datetime import date, datetime
 from decimal import Decimal
 
+def normalize_symbol(symbol: str) -> str:
+    """Symbols are stored and matched as stripped upper case ("aapl " -> "AAPL")"""
+    symbol = symbol.strip().upper()
+    if not symbol:
+        raise ValueError("Symbol must not be empty")
+    return symbol
+
 class PortfolioBase(BaseModel):
     symbol: str
     quantity: Decimal
@@ -10,7 +17,10 @@ class PortfolioBase(BaseModel):
     purchase_date: Optional[date] = None
 
 class PortfolioCreate(PortfolioBase):
-    pass
+    @field_validator("symbol")
+    @classmethod
+    def _normalize_symbol(cls, symbol: str) -> str:
+        return normalize_symbol(symbol)
 
 class PortfolioUpdate(BaseModel):
     quantity: Optional[Decimal] = None
@@ -26,9 +36,51 @@ class PortfolioResponse(PortfolioBase):
     class Config:
         from_attributes = True
 
+class PortfolioBatchRequest(BaseModel):
+    """Positions to create or overwrite (by symbol) and symbols to remove, applied atomically"""
+    upsert: List[PortfolioCreate] = Field(default_factory=list, max_length=500)
+    delete: List[str] = Field(default_factory=list, max_length=500)
+
+    @field_validator("delete")
+    @classmethod
+    def _normalize_symbols(cls, symbols: List[str]) -> List[str]:
+        return [normalize_symbol(symbol) for symbol in symbols]
+
+class PortfolioBatchResponse(BaseModel):
+    created: List[PortfolioResponse]
+    updated: List[PortfolioResponse]
+    deleted: List[str]
+    not_found: List[str]
+
 class PortfolioWithMarketData(PortfolioResponse):
     """Portfolio with current market data"""
+    currency: Optional[str] = None
     current_price: Optional[Decimal] = None
     current_value: Optional[Decimal] = None
     unrealized_pnl: Optional[Decimal] = None
-    unrealized_pnl_percent: Optional[Decimal] = None
\ No newline at end of file
+    unrealized_pnl_percent: Optional[Decimal] = None
+
+class CurrencyTotals(BaseModel):
+    """Totals of the positions quoted in one currency"""
+    cost: Decimal
+    value: Decimal
+    unrealized_pnl: Decimal
+    unrealized_pnl_percent: Optional[Decimal] = None
+    priced_positions: int
+
+class PortfolioValuation(BaseModel):
+    """All positions valued at current prices, with portfolio totals
+
+    The overall totals are None when positions are quoted in more than one
+    currency; use ``totals_by_currency`` then.
+    """
+    positions: List[PortfolioWithMarketData]
+    currency: Optional[str] = None
+    total_cost: Optional[Decimal] = None
+    total_value: Optional[Decimal] = None
+    total_unrealized_pnl: Optional[Decimal] = None
+    total_unrealized_pnl_percent: Optional[Decimal] = None
+    totals_by_currency: Dict[str, CurrencyTotals] = {}
+    priced_positions: int
+    errors: Dict[str, str] = {}
+    as_of: datetime
@@ -0,0 +1,40 @@
+from typing import Optional
+
+from app.core.config import settings
+from app.services.analytics.performance import (
+    Closes,
+    PerformanceSeries,
+    Transactions,
+    reconstruct,
+    summarize,
+    xirr,
+)
+from app.services.analytics.service import PerformanceAnalyzer
+from app.services.market_data import get_market_data_service
+
+_analyzer: Optional[PerformanceAnalyzer] = None
+
+
+def get_performance_analyzer() -> PerformanceAnalyzer:
+    """Process-wide analyzer holding the per-user series cache; also usable as a FastAPI dependency"""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = PerformanceAnalyzer(
+            get_market_data_service(),
+            max_users=settings.ANALYTICS_CACHE_MAX_USERS,
+            ttl=settings.ANALYTICS_CACHE_TTL,
+            refresh_seconds=settings.ANALYTICS_REFRESH_SECONDS,
+        )
+    return _analyzer
+
+
+__all__ = [
+    "Closes",
+    "PerformanceAnalyzer",
+    "PerformanceSeries",
+    "Transactions",
+    "get_performance_analyzer",
+    "reconstruct",
+    "summarize",
+    "xirr",
+]
@@ -0,0 +1,238 @@
+from typing import Dict, Optional
+import numpy as np
+
+DAY = np.timedelta64(1, "D")
+# Shorter histories report cumulative TWR only; annualizing them extrapolates noise
+MIN_ANNUALIZED_DAYS = 365
+
+
+class Transactions:
+    """Column arrays of a user's trades, sorted by trade date
+
+    ``quantity`` is signed (buys positive, sells negative), so a trade's
+    cash flow into the portfolio is ``quantity * price``.
+    """
+
+    def __init__(self, dates: np.ndarray, symbols: np.ndarray, quantity: np.ndarray, price: np.ndarray):
+        order = np.argsort(dates, kind="stable")
+        self.dates = dates.astype("datetime64[D]")[order]
+        self.symbols = symbols.astype(str)[order]
+        self.quantity = quantity.astype(float)[order]
+        self.price = price.astype(float)[order]
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @classmethod
+    def empty(cls) -> "Transactions":
+        return cls(np.array([], dtype="datetime64[D]"), np.array([], dtype=str), np.array([]), np.array([]))
+
+    def append(self, other: "Transactions") -> "Transactions":
+        return Transactions(
+            np.concatenate([self.dates, other.dates]),
+            np.concatenate([self.symbols, other.symbols]),
+            np.concatenate([self.quantity, other.quantity]),
+            np.concatenate([self.price, other.price]),
+        )
+
+
+class Closes:
+    """Daily closes as (date, symbol, close) columns plus each symbol's last close before them"""
+
+    def __init__(self, dates: np.ndarray, symbols: np.ndarray, close: np.ndarray, opening: Dict[str, float]):
+        self.dates = dates.astype("datetime64[D]")
+        self.symbols = symbols.astype(str)
+        self.close = close.astype(float)
+        self.opening = opening
+
+
+class PerformanceSeries:
+    """Daily portfolio value, net cash flow, time-weighted wealth index and drawdown"""
+
+    def __init__(
+        self,
+        dates: np.ndarray,
+        value: np.ndarray,
+        flows: np.ndarray,
+        wealth: np.ndarray,
+        drawdown: np.ndarray,
+    ):
+        self.dates = dates
+        self.value = value
+        self.flows = flows
+        self.wealth = wealth
+        self.drawdown = drawdown
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @classmethod
+    def empty(cls) -> "PerformanceSeries":
+        nothing = np.array([], dtype=float)
+        return cls(np.array([], dtype="datetime64[D]"), nothing, nothing, nothing, nothing)
+
+    def before(self, start: np.datetime64) -> "PerformanceSeries":
+        keep = self.dates < start
+        return PerformanceSeries(
+            self.dates[keep], self.value[keep], self.flows[keep], self.wealth[keep], self.drawdown[keep]
+        )
+
+    def extend(self, other: "PerformanceSeries") -> "PerformanceSeries":
+        return PerformanceSeries(
+            np.concatenate([self.dates, other.dates]),
+            np.concatenate([self.value, other.value]),
+            np.concatenate([self.flows, other.flows]),
+            np.concatenate([self.wealth, other.wealth]),
+            np.concatenate([self.drawdown, other.drawdown]),
+        )
+
+
+def _forward_fill(prices: np.ndarray) -> np.ndarray:
+    """Fill NaNs down each column with the last valid value above them"""
+    rows = np.where(np.isnan(prices), 0, np.arange(prices.shape[0])[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return prices[rows, np.arange(prices.shape[1])]
+
+
+def _symbol_columns(symbols: np.ndarray, lookup: np.ndarray):
+    """Column of each looked-up symbol in the sorted ``symbols`` and whether it is present"""
+    columns = np.minimum(np.searchsorted(symbols, lookup), len(symbols) - 1)
+    return symbols[columns] == lookup, columns
+
+
+def reconstruct(
+    transactions: Transactions,
+    closes: Closes,
+    start: np.datetime64,
+    prefix: Optional[PerformanceSeries] = None,
+) -> PerformanceSeries:
+    """Rebuild the daily series from ``start`` onwards and append it to ``prefix``
+
+    ``prefix`` is the already computed series before ``start`` (None for a
+    full rebuild); ``closes`` only needs bars from ``start`` on. Positions are
+    valued at the day's close, else the day's trade price, else the last
+    known price. Daily returns treat buys as made at the start of the day
+    and sells at the end, so opening and closing a position are both exact.
+    """
+    prefix = (prefix or PerformanceSeries.empty()).before(start)
+    symbols, symbol_index = np.unique(transactions.symbols, return_inverse=True)
+    is_new = transactions.dates >= start
+
+    grid = np.unique(np.concatenate([transactions.dates[is_new], closes.dates[closes.dates >= start]]))
+    if len(grid) == 0 or len(symbols) == 0:
+        return prefix
+
+    # Opening state: positions and prices carried in from before start
+    opening_position = np.zeros(len(symbols))
+    np.add.at(opening_position, symbol_index[~is_new], transactions.quantity[~is_new])
+    opening_price = np.full(len(symbols), np.nan)
+    opening_price[symbol_index[~is_new]] = transactions.price[~is_new]  # last trade wins
+    if closes.opening:
+        known, known_col = _symbol_columns(symbols, np.array(list(closes.opening), dtype=str))
+        opening_price[known_col[known]] = np.array(list(closes.opening.values()), dtype=float)[known]
+
+    trade_row = np.searchsorted(grid, transactions.dates[is_new])
+    trade_col = symbol_index[is_new]
+    quantity = transactions.quantity[is_new]
+
+    delta = np.zeros((len(grid), len(symbols)))
+    np.add.at(delta, (trade_row, trade_col), quantity)
+    positions = opening_position + np.cumsum(delta, axis=0)
+
+    prices = np.full((len(grid) + 1, len(symbols)), np.nan)
+    prices[0] = opening_price
+    prices[trade_row + 1, trade_col] = transactions.price[is_new]
+    known, close_col = _symbol_columns(symbols, closes.symbols)
+    in_range = known & (closes.dates >= start)
+    prices[np.searchsorted(grid, closes.dates[in_range]) + 1, close_col[in_range]] = closes.close[in_range]
+    prices = _forward_fill(prices)[1:]
+
+    value = np.where(positions != 0, positions * np.nan_to_num(prices), 0.0).sum(axis=1)
+    flows = np.zeros(len(grid))
+    np.add.at(flows, trade_row, quantity * transactions.price[is_new])
+
+    previous_value = np.concatenate([prefix.value[-1:] if len(prefix) else [0.0], value[:-1]])
+    invested = previous_value + np.maximum(flows, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.where(invested > 0, (value - flows - previous_value) / invested, 0.0)
+
+    base_wealth = prefix.wealth[-1] if len(prefix) else 1.0
+    wealth = base_wealth * np.cumprod(1.0 + returns)
+    peak = np.maximum.accumulate(np.maximum(wealth, prefix.wealth.max() if len(prefix) else 1.0))
+    drawdown = wealth / peak - 1.0
+
+    return prefix.extend(PerformanceSeries(grid, value, flows, wealth, drawdown))
+
+
+def xirr(dates: np.ndarray, amounts: np.ndarray, guess: float = 0.1) -> Optional[float]:
+    """Annualized money-weighted return of dated cash flows (investor's view)
+
+    Newton's method with a bisection fallback; None when the flows do not
+    change sign (no return is defined).
+    """
+    keep = amounts != 0
+    dates, amounts = dates[keep], amounts[keep]
+    if len(amounts) < 2 or not ((amounts > 0).any() and (amounts < 0).any()):
+        return None
+    years = (dates - dates.min()) / DAY / 365.0
+
+    def npv(rate: float) -> float:
+        return float(np.sum(amounts * np.power(1.0 + rate, -years)))
+
+    rate = guess
+    for _ in range(50):
+        discount = np.power(1.0 + rate, -years)
+        value = float(np.sum(amounts * discount))
+        derivative = float(np.sum(-years * amounts * discount / (1.0 + rate)))
+        if derivative == 0:
+            break
+        step = value / derivative
+        rate -= step
+        if rate <= -1.0 or not np.isfinite(rate):
+            break
+        if abs(step) < 1e-10:
+            return rate
+
+    low, high = -0.9999, 100.0
+    if npv(low) * npv(high) > 0:
+        return None
+    for _ in range(200):
+        mid = (low + high) / 2
+        if npv(low) * npv(mid) <= 0:
+            high = mid
+        else:
+            low = mid
+        if high - low < 1e-10:
+            break
+    return (low + high) / 2
+
+
+def summarize(series: PerformanceSeries) -> Dict[str, Optional[float]]:
+    """TWR, XIRR and drawdown figures for a reconstructed series"""
+    if len(series) == 0:
+        return {
+            "current_value": 0.0,
+            "net_invested": 0.0,
+            "twr": None,
+            "twr_annualized": None,
+            "xirr": None,
+            "max_drawdown": None,
+            "current_drawdown": None,
+        }
+
+    twr = float(series.wealth[-1] - 1.0)
+    days = float((series.dates[-1] - series.dates[0]) / DAY)
+    annualized = (1.0 + twr) ** (365.0 / days) - 1.0 if days >= MIN_ANNUALIZED_DAYS and twr > -1 else None
+    # Investor's view: contributions are outflows, the current value is the final inflow
+    amounts = np.concatenate([-series.flows, [series.value[-1]]])
+    dates = np.concatenate([series.dates, series.dates[-1:]])
+
+    return {
+        "current_value": float(series.value[-1]),
+        "net_invested": float(series.flows.sum()),
+        "twr": twr,
+        "twr_annualized": annualized,
+        "xirr": xirr(dates, amounts),
+        "max_drawdown": float(series.drawdown.min()),
+        "current_drawdown": float(series.drawdown[-1]),
+    }
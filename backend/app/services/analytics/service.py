@@ -0,0 +1,238 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import asyncio
+import uuid
+import structlog
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.cache import MISSING, TTLCache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, release_connection
+from app.models.investment_history import InvestmentHistory, TransactionType
+from app.models.price_bar import PriceBar, PriceBarSeries
+from app.services.analytics.performance import Closes, PerformanceSeries, Transactions, reconstruct, summarize
+from app.services.market_data import MarketDataService, UpstreamSingleFlight
+from app.services.market_data.base import PERIODS
+
+logger = structlog.get_logger()
+
+# Bars are stored at exchange-local midnight; a week of slack covers any UTC offset and holidays
+CLOSE_LOOKBACK = timedelta(days=7)
+
+
+class PerformanceState:
+    """A user's cached transactions and reconstructed series, plus the watermark they reflect"""
+
+    def __init__(
+        self,
+        transactions: Transactions,
+        series: PerformanceSeries,
+        count: int,
+        watermark: Optional[datetime],
+    ):
+        self.transactions = transactions
+        self.series = series
+        self.count = count
+        self.watermark = watermark
+        self.computed_at = datetime.now(timezone.utc)
+
+
+def _covering_period(start: date) -> str:
+    days = (date.today() - start).days + 1
+    for period, span in PERIODS.items():
+        if span.days >= days and span.days >= 30:
+            return period
+    return "max"
+
+
+def _transactions(rows: List[Any]) -> Transactions:
+    if not rows:
+        return Transactions.empty()
+    frame = pd.DataFrame.from_records(rows, columns=["symbol", "transaction_type", "quantity", "price", "transaction_date"])
+    sign = np.where(frame["transaction_type"].to_numpy() == TransactionType.SELL, -1.0, 1.0)
+    dates = pd.to_datetime(frame["transaction_date"], utc=True).dt.tz_localize(None).to_numpy()
+    return Transactions(
+        dates,
+        frame["symbol"].str.upper().to_numpy(dtype=str),
+        sign * frame["quantity"].to_numpy(dtype=float),
+        frame["price"].to_numpy(dtype=float),
+    )
+
+
+class PerformanceAnalyzer:
+    """Per-user TWR / XIRR / drawdown over investment_history and stored daily closes
+
+    Reconstructed series are cached per user. A new transaction only
+    triggers recomputation from its trade date forward (older days are
+    reused from the cache), and a refresh with no new transactions only
+    recomputes from the last cached day. Edits or deletions of existing
+    transactions, detected by a row count mismatch, cause a full rebuild.
+
+    Concurrent requests for one user share a single update, which runs on
+    its own session rather than on any one request's.
+    """
+
+    def __init__(
+        self,
+        market: MarketDataService,
+        max_users: int,
+        ttl: float,
+        refresh_seconds: float,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+    ):
+        self.market = market
+        self.session_factory = session_factory
+        self.refresh_seconds = refresh_seconds
+        self._states = TTLCache(max_entries=max_users, default_ttl=ttl)
+        # Rebuilds fetch missing closes upstream; the shared task must not inherit one request's deadline
+        self._flights = UpstreamSingleFlight()
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        self._states.delete(str(user_id))
+
+    async def get_performance(self, user_id: uuid.UUID) -> PerformanceSeries:
+        return await self._flights.do(str(user_id), lambda: self._update(user_id))
+
+    async def get_summary(self, user_id: uuid.UUID) -> Dict[str, Any]:
+        series = await self.get_performance(user_id)
+        return summarize(series)
+
+    async def _update(self, user_id: uuid.UUID) -> PerformanceSeries:
+        async with self.session_factory() as db:
+            return await self._update_with_session(db, user_id)
+
+    async def _update_with_session(self, db: AsyncSession, user_id: uuid.UUID) -> PerformanceSeries:
+        key = str(user_id)
+        state = self._states.get(key)
+        state = None if state is MISSING else state
+
+        result = await db.execute(
+            select(func.count(), func.max(InvestmentHistory.created_at)).where(InvestmentHistory.user_id == user_id)
+        )
+        count, watermark = result.one()
+
+        if state is not None and count == state.count and watermark == state.watermark:
+            age = (datetime.now(timezone.utc) - state.computed_at).total_seconds()
+            if age < self.refresh_seconds or len(state.series) == 0:
+                return state.series
+            # Only new closes since the last run: recompute the last cached day onwards
+            start = state.series.dates[-1]
+            transactions = state.transactions
+        elif state is not None and watermark is not None and count > state.count:
+            new = _transactions(await self._select_transactions(db, user_id, since=state.watermark))
+            if len(new) != count - state.count:
+                state = None
+            else:
+                transactions = state.transactions.append(new)
+                start = new.dates.min()
+                if len(state.series):
+                    start = min(start, state.series.dates[-1])
+        else:
+            state = None
+
+        if state is None:
+            transactions = _transactions(await self._select_transactions(db, user_id))
+            if len(transactions) == 0:
+                series = PerformanceSeries.empty()
+                self._states.set(key, PerformanceState(transactions, series, count, watermark))
+                return series
+            start = transactions.dates.min()
+
+        closes = await self._load_closes(db, sorted(set(transactions.symbols.tolist())), start)
+        series = reconstruct(transactions, closes, start, prefix=state.series if state else None)
+        self._states.set(key, PerformanceState(transactions, series, count, watermark))
+        return series
+
+    async def _select_transactions(
+        self,
+        db: AsyncSession,
+        user_id: uuid.UUID,
+        since: Optional[datetime] = None,
+    ) -> List[Any]:
+        stmt = select(
+            InvestmentHistory.symbol,
+            InvestmentHistory.transaction_type,
+            InvestmentHistory.quantity,
+            InvestmentHistory.price,
+            InvestmentHistory.transaction_date,
+        ).where(InvestmentHistory.user_id == user_id)
+        if since is not None:
+            stmt = stmt.where(InvestmentHistory.created_at > since)
+        result = await db.execute(stmt.order_by(InvestmentHistory.transaction_date, InvestmentHistory.created_at))
+        return result.all()
+
+    async def _ensure_closes(self, db: AsyncSession, symbols: List[str], start: date) -> None:
+        """Backfill or refresh stored daily closes through the market data service's bar store"""
+        if self.market.bar_store is None or "1d" not in settings.BAR_STORE_INTERVALS:
+            return
+
+        result = await db.execute(
+            select(PriceBarSeries).where(PriceBarSeries.interval == "1d", PriceBarSeries.symbol.in_(symbols))
+        )
+        series = {row.symbol: row for row in result.scalars().all()}
+        stale_before = datetime.now(timezone.utc) - timedelta(days=1)
+        needed = [
+            symbol for symbol in symbols
+            if symbol not in series
+            or series[symbol].covered_from.date() > start
+            or series[symbol].last_bar_at is None
+            or series[symbol].last_bar_at < stale_before
+        ]
+        if not needed:
+            return
+
+        period = _covering_period(start)
+        # Upstream downloads can take seconds; give the connection back meanwhile
+        await release_connection(db)
+        results = await asyncio.gather(
+            *(self.market.get_history(symbol, period=period, interval="1d") for symbol in needed),
+            return_exceptions=True,
+        )
+        for symbol, outcome in zip(needed, results):
+            if isinstance(outcome, Exception):
+                logger.warning("Daily closes unavailable, valuing at trade prices", symbol=symbol, error=str(outcome))
+
+    async def _load_closes(self, db: AsyncSession, symbols: List[str], start: np.datetime64) -> Closes:
+        start_date = pd.Timestamp(start).date()
+        await self._ensure_closes(db, symbols, start_date)
+
+        since = datetime.combine(start_date, time.min, tzinfo=timezone.utc) - CLOSE_LOOKBACK
+        result = await db.execute(
+            select(PriceBar.symbol, PriceBar.ts, PriceBar.close, PriceBarSeries.timezone)
+            .join(PriceBarSeries, (PriceBarSeries.symbol == PriceBar.symbol) & (PriceBarSeries.interval == PriceBar.interval))
+            .where(PriceBar.interval == "1d", PriceBar.symbol.in_(symbols), PriceBar.ts >= since)
+            .order_by(PriceBar.ts)
+        )
+        frame = pd.DataFrame.from_records(result.all(), columns=["symbol", "ts", "close", "timezone"])
+
+        # Last close before the lookback window, for symbols that have no bar inside it
+        result = await db.execute(
+            select(PriceBar.symbol, PriceBar.close)
+            .where(PriceBar.interval == "1d", PriceBar.symbol.in_(symbols), PriceBar.ts < since)
+            .distinct(PriceBar.symbol)
+            .order_by(PriceBar.symbol, PriceBar.ts.desc())
+        )
+        opening = {symbol: close for symbol, close in result.all() if close is not None}
+
+        if frame.empty:
+            return Closes(np.array([], dtype="datetime64[D]"), np.array([], dtype=str), np.array([]), opening)
+
+        # Each bar's trading date in its exchange's timezone
+        ts = pd.to_datetime(frame["ts"], utc=True)
+        dates = np.empty(len(frame), dtype="datetime64[D]")
+        for tz, rows in frame.groupby("timezone").indices.items():
+            dates[rows] = ts.iloc[rows].dt.tz_convert(tz).dt.tz_localize(None).to_numpy().astype("datetime64[D]")
+
+        frame = frame.assign(date=dates).dropna(subset=["close"])
+        before = frame[frame["date"] < start]
+        opening.update(before.groupby("symbol")["close"].last().to_dict())
+        current = frame[frame["date"] >= start]
+        return Closes(
+            current["date"].to_numpy(),
+            current["symbol"].to_numpy(dtype=str),
+            current["close"].to_numpy(dtype=float),
+            opening,
+        )
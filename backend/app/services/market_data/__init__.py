@@ -0,0 +1,302 @@
+from datetime import timedelta
+from typing import Optional
+
+from app.core.cache import RedisCache, TieredCache, TTLCache
+from app.core.config import settings
+from app.core.metrics import register_stats_collector
+from app.services.market_data.base import (
+    MarketDataError,
+    MarketDataProvider,
+    MarketDataThrottled,
+    MarketDataTimeout,
+    MarketDataUnavailable,
+    ThreadPoolMarketDataProvider,
+)
+from app.services.market_data.bar_store import BarStore
+from app.services.market_data.fake import FakeMarketDataProvider
+from app.services.market_data.instrumented import InstrumentedProvider
+from app.services.market_data.observations import PriceObservationStore
+from app.services.market_data.scheduler import ScheduledProvider, UpstreamScheduler
+from app.services.market_data.upstream_context import Priority, upstream_priority
+from app.services.market_data.upstream_flight import UpstreamSingleFlight
+from app.services.market_data.indices import IndexSnapshot, IndexSnapshotRefresher
+from app.services.market_data.service import MarketDataService
+from app.services.market_data.snapshot_writer import MarketSnapshotWriter
+from app.services.market_data.streaming import QuoteHub, QuoteSubscriber
+
+_provider: Optional[MarketDataProvider] = None
+_service: Optional[MarketDataService] = None
+_index_refresher: Optional[IndexSnapshotRefresher] = None
+_quote_hub: Optional[QuoteHub] = None
+_snapshot_writer: Optional[MarketSnapshotWriter] = None
+_observation_store: Optional[PriceObservationStore] = None
+
+
+def create_market_data_provider(name: str = None) -> MarketDataProvider:
+    """Build the provider selected by MARKET_DATA_PROVIDER"""
+    name = name or settings.MARKET_DATA_PROVIDER
+    if name == "fake":
+        return FakeMarketDataProvider(
+            latency=settings.MARKET_DATA_FAKE_LATENCY,
+            rate_limit=settings.MARKET_DATA_FAKE_RATE_LIMIT,
+        )
+    if name == "yahoo":
+        from app.services.market_data.yahoo import YahooFinanceProvider
+        return YahooFinanceProvider(
+            max_workers=settings.MARKET_DATA_MAX_WORKERS,
+            max_concurrency=settings.MARKET_DATA_MAX_CONCURRENCY,
+            timeout=settings.MARKET_DATA_TIMEOUT_SECONDS,
+        )
+    raise ValueError(f"Unknown market data provider: {name}")
+
+
+def create_upstream_scheduler() -> UpstreamScheduler:
+    return UpstreamScheduler(
+        rate=settings.MARKET_DATA_RATE_LIMIT,
+        burst=settings.MARKET_DATA_RATE_BURST,
+        queue_limits={priority: settings.MARKET_DATA_QUEUE_LIMITS[priority.name.lower()] for priority in Priority},
+        queue_timeouts={priority: settings.MARKET_DATA_QUEUE_TIMEOUTS[priority.name.lower()] for priority in Priority},
+        backoff_base=settings.MARKET_DATA_THROTTLE_BACKOFF_SECONDS,
+        backoff_max=settings.MARKET_DATA_THROTTLE_BACKOFF_MAX_SECONDS,
+    )
+
+
+def get_market_data_provider() -> MarketDataProvider:
+    """Process-wide provider, instrumented for /metrics and behind the upstream scheduler
+
+    Also usable as a FastAPI dependency.
+    """
+    global _provider
+    if _provider is None:
+        _provider = InstrumentedProvider(create_market_data_provider())
+        if settings.MARKET_DATA_RATE_LIMIT > 0:
+            _provider = ScheduledProvider(
+                _provider, create_upstream_scheduler(), retries=settings.MARKET_DATA_THROTTLE_RETRIES
+            )
+    return _provider
+
+
+def create_market_data_cache() -> TieredCache:
+    """In-process LRU backed by the shared Redis tier, with miss coalescing"""
+    local = TTLCache(max_entries=settings.CACHE_MAX_ENTRIES, default_ttl=settings.MARKET_DATA_CACHE_TTL)
+    remote = RedisCache(settings.REDIS_URL) if settings.CACHE_REDIS_ENABLED else None
+    return TieredCache(local, remote, flights=UpstreamSingleFlight())
+
+
+def get_market_data_service() -> MarketDataService:
+    """Process-wide cached market data service; also usable as a FastAPI dependency"""
+    global _service
+    if _service is None:
+        provider = get_market_data_provider()
+        bar_store = BarStore(provider) if settings.BAR_STORE_ENABLED else None
+        _service = MarketDataService(provider, create_market_data_cache(), bar_store=bar_store)
+    return _service
+
+
+def get_index_refresher() -> IndexSnapshotRefresher:
+    """Process-wide index snapshot refresher; started from the app lifespan"""
+    global _index_refresher
+    if _index_refresher is None:
+        _index_refresher = IndexSnapshotRefresher(
+            get_market_data_service(),
+            indices=settings.MARKET_INDICES,
+            interval=settings.MARKET_INDEX_REFRESH_SECONDS,
+        )
+    return _index_refresher
+
+
+def get_quote_hub() -> QuoteHub:
+    """Process-wide live quote fan-out hub"""
+    global _quote_hub
+    if _quote_hub is None:
+        _quote_hub = QuoteHub(
+            get_market_data_service(),
+            interval=settings.MARKET_STREAM_POLL_SECONDS,
+            max_queue=settings.MARKET_STREAM_MAX_QUEUE,
+            max_dropped=settings.MARKET_STREAM_MAX_DROPPED,
+        )
+    return _quote_hub
+
+
+def get_snapshot_writer() -> MarketSnapshotWriter:
+    """Process-wide write-behind buffer for market_data; started from the app lifespan"""
+    global _snapshot_writer
+    if _snapshot_writer is None:
+        _snapshot_writer = MarketSnapshotWriter(
+            interval=settings.MARKET_SNAPSHOT_FLUSH_SECONDS,
+            max_pending=settings.MARKET_SNAPSHOT_MAX_PENDING,
+            observations=settings.PRICE_OBSERVATIONS_ENABLED,
+            max_buffered=settings.MARKET_SNAPSHOT_MAX_BUFFERED,
+            max_observations=settings.PRICE_OBSERVATIONS_MAX_BUFFERED,
+        )
+    return _snapshot_writer
+
+
+def get_observation_store() -> PriceObservationStore:
+    """Process-wide price observation partitions/rollups maintainer; started from the app lifespan"""
+    global _observation_store
+    if _observation_store is None:
+        _observation_store = PriceObservationStore(
+            interval=settings.PRICE_ROLLUP_INTERVAL_SECONDS,
+            lookback=timedelta(seconds=settings.PRICE_ROLLUP_LOOKBACK_SECONDS),
+            retention_days=settings.PRICE_OBSERVATION_RETENTION_DAYS,
+            rollup_retention_days=settings.PRICE_ROLLUP_RETENTION_DAYS,
+            partitions_ahead=settings.PRICE_OBSERVATION_PARTITIONS_AHEAD,
+        )
+    return _observation_store
+
+
+def set_market_data_provider(provider: Optional[MarketDataProvider]) -> None:
+    """Swap the process-wide provider (e.g. the fake one under test)"""
+    global _provider, _service, _index_refresher, _quote_hub
+    _provider = provider
+    _service = None
+    _index_refresher = None
+    _quote_hub = None
+
+
+async def close_market_data_provider() -> None:
+    global _provider, _service, _index_refresher, _quote_hub, _snapshot_writer, _observation_store
+    if _quote_hub is not None:
+        await _quote_hub.close()
+        _quote_hub = None
+    if _index_refresher is not None:
+        await _index_refresher.stop()
+        _index_refresher = None
+    if _snapshot_writer is not None:
+        # Flushes whatever is still buffered
+        await _snapshot_writer.stop()
+        _snapshot_writer = None
+    if _observation_store is not None:
+        await _observation_store.stop()
+        _observation_store = None
+    if _service is not None:
+        await _service.cache.close()
+        _service = None
+    if _provider is not None:
+        await _provider.close()
+        _provider = None
+
+
+def _cache_stats() -> Optional[dict]:
+    if _service is None:
+        return None
+    cache = _service.cache
+    flights = cache.flights.stats() if cache.flights else {}
+    return {
+        "entries": len(cache.local),
+        "max_entries": cache.local.max_entries,
+        **cache.stats.as_dict(),
+        **{f"single_flight_{key}": value for key, value in flights.items()},
+    }
+
+
+def _snapshot_writer_stats() -> Optional[dict]:
+    if _snapshot_writer is None:
+        return None
+    return {"pending": len(_snapshot_writer), **_snapshot_writer.stats.as_dict()}
+
+
+def _scheduler(provider: Optional[MarketDataProvider]) -> Optional[UpstreamScheduler]:
+    return provider.scheduler if isinstance(provider, ScheduledProvider) else None
+
+
+def _scheduler_stats() -> Optional[dict]:
+    scheduler = _scheduler(_provider)
+    if scheduler is None:
+        return None
+    return {
+        "rate_per_second": scheduler.rate,
+        "burst": scheduler.burst,
+        "paused_seconds": scheduler.paused_for,
+        "throttled": scheduler.stats.throttled,
+    }
+
+
+def _scheduler_class_stats() -> Optional[dict]:
+    scheduler = _scheduler(_provider)
+    return scheduler.stats.as_dict()["classes"] if scheduler is not None else None
+
+
+def _upstream_queue_stats() -> Optional[dict]:
+    # Read from the active provider's scheduler at scrape time, so only the live one is reported
+    scheduler = _scheduler(_provider)
+    if scheduler is None:
+        return None
+    return {priority: {"queue_depth": depth} for priority, depth in scheduler.queue_depths().items()}
+
+
+# Operational counters go to /metrics rather than to API users
+register_stats_collector(
+    "market_data_cache",
+    _cache_stats,
+    counters=(
+        "local_hits",
+        "remote_hits",
+        "misses",
+        "evictions",
+        "expirations",
+        "remote_errors",
+        "single_flight_executions",
+        "single_flight_coalesced",
+    ),
+)
+register_stats_collector(
+    "market_snapshot_writer",
+    _snapshot_writer_stats,
+    counters=(
+        "recorded",
+        "coalesced",
+        "flushes",
+        "failures",
+        "rows_written",
+        "rows_rejected",
+        "rows_dropped",
+        "observations_written",
+        "observations_rejected",
+        "observations_dropped",
+    ),
+)
+register_stats_collector("market_data_scheduler", _scheduler_stats, counters=("throttled",))
+register_stats_collector(
+    "market_data_scheduler_class",
+    _scheduler_class_stats,
+    label="priority",
+    counters=("granted", "queued", "retries"),
+)
+register_stats_collector("market_data_upstream", _upstream_queue_stats, label="priority")
+
+
+__all__ = [
+    "BarStore",
+    "MarketDataError",
+    "MarketDataProvider",
+    "MarketDataThrottled",
+    "MarketDataTimeout",
+    "MarketDataUnavailable",
+    "ThreadPoolMarketDataProvider",
+    "FakeMarketDataProvider",
+    "InstrumentedProvider",
+    "MarketDataService",
+    "MarketSnapshotWriter",
+    "PriceObservationStore",
+    "Priority",
+    "ScheduledProvider",
+    "UpstreamScheduler",
+    "UpstreamSingleFlight",
+    "IndexSnapshot",
+    "IndexSnapshotRefresher",
+    "QuoteHub",
+    "QuoteSubscriber",
+    "create_market_data_provider",
+    "create_upstream_scheduler",
+    "get_market_data_provider",
+    "get_market_data_service",
+    "get_index_refresher",
+    "get_quote_hub",
+    "get_snapshot_writer",
+    "get_observation_store",
+    "set_market_data_provider",
+    "close_market_data_provider",
+    "upstream_priority",
+]
@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import structlog
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.database import AsyncSessionLocal
+from app.models.price_bar import PriceBar, PriceBarSeries
+from app.services.market_data.base import INTRADAY_INTERVALS, MarketDataError, MarketDataProvider, period_start
+from app.services.market_data.upstream_context import Priority, upstream_priority
+
+logger = structlog.get_logger()
+
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class BarStore:
+    """Postgres-backed OHLCV store that only asks upstream for bars it does not have
+
+    A request whose period starts at or after the series' ``covered_from``
+    is served from stored bars plus one upstream call for the tail since
+    the last stored bar (the last bar is re-fetched because it may still be
+    forming). A request reaching further back re-downloads the full period
+    once and widens the coverage. Upstream adjustments to past bars (splits,
+    dividends) are picked up by a full backfill from scripts/bar_store.py.
+    """
+
+    def __init__(
+        self,
+        provider: MarketDataProvider,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        chunk_size: int = 2000,
+    ):
+        self.provider = provider
+        self.session_factory = session_factory
+        # 8 bind parameters per row keeps each INSERT well under asyncpg's 32767 limit
+        self.chunk_size = chunk_size
+
+    async def get_history(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        symbol = symbol.upper()
+        start = period_start(period)
+
+        async with self.session_factory() as session:
+            series = await session.get(PriceBarSeries, (symbol, interval))
+
+        # Reaching before the stored coverage: download the whole period once
+        if series is None or start < series.covered_from:
+            covered_from = min(start, series.covered_from) if series else start
+            frame = await self.provider.get_history(symbol, period=period, interval=interval)
+            async with self.session_factory() as session:
+                await self._save(session, symbol, interval, frame, covered_from)
+            return frame[OHLCV] if not frame.empty else frame
+
+        try:
+            tail = await self.provider.get_history(symbol, interval=interval, start=series.last_bar_at)
+        except MarketDataError as e:
+            logger.warning("Serving stored bars without tail refresh", symbol=symbol, interval=interval, error=str(e))
+            tail = None
+
+        async with self.session_factory() as session:
+            if tail is not None and not tail.empty:
+                await self._save(session, symbol, interval, tail, series.covered_from)
+            return await self._load(session, symbol, interval, start, series.timezone)
+
+    async def backfill(self, symbol: str, interval: str, period: str = "max") -> int:
+        """Re-download a full period and overwrite stored bars; returns the bar count"""
+        symbol = symbol.upper()
+        with upstream_priority(Priority.BACKGROUND):
+            frame = await self.provider.get_history(symbol, period=period, interval=interval)
+        async with self.session_factory() as session:
+            series = await session.get(PriceBarSeries, (symbol, interval))
+            start = period_start(period)
+            covered_from = min(start, series.covered_from) if series else start
+            await self._save(session, symbol, interval, frame, covered_from)
+        return len(frame)
+
+    async def compact(self, intraday_retention_days: Optional[int] = None) -> int:
+        """Drop expired intraday bars and resync series metadata; returns deleted bar count"""
+        deleted = 0
+        async with self.session_factory() as session:
+            if intraday_retention_days is not None:
+                cutoff = datetime.now(timezone.utc) - timedelta(days=intraday_retention_days)
+                result = await session.execute(
+                    delete(PriceBar).where(PriceBar.interval.in_(INTRADAY_INTERVALS), PriceBar.ts < cutoff)
+                )
+                deleted = result.rowcount
+                # Coverage no longer reaches back past the cutoff
+                await session.execute(
+                    update(PriceBarSeries)
+                    .where(PriceBarSeries.interval.in_(INTRADAY_INTERVALS))
+                    .values(covered_from=func.greatest(PriceBarSeries.covered_from, cutoff))
+                )
+
+            # Resync last_bar_at with the bars actually stored and drop empty series
+            await session.execute(text("""
+                UPDATE price_bar_series s
+                SET last_bar_at = b.last_ts, updated_at = now()
+                FROM (
+                    SELECT symbol, interval, max(ts) AS last_ts
+                    FROM price_bars GROUP BY symbol, interval
+                ) b
+                WHERE s.symbol = b.symbol AND s.interval = b.interval
+            """))
+            await session.execute(text("""
+                DELETE FROM price_bar_series s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM price_bars b WHERE b.symbol = s.symbol AND b.interval = s.interval
+                )
+            """))
+            await session.execute(text("ANALYZE price_bars"))
+            await session.commit()
+        return deleted
+
+    async def _save(
+        self,
+        session: AsyncSession,
+        symbol: str,
+        interval: str,
+        frame: pd.DataFrame,
+        covered_from: datetime,
+    ) -> None:
+        if frame.empty:
+            return
+
+        index = frame.index if frame.index.tz is not None else frame.index.tz_localize("UTC")
+        volume = np.nan_to_num(frame["Volume"].to_numpy(dtype=float, na_value=np.nan), nan=0).astype(np.int64)
+        rows = [
+            {
+                "symbol": symbol,
+                "interval": interval,
+                "ts": ts,
+                "open": open_,
+                "high": high,
+                "low": low,
+                "close": close,
+                "volume": vol,
+            }
+            for ts, open_, high, low, close, vol in zip(
+                index.to_pydatetime(),
+                frame["Open"].to_numpy(dtype=float).tolist(),
+                frame["High"].to_numpy(dtype=float).tolist(),
+                frame["Low"].to_numpy(dtype=float).tolist(),
+                frame["Close"].to_numpy(dtype=float).tolist(),
+                volume.tolist(),
+            )
+        ]
+
+        for offset in range(0, len(rows), self.chunk_size):
+            stmt = insert(PriceBar).values(rows[offset:offset + self.chunk_size])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[PriceBar.symbol, PriceBar.interval, PriceBar.ts],
+                set_={
+                    "open": stmt.excluded.open,
+                    "high": stmt.excluded.high,
+                    "low": stmt.excluded.low,
+                    "close": stmt.excluded.close,
+                    "volume": stmt.excluded.volume,
+                },
+            )
+            await session.execute(stmt)
+
+        last_bar_at = index[-1].to_pydatetime()
+        stmt = insert(PriceBarSeries).values(
+            symbol=symbol,
+            interval=interval,
+            timezone=str(index.tz),
+            covered_from=covered_from,
+            last_bar_at=last_bar_at,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PriceBarSeries.symbol, PriceBarSeries.interval],
+            set_={
+                "timezone": stmt.excluded.timezone,
+                "covered_from": func.least(PriceBarSeries.covered_from, stmt.excluded.covered_from),
+                "last_bar_at": func.greatest(PriceBarSeries.last_bar_at, stmt.excluded.last_bar_at),
+                "updated_at": func.now(),
+            },
+        )
+        await session.execute(stmt)
+        await session.commit()
+
+    async def _load(
+        self,
+        session: AsyncSession,
+        symbol: str,
+        interval: str,
+        start: datetime,
+        tz: str,
+    ) -> pd.DataFrame:
+        stmt = (
+            select(PriceBar.ts, PriceBar.open, PriceBar.high, PriceBar.low, PriceBar.close, PriceBar.volume)
+            .where(PriceBar.symbol == symbol, PriceBar.interval == interval, PriceBar.ts >= start)
+            .order_by(PriceBar.ts)
+        )
+        result = await session.execute(stmt)
+        frame = pd.DataFrame.from_records(result.all(), columns=["Date"] + OHLCV)
+        if frame.empty:
+            return pd.DataFrame(columns=OHLCV)
+        frame.index = pd.DatetimeIndex(pd.to_datetime(frame.pop("Date"), utc=True)).tz_convert(tz)
+        return frame
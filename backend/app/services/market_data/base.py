@@ -0,0 +1,150 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import structlog
+import pandas as pd
+
+logger = structlog.get_logger()
+
+PERIODS = {
+    "1d": timedelta(days=1),
+    "2d": timedelta(days=2),
+    "5d": timedelta(days=5),
+    "1mo": timedelta(days=30),
+    "3mo": timedelta(days=91),
+    "6mo": timedelta(days=182),
+    "1y": timedelta(days=365),
+    "2y": timedelta(days=730),
+    "5y": timedelta(days=1826),
+    "10y": timedelta(days=3652),
+}
+
+INTRADAY_INTERVALS = ["1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h"]
+
+# Earliest timestamp treated as the start of a "max" period
+MAX_PERIOD_START = datetime(1900, 1, 1, tzinfo=timezone.utc)
+
+
+def period_start(period: str, now: Optional[datetime] = None) -> datetime:
+    """Start of a yfinance-style period ("1y", "ytd", "max", ...) relative to now"""
+    now = now or datetime.now(timezone.utc)
+    if period == "max":
+        return MAX_PERIOD_START
+    if period == "ytd":
+        return now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    return now - PERIODS.get(period, PERIODS["1mo"])
+
+
+class MarketDataError(Exception):
+    """Raised when an upstream market data call fails"""
+
+
+class MarketDataTimeout(MarketDataError):
+    """Raised when an upstream market data call exceeds its deadline"""
+
+
+class MarketDataUnavailable(MarketDataError):
+    """Raised when an upstream call is refused locally (queue full, caller gone) or upstream"""
+
+
+class MarketDataThrottled(MarketDataUnavailable):
+    """Raised when the upstream rejects a call for exceeding its rate limit"""
+
+
+class MarketDataProvider(ABC):
+    """Async interface for fetching market data from an upstream source"""
+
+    name: str = "base"
+
+    @abstractmethod
+    async def get_info(self, symbol: str) -> Dict[str, Any]:
+        """Return the descriptive/fundamental info dict for a symbol"""
+
+    @abstractmethod
+    async def get_history(
+        self,
+        symbol: str,
+        period: str = "1mo",
+        interval: str = "1d",
+        start: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """Return OHLCV bars indexed by timestamp; ``start`` overrides ``period``"""
+
+    async def download(
+        self,
+        symbols: List[str],
+        period: str = "5d",
+        interval: str = "1d",
+    ) -> pd.DataFrame:
+        """Return bars for many symbols with (field, symbol) MultiIndex columns
+
+        Symbols the upstream has no data for are simply absent. The default
+        fans out to get_history; providers with a bulk API should override.
+        """
+        results = await asyncio.gather(
+            *(self.get_history(symbol, period=period, interval=interval) for symbol in symbols),
+            return_exceptions=True,
+        )
+        frames = {
+            symbol: frame
+            for symbol, frame in zip(symbols, results)
+            if isinstance(frame, pd.DataFrame) and not frame.empty
+        }
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+    async def close(self) -> None:
+        """Release any resources held by the provider"""
+
+
+class ThreadPoolMarketDataProvider(MarketDataProvider):
+    """Runs blocking upstream client calls on a bounded thread pool
+
+    The semaphore caps how many calls may be queued or running at once and
+    the timeout covers both the wait for a slot and the call itself, so a
+    slow upstream never blocks the event loop or piles up unbounded work.
+    Timed-out calls keep their worker thread until the client returns.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_concurrency: int,
+        timeout: float,
+    ):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"market-data-{self.name}",
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _run(self, method: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+
+        async def call():
+            async with self._semaphore:
+                return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+        try:
+            return await asyncio.wait_for(call(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Market data call timed out", provider=self.name, method=method, timeout=self.timeout)
+            raise MarketDataTimeout(f"{self.name}.{method} timed out after {self.timeout}s")
+        except MarketDataError:
+            raise
+        except Exception as e:
+            if self.is_throttling(e):
+                raise MarketDataThrottled(f"{self.name}.{method} throttled: {e}") from e
+            raise MarketDataError(f"{self.name}.{method} failed: {e}") from e
+
+    def is_throttling(self, error: Exception) -> bool:
+        """Whether a client exception means the upstream is rate limiting us"""
+        return False
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,159 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import hashlib
+import time
+import numpy as np
+import pandas as pd
+
+from app.services.market_data.base import MarketDataError, MarketDataProvider, MarketDataThrottled, period_start
+
+INTERVALS = {
+    "1m": "1min",
+    "2m": "2min",
+    "5m": "5min",
+    "15m": "15min",
+    "30m": "30min",
+    "60m": "60min",
+    "90m": "90min",
+    "1h": "60min",
+    "1d": "1D",
+    "5d": "5D",
+    "1wk": "7D",
+    "1mo": "30D",
+    "3mo": "91D",
+}
+
+
+def _epoch_days(index: pd.DatetimeIndex) -> np.ndarray:
+    return (index - pd.Timestamp(0, tz=timezone.utc)).total_seconds().to_numpy() / 86400
+
+
+def _symbol_seed(symbol: str) -> int:
+    return int.from_bytes(hashlib.sha256(symbol.upper().encode()).digest()[:4], "big")
+
+
+class FakeMarketDataProvider(MarketDataProvider):
+    """Deterministic in-process provider for tests and load testing
+
+    Prices are a pure function of (symbol, timestamp), so repeated and
+    overlapping requests agree with each other without any network access.
+    With ``rate_limit`` (calls per second, bursting to one second's worth)
+    calls beyond the upstream quota fail with MarketDataThrottled, like a
+    throttled Yahoo.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        failing_symbols: Optional[Iterable[str]] = None,
+        rate_limit: float = 0.0,
+    ):
+        self.latency = latency
+        self.failing_symbols = {s.upper() for s in failing_symbols or ()}
+        self.rate_limit = rate_limit
+        self.calls: Counter = Counter()
+        self._quota = max(rate_limit, 1.0)
+        self._quota_at = time.monotonic()
+
+    def _throttle(self, method: str) -> None:
+        now = time.monotonic()
+        burst = max(self.rate_limit, 1.0)
+        self._quota = min(burst, self._quota + (now - self._quota_at) * self.rate_limit)
+        self._quota_at = now
+        if self._quota < 1:
+            self.calls["throttled"] += 1
+            raise MarketDataThrottled(f"{self.name}.{method} throttled: Too Many Requests")
+        self._quota -= 1
+
+    async def _simulate(self, method: str, symbol: Optional[str] = None) -> None:
+        self.calls[method] += 1
+        if self.rate_limit:
+            self._throttle(method)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if symbol is not None and symbol.upper() in self.failing_symbols:
+            raise MarketDataError(f"{self.name}.{method} failed for {symbol}")
+
+    async def get_info(self, symbol: str) -> Dict[str, Any]:
+        await self._simulate("get_info", symbol)
+        seed = _symbol_seed(symbol)
+        close = self._prices(symbol, pd.DatetimeIndex([self._now() - timedelta(days=1)]))[0]
+        return {
+            "symbol": symbol.upper(),
+            "longName": f"{symbol.upper()} Holdings",
+            "sector": "Technology",
+            "industry": "Software",
+            "currency": "USD",
+            "marketCap": 1_000_000_000 + seed % 1_000_000_000_000,
+            "forwardPE": 10 + seed % 30,
+            "dividendYield": (seed % 500) / 10_000,
+            "regularMarketPreviousClose": float(close),
+            "fiftyTwoWeekHigh": float(close) * 1.2,
+            "fiftyTwoWeekLow": float(close) * 0.8,
+        }
+
+    async def get_history(
+        self,
+        symbol: str,
+        period: str = "1mo",
+        interval: str = "1d",
+        start: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        await self._simulate("get_history", symbol)
+        return self._frame(symbol, period, interval, start)
+
+    async def download(
+        self,
+        symbols: List[str],
+        period: str = "5d",
+        interval: str = "1d",
+    ) -> pd.DataFrame:
+        await self._simulate("download")
+        frames = {
+            symbol: self._frame(symbol, period, interval)
+            for symbol in symbols
+            if symbol.upper() not in self.failing_symbols
+        }
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+    def _frame(self, symbol: str, period: str, interval: str, start: Optional[datetime] = None) -> pd.DataFrame:
+        if interval not in INTERVALS:
+            raise MarketDataError(f"Unsupported interval: {interval}")
+
+        end = self._now()
+        # Twenty years is plenty of fake history for "max"
+        start = max((start or period_start(period, end)).astimezone(timezone.utc), end - timedelta(days=7305))
+        index = pd.date_range(start=start, end=end, freq=INTERVALS[interval], tz=timezone.utc)
+        index = index.floor(INTERVALS[interval]) if interval.endswith(("m", "h")) else index.normalize()
+
+        close = self._prices(symbol, index)
+        spread = close * 0.01
+        volume = (1_000_000 + (_symbol_seed(symbol) % 1000) * 1000) * (1.5 + np.sin(_epoch_days(index) * 24))
+        return pd.DataFrame(
+            {
+                "Open": close - spread / 2,
+                "High": close + spread,
+                "Low": close - spread,
+                "Close": close,
+                "Volume": volume.astype(np.int64),
+            },
+            index=index,
+        )
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(timezone.utc).replace(second=0, microsecond=0)
+
+    @staticmethod
+    def _prices(symbol: str, index: pd.DatetimeIndex) -> np.ndarray:
+        seed = _symbol_seed(symbol)
+        base = 50 + seed % 450
+        t = _epoch_days(index)
+        phase = (seed % 360) / 57.3
+        return base * (1 + 0.15 * np.sin(t / 90 + phase) + 0.05 * np.sin(t / 7 + 2 * phase) + 0.01 * np.sin(t * 97.0))
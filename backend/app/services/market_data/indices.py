@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+import asyncio
+import time
+import structlog
+
+from app.services.market_data.upstream_context import Priority, upstream_priority
+from app.services.market_data.service import MarketDataService
+
+logger = structlog.get_logger()
+
+
+class IndexSnapshot:
+    """Immutable set of index quotes published as a whole by the refresher"""
+
+    __slots__ = ("indices", "as_of", "_monotonic")
+
+    def __init__(self, indices: Dict[str, Dict[str, Any]]):
+        self.indices = indices
+        self.as_of = datetime.now(timezone.utc)
+        self._monotonic = time.monotonic()
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self._monotonic
+
+
+class IndexSnapshotRefresher:
+    """Refreshes all configured indices concurrently on a fixed schedule
+
+    Readers only ever see a complete snapshot: each refresh builds a new
+    IndexSnapshot and swaps the reference in one assignment. Indices that
+    fail to refresh keep their previous value rather than disappearing.
+    """
+
+    def __init__(self, service: MarketDataService, indices: Dict[str, str], interval: float):
+        self.service = service
+        self.indices = indices
+        self.interval = interval
+        self.snapshot: Optional[IndexSnapshot] = None
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_lock = asyncio.Lock()
+
+    async def refresh(self) -> IndexSnapshot:
+        async with self._refresh_lock:
+            return await self._refresh()
+
+    async def _refresh(self) -> IndexSnapshot:
+        symbols = list(self.indices)
+        results = await asyncio.gather(
+            *(self.service.fetch_index_quote(symbol, self.indices[symbol]) for symbol in symbols),
+            return_exceptions=True,
+        )
+
+        previous = self.snapshot.indices if self.snapshot else {}
+        indices = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                logger.warning("Failed to get index data", symbol=symbol, error=str(result))
+                result = previous.get(symbol)
+            if result is not None:
+                indices[symbol] = result
+
+        self.snapshot = IndexSnapshot(indices)
+        return self.snapshot
+
+    async def get_snapshot(self) -> IndexSnapshot:
+        """Latest snapshot; refreshes inline only if none has been published yet"""
+        if self.snapshot is None:
+            async with self._refresh_lock:
+                if self.snapshot is None:
+                    await self._refresh()
+        return self.snapshot
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                with upstream_priority(Priority.BACKGROUND):
+                    await self.refresh()
+            except Exception as e:
+                logger.error("Index snapshot refresh failed", error=str(e))
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="index-snapshot-refresher")
+            logger.info("Index snapshot refresher started", interval=self.interval, indices=list(self.indices))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import Any, Awaitable, Dict, List, Optional
+import time
+import pandas as pd
+
+from app.core.metrics import UPSTREAM_DURATION, UPSTREAM_ERRORS
+from app.services.market_data.base import MarketDataProvider
+
+
+class InstrumentedProvider(MarketDataProvider):
+    """Records latency and errors of every upstream call made through the wrapped provider
+
+    Anything other than the provider interface (e.g. the fake provider's
+    call counters) is delegated to the wrapped provider unchanged.
+    """
+
+    def __init__(self, provider: MarketDataProvider):
+        self.provider = provider
+        self.name = provider.name
+        self._durations = {
+            method: UPSTREAM_DURATION.labels(provider.name, method)
+            for method in ("get_info", "get_history", "download")
+        }
+
+    def __getattr__(self, attribute: str) -> Any:
+        if attribute == "provider":
+            raise AttributeError(attribute)
+        return getattr(self.provider, attribute)
+
+    async def _observe(self, method: str, call: Awaitable[Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            return await call
+        except Exception as e:
+            UPSTREAM_ERRORS.labels(self.name, method, type(e).__name__).inc()
+            raise
+        finally:
+            self._durations[method].observe(time.perf_counter() - started)
+
+    async def get_info(self, symbol: str) -> Dict[str, Any]:
+        return await self._observe("get_info", self.provider.get_info(symbol))
+
+    async def get_history(
+        self,
+        symbol: str,
+        period: str = "1mo",
+        interval: str = "1d",
+        start: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        return await self._observe(
+            "get_history", self.provider.get_history(symbol, period=period, interval=interval, start=start)
+        )
+
+    async def download(
+        self,
+        symbols: List[str],
+        period: str = "5d",
+        interval: str = "1d",
+    ) -> pd.DataFrame:
+        return await self._observe("download", self.provider.download(symbols, period=period, interval=interval))
+
+    async def close(self) -> None:
+        await self.provider.close()
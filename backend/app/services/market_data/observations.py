@@ -0,0 +1,274 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import asyncio
+import structlog
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.database import AsyncSessionLocal
+from app.models.price_observation import PriceObservation, PriceRollup
+
+logger = structlog.get_logger()
+
+PARTITION_PREFIX = "price_observations_p"
+# Created by the migration; holds rows for days that have no partition yet
+DEFAULT_PARTITION = "price_observations_default"
+# Held for one maintenance pass, so only one worker runs it at a time
+MAINTENANCE_LOCK = text("SELECT pg_try_advisory_xact_lock(hashtext('price_observation_maintenance'))")
+# Buckets are aligned to UTC; date_bin needs an origin
+BUCKET_ORIGIN = datetime(2000, 1, 1, tzinfo=timezone.utc)
+# interval -> (interval it is aggregated from, bucket width); None means raw observations
+ROLLUPS = {
+    "1m": (None, timedelta(minutes=1)),
+    "1h": ("1m", timedelta(hours=1)),
+    "1d": ("1h", timedelta(days=1)),
+}
+
+ROLLUP_COLUMNS = """
+    ON CONFLICT (symbol, interval, bucket) DO UPDATE
+    SET open = excluded.open, high = excluded.high, low = excluded.low, close = excluded.close,
+        volume = excluded.volume, samples = excluded.samples
+"""
+ROLLUP_OBSERVATIONS = text("""
+    INSERT INTO price_rollups (symbol, interval, bucket, open, high, low, close, volume, samples)
+    SELECT
+        symbol, :interval, date_bin(:width, observed_at, :origin) AS bucket,
+        (array_agg(price ORDER BY observed_at))[1], max(price), min(price),
+        (array_agg(price ORDER BY observed_at DESC))[1],
+        (array_agg(volume ORDER BY observed_at DESC))[1],
+        count(*)
+    FROM price_observations
+    WHERE observed_at >= :since
+    GROUP BY symbol, bucket
+""" + ROLLUP_COLUMNS)
+ROLLUP_ROLLUPS = text("""
+    INSERT INTO price_rollups (symbol, interval, bucket, open, high, low, close, volume, samples)
+    SELECT
+        symbol, :interval, date_bin(:width, bucket, :origin) AS target,
+        (array_agg(open ORDER BY bucket))[1], max(high), min(low),
+        (array_agg(close ORDER BY bucket DESC))[1],
+        (array_agg(volume ORDER BY bucket DESC))[1],
+        sum(samples)
+    FROM price_rollups
+    WHERE interval = :source AND bucket >= :since
+    GROUP BY symbol, target
+""" + ROLLUP_COLUMNS)
+LIST_PARTITIONS = text("""
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    WHERE parent.relname = 'price_observations'
+""")
+
+
+def _floor(ts: datetime, width: timedelta) -> datetime:
+    return BUCKET_ORIGIN + (ts - BUCKET_ORIGIN) // width * width
+
+
+def _partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+def _partition_day(name: str) -> Optional[date]:
+    try:
+        return datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+class PriceObservationStore:
+    """Maintenance and reads for the append-only price_observations log
+
+    Observations are written by MarketSnapshotWriter alongside the
+    market_data snapshot and land in one partition per UTC day, so a
+    symbol's range scan within a day is pruned to a single partition. A
+    background task keeps partitions created ``partitions_ahead`` days in
+    advance, re-aggregates the 1m -> 1h -> 1d rollups for buckets touched
+    in the last ``lookback`` (covering write-behind lag), drops raw
+    partitions older than ``retention_days`` and trims rollups past their
+    per-interval retention. Rows that arrived before their day's partition
+    existed sit in the default partition until ``ensure_partitions`` moves
+    them. Every worker runs the task; an advisory lock lets one pass run
+    at a time and the others skip.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        lookback: timedelta,
+        retention_days: int,
+        rollup_retention_days: Dict[str, int],
+        partitions_ahead: int,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+    ):
+        self.interval = interval
+        self.lookback = lookback
+        self.retention_days = retention_days
+        self.rollup_retention_days = rollup_retention_days
+        self.partitions_ahead = partitions_ahead
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_partitions(self, start: Optional[date] = None) -> List[str]:
+        """Create any missing daily partitions from ``start`` (today) through partitions_ahead; returns created names
+
+        Each partition is built detached, filled with its day's rows from
+        the default partition and then attached, since Postgres refuses a
+        new range whose rows already sit in the default partition.
+        """
+        start = start or datetime.now(timezone.utc).date()
+        async with self.session_factory() as session:
+            existing = set((await session.execute(LIST_PARTITIONS)).scalars().all())
+            days = [start + timedelta(days=offset) for offset in range(self.partitions_ahead + 1)]
+            days += [day for day in await self._default_days(session) if day < start]
+            created = []
+            for day in sorted(set(days)):
+                name = _partition_name(day)
+                if name in existing:
+                    continue
+                await self._create_partition(session, name, day)
+                created.append(name)
+            await session.commit()
+        if created:
+            logger.info("Price observation partitions created", partitions=created)
+        return created
+
+    async def _default_days(self, session) -> List[date]:
+        """UTC days with rows waiting in the default partition"""
+        result = await session.execute(text(
+            f"SELECT DISTINCT (observed_at AT TIME ZONE 'UTC')::date FROM {DEFAULT_PARTITION}"
+        ))
+        return list(result.scalars().all())
+
+    async def _create_partition(self, session, name: str, day: date) -> None:
+        low, high = f"{day.isoformat()} 00:00:00+00", f"{(day + timedelta(days=1)).isoformat()} 00:00:00+00"
+        # Writers would otherwise add rows for this day between the move and the attach
+        await session.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN ACCESS EXCLUSIVE MODE"))
+        await session.execute(text(f"CREATE TABLE {name} (LIKE price_observations INCLUDING DEFAULTS)"))
+        await session.execute(text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE observed_at >= '{low}' AND observed_at < '{high}' RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ))
+        await session.execute(text(
+            f"ALTER TABLE price_observations ATTACH PARTITION {name} FOR VALUES FROM ('{low}') TO ('{high}')"
+        ))
+
+    async def drop_expired_partitions(self) -> List[str]:
+        """Drop raw partitions whose whole day is older than retention_days; returns dropped names"""
+        cutoff = datetime.now(timezone.utc).date() - timedelta(days=self.retention_days)
+        async with self.session_factory() as session:
+            names = (await session.execute(LIST_PARTITIONS)).scalars().all()
+            dropped = []
+            for name in sorted(names):
+                day = _partition_day(name)
+                if name != DEFAULT_PARTITION and day is not None and day < cutoff:
+                    await session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                    dropped.append(name)
+            await session.commit()
+        if dropped:
+            logger.info("Expired price observation partitions dropped", partitions=dropped)
+        return dropped
+
+    async def trim_rollups(self) -> int:
+        """Delete rollup buckets past their interval's retention; returns deleted row count"""
+        now = datetime.now(timezone.utc)
+        deleted = 0
+        async with self.session_factory() as session:
+            for interval, days in self.rollup_retention_days.items():
+                result = await session.execute(
+                    delete(PriceRollup).where(
+                        PriceRollup.interval == interval,
+                        PriceRollup.bucket < now - timedelta(days=days),
+                    )
+                )
+                deleted += result.rowcount
+            await session.commit()
+        return deleted
+
+    async def rollup(self, since: Optional[datetime] = None) -> Dict[str, int]:
+        """Recompute every rollup bucket from ``since`` (now - lookback) on; returns upserted rows per interval"""
+        since = since or datetime.now(timezone.utc) - self.lookback
+        counts = {}
+        async with self.session_factory() as session:
+            # Each level reads the finer one, so run them in order in one transaction
+            for interval, (source, width) in ROLLUPS.items():
+                params = {"interval": interval, "width": width, "origin": BUCKET_ORIGIN, "since": _floor(since, width)}
+                if source is None:
+                    result = await session.execute(ROLLUP_OBSERVATIONS, params)
+                else:
+                    result = await session.execute(ROLLUP_ROLLUPS, {**params, "source": source})
+                counts[interval] = result.rowcount
+            await session.commit()
+        return counts
+
+    async def maintain(self) -> Optional[Dict[str, Any]]:
+        """One maintenance pass, or None when another worker holds the maintenance lock"""
+        async with self.session_factory() as lock:
+            # Transaction-scoped, so the lock goes with the session even if a step fails
+            if not (await lock.execute(MAINTENANCE_LOCK)).scalar():
+                return None
+            created = await self.ensure_partitions()
+            rollups = await self.rollup()
+            dropped = await self.drop_expired_partitions()
+            trimmed = await self.trim_rollups()
+        return {"created": created, "rollups": rollups, "dropped": dropped, "trimmed": trimmed}
+
+    async def get_observations(
+        self,
+        symbol: str,
+        interval: str,
+        start: datetime,
+        end: datetime,
+    ) -> List[Dict[str, Any]]:
+        """Raw observations (``interval="raw"``) or rollup bars for one symbol in [start, end)"""
+        symbol = symbol.upper()
+        async with self.session_factory() as session:
+            if interval == "raw":
+                result = await session.execute(
+                    select(PriceObservation.observed_at, PriceObservation.price, PriceObservation.volume)
+                    .where(
+                        PriceObservation.symbol == symbol,
+                        PriceObservation.observed_at >= start,
+                        PriceObservation.observed_at < end,
+                    )
+                    .order_by(PriceObservation.observed_at)
+                )
+            else:
+                result = await session.execute(
+                    select(
+                        PriceRollup.bucket, PriceRollup.open, PriceRollup.high, PriceRollup.low,
+                        PriceRollup.close, PriceRollup.volume, PriceRollup.samples,
+                    )
+                    .where(
+                        PriceRollup.symbol == symbol,
+                        PriceRollup.interval == interval,
+                        PriceRollup.bucket >= start,
+                        PriceRollup.bucket < end,
+                    )
+                    .order_by(PriceRollup.bucket)
+                )
+            return [dict(row._mapping) for row in result.all()]
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.maintain()
+            except Exception as e:
+                logger.error("Price observation maintenance failed", error=str(e))
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="price-observation-maintenance")
+            logger.info("Price observation maintenance started", interval=self.interval)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,352 @@
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+import asyncio
+import random
+import structlog
+import pandas as pd
+
+from app.core.metrics import UPSTREAM_QUEUE_WAIT, UPSTREAM_RETRIES, UPSTREAM_SHED
+from app.services.market_data.base import (
+    MarketDataProvider,
+    MarketDataThrottled,
+    MarketDataTimeout,
+    MarketDataUnavailable,
+)
+from app.services.market_data.upstream_context import (
+    METHOD_PRIORITY,
+    FlightPriority,
+    Priority,
+    get_upstream_context,
+)
+
+logger = structlog.get_logger()
+
+
+class SchedulerStats:
+    """Per-class grants, queueing, shedding and retries plus queue wait (seconds)"""
+
+    def __init__(self):
+        self.granted = {priority: 0 for priority in Priority}
+        self.queued = {priority: 0 for priority in Priority}
+        self.shed: Dict[Priority, Dict[str, int]] = {priority: {} for priority in Priority}
+        self.retries = {priority: 0 for priority in Priority}
+        self.throttled = 0
+        self.wait_total = {priority: 0.0 for priority in Priority}
+        self.wait_max = {priority: 0.0 for priority in Priority}
+
+    def record_wait(self, priority: Priority, wait: float) -> None:
+        self.queued[priority] += 1
+        self.wait_total[priority] += wait
+        self.wait_max[priority] = max(self.wait_max[priority], wait)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "throttled": self.throttled,
+            "classes": {
+                priority.name.lower(): {
+                    "granted": self.granted[priority],
+                    "queued": self.queued[priority],
+                    "shed": dict(self.shed[priority]),
+                    "retries": self.retries[priority],
+                    "wait_avg_ms": self.wait_total[priority] / self.queued[priority] * 1000 if self.queued[priority] else 0.0,
+                    "wait_max_ms": self.wait_max[priority] * 1000,
+                }
+                for priority in Priority
+            },
+        }
+
+
+class _Waiter:
+    __slots__ = ("future", "disconnected", "priority")
+
+    def __init__(
+        self,
+        future: asyncio.Future,
+        disconnected: Optional[Callable[[], Awaitable[bool]]],
+        priority: Priority,
+    ):
+        self.future = future
+        self.disconnected = disconnected
+        self.priority = priority
+
+
+class UpstreamScheduler:
+    """Global rate budget for upstream calls with strict-priority, bounded queues
+
+    The budget is a token bucket of ``burst`` calls refilled at ``rate``
+    per second. While no one is queued and a token is available a call is
+    admitted immediately; otherwise it waits in its class's queue and a
+    single dispatcher hands out tokens, highest class first. A full queue
+    rejects at once (MarketDataUnavailable). A waiter whose deadline passes
+    fails with MarketDataTimeout and one whose client has disconnected is
+    dropped when it reaches the head, so neither spends budget. After the
+    upstream throttles a call the whole budget pauses for a jittered,
+    exponentially growing backoff (reset by the next success) and then
+    resumes at the steady rate with an empty bucket.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        queue_limits: Dict[Priority, int],
+        queue_timeouts: Dict[Priority, float],
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+    ):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.queue_limits = queue_limits
+        self.queue_timeouts = queue_timeouts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = SchedulerStats()
+        self._tokens = float(self.burst)
+        self._updated_at: Optional[float] = None
+        self._paused_until = 0.0
+        self._throttle_streak = 0
+        self._queues: Dict[Priority, Deque[_Waiter]] = {priority: deque() for priority in Priority}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def queue_depths(self) -> Dict[str, int]:
+        return {priority.name.lower(): len(queue) for priority, queue in self._queues.items()}
+
+    @property
+    def paused_for(self) -> float:
+        return max(0.0, self._paused_until - asyncio.get_running_loop().time())
+
+    def _refill(self, now: float) -> None:
+        if self._updated_at is not None:
+            self._tokens = min(self.burst, self._tokens + max(0.0, now - self._updated_at) * self.rate)
+        self._updated_at = max(now, self._updated_at or now)
+
+    def _shed(self, priority: Priority, reason: str) -> None:
+        shed = self.stats.shed[priority]
+        shed[reason] = shed.get(reason, 0) + 1
+        UPSTREAM_SHED.labels(priority.name.lower(), reason).inc()
+
+    async def acquire(
+        self,
+        priority: Priority,
+        deadline: Optional[float] = None,
+        disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+        flight: Optional[FlightPriority] = None,
+    ) -> Priority:
+        """Wait until a call of ``priority`` may go upstream; returns the class it was granted in
+
+        ``deadline`` (loop time) bounds the wait together with the class's
+        queue timeout. Inside a shared load ``flight`` decides the class and
+        can promote the call while it is queued.
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        own = priority
+        if flight is not None:
+            priority = flight.resolve(own)
+        timeout = self.queue_timeouts[priority]
+        deadline = now + timeout if deadline is None else min(deadline, now + timeout)
+
+        if now >= self._paused_until and not any(self._queues.values()):
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.stats.granted[priority] += 1
+                return priority
+
+        queue = self._queues[priority]
+        if len(queue) >= self.queue_limits[priority]:
+            self._shed(priority, "queue_full")
+            raise MarketDataUnavailable(f"Upstream {priority.name.lower()} queue is full")
+        if deadline <= now:
+            self._shed(priority, "deadline")
+            raise MarketDataTimeout("Deadline passed before the upstream call could be scheduled")
+
+        waiter = _Waiter(loop.create_future(), disconnected, priority)
+        queue.append(waiter)
+        promote = None
+        if flight is not None:
+            promote = lambda: self._promote(waiter, flight.resolve(own))
+            flight.watch(promote)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._dispatch(), name="market-data-scheduler")
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(waiter.future, timeout=deadline - now)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            self._shed(waiter.priority, "deadline")
+            raise MarketDataTimeout(f"Waited {deadline - now:.1f}s for the upstream rate budget")
+        except asyncio.CancelledError:
+            # The caller went away (e.g. its request task was cancelled)
+            self._discard(waiter)
+            raise
+        finally:
+            if promote is not None:
+                flight.unwatch(promote)
+        priority = waiter.priority
+        wait = loop.time() - now
+        self.stats.record_wait(priority, wait)
+        UPSTREAM_QUEUE_WAIT.labels(priority.name.lower()).observe(wait)
+        return priority
+
+    def _discard(self, waiter: _Waiter) -> None:
+        # Queues are bounded, so the linear remove is cheap
+        try:
+            self._queues[waiter.priority].remove(waiter)
+        except ValueError:
+            pass
+
+    def _promote(self, waiter: _Waiter, priority: Priority) -> None:
+        """Move a queued call up to a more urgent class (it was admitted already, so limits don't apply)"""
+        if priority >= waiter.priority or waiter.future.done():
+            return
+        self._discard(waiter)
+        waiter.priority = priority
+        self._queues[priority].append(waiter)
+        self._wakeup.set()
+
+    def _next_waiter(self) -> Optional[tuple]:
+        for priority, queue in self._queues.items():
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.future.done():
+                    return priority, waiter
+        return None
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not any(self._queues.values()):
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            now = loop.time()
+            self._refill(now)
+            delay = max(self._paused_until - now, (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            entry = self._next_waiter()
+            if entry is None:
+                continue
+            priority, waiter = entry
+            if waiter.disconnected is not None:
+                try:
+                    gone = await waiter.disconnected()
+                except Exception:
+                    gone = False
+                if gone:
+                    if not waiter.future.done():
+                        self._shed(priority, "disconnected")
+                        waiter.future.set_exception(MarketDataUnavailable("Client disconnected before the upstream call"))
+                    continue
+                if waiter.future.done():
+                    continue
+            self._tokens -= 1
+            self.stats.granted[priority] += 1
+            waiter.future.set_result(None)
+
+    def throttled(self) -> float:
+        """Pause the budget after an upstream throttle; returns the pause in seconds"""
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** self._throttle_streak)
+        pause = random.uniform(ceiling / 2, ceiling)
+        self._throttle_streak += 1
+        self.stats.throttled += 1
+        now = asyncio.get_running_loop().time()
+        self._paused_until = max(self._paused_until, now + pause)
+        # Resume at the steady rate rather than with a full burst
+        self._tokens = 0.0
+        self._updated_at = self._paused_until
+        logger.warning("Market data upstream throttled", pause=round(pause, 2), streak=self._throttle_streak)
+        return pause
+
+    def succeeded(self) -> None:
+        self._throttle_streak = 0
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for queue in self._queues.values():
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.future.done():
+                    waiter.future.set_exception(MarketDataUnavailable("Market data scheduler closed"))
+
+
+class ScheduledProvider(MarketDataProvider):
+    """Routes every upstream call through the scheduler, retrying throttled calls
+
+    The priority comes from the caller's upstream_priority() block or, if
+    none, from the method (quotes and info are interactive, history is
+    chart history). A throttled call pauses the shared budget and queues
+    again at the same priority, up to ``retries`` times, within the
+    caller's deadline.
+
+    Inside a load shared through UpstreamSingleFlight the class comes from
+    the load's FlightPriority instead, and no single caller's deadline
+    applies.
+    """
+
+    def __init__(self, provider: MarketDataProvider, scheduler: UpstreamScheduler, retries: int = 3):
+        self.provider = provider
+        self.scheduler = scheduler
+        self.retries = retries
+        self.name = provider.name
+
+    def __getattr__(self, attribute: str) -> Any:
+        if attribute == "provider":
+            raise AttributeError(attribute)
+        return getattr(self.provider, attribute)
+
+    async def _call(self, method: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        context = get_upstream_context()
+        priority = context.priority if context.priority is not None else METHOD_PRIORITY[method]
+        attempt = 0
+        while True:
+            granted = await self.scheduler.acquire(priority, context.deadline, context.disconnected, context.flight)
+            try:
+                result = await call()
+            except MarketDataThrottled:
+                self.scheduler.throttled()
+                if attempt >= self.retries:
+                    raise
+                attempt += 1
+                self.scheduler.stats.retries[granted] += 1
+                UPSTREAM_RETRIES.labels(granted.name.lower()).inc()
+                continue
+            self.scheduler.succeeded()
+            return result
+
+    async def get_info(self, symbol: str) -> Dict[str, Any]:
+        return await self._call("get_info", lambda: self.provider.get_info(symbol))
+
+    async def get_history(
+        self,
+        symbol: str,
+        period: str = "1mo",
+        interval: str = "1d",
+        start: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        return await self._call(
+            "get_history", lambda: self.provider.get_history(symbol, period=period, interval=interval, start=start)
+        )
+
+    async def download(
+        self,
+        symbols: List[str],
+        period: str = "5d",
+        interval: str = "1d",
+    ) -> pd.DataFrame:
+        return await self._call("download", lambda: self.provider.download(symbols, period=period, interval=interval))
+
+    async def close(self) -> None:
+        await self.scheduler.close()
+        await self.provider.close()
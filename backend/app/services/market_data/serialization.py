@@ -0,0 +1,142 @@
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import numpy as np
+import pandas as pd
+
+HISTORY_FIELDS = ["date", "open", "high", "low", "close", "volume"]
+
+JSON = "application/json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+NDJSON = "application/x-ndjson"
+
+HISTORY_MEDIA_TYPES = {
+    JSON: JSON,
+    ARROW_STREAM: ARROW_STREAM,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    NDJSON: NDJSON,
+    "application/jsonlines": NDJSON,
+}
+
+
+def _format_offset(seconds: int) -> str:
+    sign = "+" if seconds >= 0 else "-"
+    hours, minutes = divmod(abs(seconds) // 60, 60)
+    return f"{sign}{hours:02d}:{minutes:02d}"
+
+
+def iso_dates(index: pd.DatetimeIndex) -> np.ndarray:
+    """ISO-8601 strings for a DatetimeIndex, matching Timestamp.isoformat() for whole-second bars
+
+    Formatting runs on the underlying datetime64 array; UTC offsets are
+    rendered once per distinct offset (there are only a handful, e.g. DST).
+    """
+    local = index.tz_localize(None) if index.tz is not None else index
+    dates = np.datetime_as_string(local.values, unit="s")
+    if index.tz is None:
+        return dates
+
+    offsets = (local - index.tz_convert("UTC").tz_localize(None)).total_seconds().to_numpy().astype(np.int64)
+    unique, inverse = np.unique(offsets, return_inverse=True)
+    suffixes = np.array([_format_offset(int(offset)) for offset in unique])
+    return np.char.add(dates, suffixes[inverse])
+
+
+def _ohlcv_arrays(frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+    volume = frame["Volume"].to_numpy(dtype=float, na_value=np.nan)
+    return {
+        "open": frame["Open"].to_numpy(dtype=float),
+        "high": frame["High"].to_numpy(dtype=float),
+        "low": frame["Low"].to_numpy(dtype=float),
+        "close": frame["Close"].to_numpy(dtype=float),
+        "volume": np.nan_to_num(volume, nan=0).astype(np.int64),
+    }
+
+
+def history_columns(frame: pd.DataFrame) -> Dict[str, List[Any]]:
+    """Column-oriented OHLCV payload built straight from the frame's NumPy arrays"""
+    columns = {"date": iso_dates(frame.index).tolist()}
+    columns.update((field, values.tolist()) for field, values in _ohlcv_arrays(frame).items())
+    return columns
+
+
+def history_rows(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Row-oriented OHLCV payload (one dict per bar) without iterating the frame"""
+    columns = history_columns(frame)
+    return [dict(zip(HISTORY_FIELDS, values)) for values in zip(*(columns[field] for field in HISTORY_FIELDS))]
+
+
+def negotiate_history_media_type(accept: Optional[str]) -> Optional[str]:
+    """Pick the history encoding for an Accept header
+
+    Returns the highest-q supported media type (earlier entries win ties),
+    JSON when the header is missing or allows anything, and None when
+    nothing acceptable is supported.
+    """
+    if not accept:
+        return JSON
+
+    candidates = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            candidates.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(candidates):
+        if media_type in HISTORY_MEDIA_TYPES:
+            return HISTORY_MEDIA_TYPES[media_type]
+        if media_type in ("*/*", "application/*"):
+            return JSON
+    return None
+
+
+def _epoch_millis(index: pd.DatetimeIndex) -> np.ndarray:
+    return index.as_unit("ms").asi8 if index.tz is not None else index.tz_localize("UTC").as_unit("ms").asi8
+
+
+def encode_arrow(frame: pd.DataFrame, metadata: Dict[str, str]) -> bytes:
+    """Apache Arrow IPC stream with one record batch built from the frame's arrays"""
+    import pyarrow as pa
+
+    dates = pa.array(_epoch_millis(frame.index), type=pa.timestamp("ms", tz=str(frame.index.tz or "UTC")))
+    batch = pa.record_batch(
+        [dates] + [pa.array(values) for values in _ohlcv_arrays(frame).values()],
+        names=HISTORY_FIELDS,
+    )
+    batch = batch.replace_schema_metadata(metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_msgpack(frame: pd.DataFrame, metadata: Dict[str, str]) -> bytes:
+    """MessagePack map of metadata plus columns; dates are epoch milliseconds"""
+    import msgpack
+
+    columns = {"date": _epoch_millis(frame.index).tolist()}
+    columns.update((field, values.tolist()) for field, values in _ohlcv_arrays(frame).items())
+    return msgpack.packb({**metadata, "data": columns}, use_bin_type=True)
+
+
+def iter_ndjson(frame: pd.DataFrame, metadata: Dict[str, str], chunk_size: int = 5000) -> Iterator[bytes]:
+    """NDJSON stream: a metadata line first, then one line per bar, encoded chunk by chunk
+
+    Each chunk is encoded by pandas' C JSON writer, so nothing per-row is
+    built in Python and the first bytes are sent before the series is encoded.
+    """
+    yield (json.dumps(metadata) + "\n").encode()
+    for start in range(0, len(frame), chunk_size):
+        chunk = frame.iloc[start:start + chunk_size]
+        lines = pd.DataFrame({"date": iso_dates(chunk.index), **_ohlcv_arrays(chunk)}).to_json(
+            orient="records", lines=True, double_precision=15
+        )
+        yield lines.encode() if lines.endswith("\n") else (lines + "\n").encode()
@@ -0,0 +1,287 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import structlog
+import numpy as np
+import pandas as pd
+
+from app.core.cache import TieredCache, json_dumps, json_loads
+from app.core.config import settings
+from app.services.market_data.bar_store import BarStore
+from app.services.market_data.base import INTRADAY_INTERVALS, MarketDataError, MarketDataProvider
+from app.services.market_data.upstream_context import Priority, upstream_priority
+
+logger = structlog.get_logger()
+
+
+def frame_dumps(frame: pd.DataFrame) -> bytes:
+    """Serialize an OHLCV frame for the shared cache tier"""
+    index = frame.index
+    return json_dumps({
+        "tz": str(index.tz) if index.tz is not None else None,
+        "index": index.as_unit("ns").asi8.tolist(),
+        "columns": {column: frame[column].tolist() for column in frame.columns},
+    })
+
+
+def frame_loads(data: bytes) -> pd.DataFrame:
+    payload = json_loads(data)
+    index = pd.to_datetime(payload["index"], unit="ns", utc=True)
+    index = index.tz_convert(payload["tz"]) if payload["tz"] else index.tz_localize(None)
+    return pd.DataFrame(payload["columns"], index=index)
+
+
+def _last_valid_rows(valid: np.ndarray) -> np.ndarray:
+    """Row index of the last True per column (-1 where a column has none)"""
+    rows = valid.shape[0]
+    last = rows - 1 - np.argmax(valid[::-1], axis=0)
+    return np.where(valid.any(axis=0), last, -1)
+
+
+def build_quote(prices: Dict[str, Any], info: Dict[str, Any]) -> Dict[str, Any]:
+    """The one quote shape, served by /quote and /quotes alike and cached per symbol
+
+    ``prices`` holds the price fields; ``info`` is the provider's info dict,
+    empty when only prices are known (bulk downloads), leaving its fields None.
+    """
+    symbol = prices["symbol"]
+    return {
+        "symbol": symbol,
+        "name": info.get('longName', symbol),
+        "current_price": prices["current_price"],
+        "previous_close": prices["previous_close"],
+        "change": prices["change"],
+        "change_percent": prices["change_percent"],
+        "volume": prices["volume"],
+        "market_cap": info.get('marketCap'),
+        "pe_ratio": info.get('forwardPE'),
+        "dividend_yield": info.get('dividendYield'),
+        "fifty_two_week_high": info.get('fiftyTwoWeekHigh'),
+        "fifty_two_week_low": info.get('fiftyTwoWeekLow'),
+        "currency": info.get('currency'),
+        "last_updated": prices["last_updated"],
+    }
+
+
+def quotes_from_frame(frame: pd.DataFrame, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Build the price fields of every symbol in a bulk (field, symbol) frame in one vectorized pass
+
+    The current price is each symbol's last non-NaN close and the previous
+    close is the one before it, so symbols with gaps on different days
+    (e.g. different exchange holidays) are handled without a per-symbol loop.
+    """
+    if frame.empty:
+        return {}
+    present = [symbol for symbol in symbols if ("Close", symbol) in frame.columns]
+    if not present:
+        return {}
+
+    close = frame["Close"][present].to_numpy(dtype=float)
+    if "Volume" in frame.columns.get_level_values(0):
+        volume = frame["Volume"][present].to_numpy(dtype=float)
+    else:
+        volume = np.zeros_like(close)
+    columns = np.arange(len(present))
+
+    valid = ~np.isnan(close)
+    last = _last_valid_rows(valid)
+    valid[last, columns] = False
+    previous = _last_valid_rows(valid)
+
+    has_data = last >= 0
+    current_price = close[last, columns]
+    previous_close = np.where(previous >= 0, close[previous, columns], current_price)
+    change = current_price - previous_close
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change_percent = np.where(previous_close != 0, change / previous_close * 100, 0.0)
+    latest_volume = np.nan_to_num(volume[last, columns]).astype(np.int64)
+
+    last_updated = datetime.now().isoformat()
+    return {
+        symbol: {
+            "symbol": symbol,
+            "current_price": float(current_price[i]),
+            "previous_close": float(previous_close[i]),
+            "change": float(change[i]),
+            "change_percent": float(change_percent[i]),
+            "volume": int(latest_volume[i]),
+            "last_updated": last_updated
+        }
+        for i, symbol in enumerate(present)
+        if has_data[i]
+    }
+
+
+def _quote_age(quote: Dict[str, Any]) -> float:
+    """Seconds since the quote was fetched (last_updated is naive local time); inf if unknown"""
+    try:
+        return (datetime.now() - datetime.fromisoformat(quote["last_updated"])).total_seconds()
+    except (KeyError, TypeError, ValueError):
+        return float("inf")
+
+
+class MarketDataService:
+    """Quote/index/history lookups with a read-through cache in front of the provider"""
+
+    def __init__(self, provider: MarketDataProvider, cache: TieredCache, bar_store: Optional[BarStore] = None):
+        self.provider = provider
+        self.cache = cache
+        self.bar_store = bar_store
+
+    @staticmethod
+    def quote_key(symbol: str) -> str:
+        return f"market_data:quote:{symbol}"
+
+    @staticmethod
+    def info_key(symbol: str) -> str:
+        return f"market_data:info:{symbol}"
+
+    @staticmethod
+    def history_ttl(interval: str) -> int:
+        if interval in INTRADAY_INTERVALS:
+            return settings.MARKET_DATA_CACHE_TTL
+        return settings.CACHE_TTL_SECONDS
+
+    async def get_info(self, symbol: str) -> Dict[str, Any]:
+        symbol = symbol.upper()
+        return await self.cache.get_or_load(
+            self.info_key(symbol),
+            lambda: self.provider.get_info(symbol),
+            ttl=settings.CACHE_TTL_SECONDS,
+        )
+
+    async def get_history(self, symbol: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+        symbol = symbol.upper()
+        return await self.cache.get_or_load(
+            f"market_data:history:{symbol}:{period}:{interval}",
+            lambda: self._load_history(symbol, period, interval),
+            ttl=self.history_ttl(interval),
+            dumps=frame_dumps,
+            loads=frame_loads,
+        )
+
+    async def _load_history(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        if self.bar_store is not None and interval in settings.BAR_STORE_INTERVALS:
+            try:
+                return await self.bar_store.get_history(symbol, period, interval)
+            except MarketDataError:
+                raise
+            except Exception as e:
+                logger.warning("Bar store unavailable, fetching from provider", symbol=symbol, error=str(e))
+        return await self.provider.get_history(symbol, period=period, interval=interval)
+
+    async def get_quote(self, symbol: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Latest quote for a symbol, or None when the provider has no bars
+
+        With ``max_age`` (seconds) a cached quote fetched longer ago than
+        that is refetched and the cache updated, for callers that poll
+        faster than MARKET_DATA_CACHE_TTL (live streams).
+        """
+        symbol = symbol.upper()
+        quote = await self.cache.get_or_load(
+            self.quote_key(symbol),
+            lambda: self._fetch_quote(symbol),
+            ttl=settings.MARKET_DATA_CACHE_TTL,
+        )
+        if max_age is None or quote is None or _quote_age(quote) <= max_age:
+            return quote
+        return await self._refresh_quote(symbol)
+
+    async def _refresh_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        key = self.quote_key(symbol)
+
+        async def load() -> Optional[Dict[str, Any]]:
+            quote = await self._fetch_quote(symbol)
+            if quote is not None:
+                await self.cache.set_many({key: quote}, ttl=settings.MARKET_DATA_CACHE_TTL)
+            return quote
+
+        if self.cache.flights is not None:
+            return await self.cache.flights.do(f"refresh:{key}", load)
+        return await load()
+
+    async def get_quotes(self, symbols: List[str]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+        """Quotes for many symbols with one bulk upstream call for the cache misses
+
+        Shares the per-symbol quote cache with get_quote in both directions.
+        Downloaded quotes take their info fields (name, market cap, ...) from
+        the info cache when it has them; no per-symbol info call is made.
+        Returns (quotes, errors) keyed by symbol; a symbol is in exactly one of them.
+        """
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        keys = {symbol: self.quote_key(symbol) for symbol in symbols}
+        ttl = settings.MARKET_DATA_CACHE_TTL
+
+        cached = await self.cache.get_many(list(keys.values()), ttl=ttl)
+        quotes = {symbol: cached[key] for symbol, key in keys.items() if key in cached}
+        missing = [symbol for symbol in symbols if symbol not in quotes]
+        errors: Dict[str, str] = {}
+        if not missing:
+            return quotes, errors
+
+        try:
+            frame = await self.provider.download(missing, period="5d", interval="1d")
+        except Exception as e:
+            return quotes, {symbol: str(e) for symbol in missing}
+
+        prices = quotes_from_frame(frame, missing)
+        info = await self.cache.get_many([self.info_key(symbol) for symbol in prices], ttl=settings.CACHE_TTL_SECONDS)
+        fetched = {symbol: build_quote(quote, info.get(self.info_key(symbol), {})) for symbol, quote in prices.items()}
+        logger.info("Quotes fetched", provider=self.provider.name, requested=len(missing), fetched=len(fetched))
+        await self.cache.set_many({keys[symbol]: quote for symbol, quote in fetched.items()}, ttl=ttl)
+        quotes.update(fetched)
+        errors.update({symbol: "No data returned" for symbol in missing if symbol not in fetched})
+        return quotes, errors
+
+    async def _fetch_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        # The 1d history is part of the quote, not a chart (background pollers keep their class)
+        with upstream_priority(Priority.INTERACTIVE, override=False):
+            # Through the info cache, so later batch quotes can reuse the info fields
+            info, history = await asyncio.gather(
+                self.get_info(symbol),
+                self.provider.get_history(symbol, period="1d"),
+            )
+        if history.empty:
+            return None
+        logger.info("Quote fetched", provider=self.provider.name, symbol=symbol)
+
+        latest = history.iloc[-1]
+        previous_close = info.get('regularMarketPreviousClose', latest['Close'])
+        current_price = latest['Close']
+        change = current_price - previous_close
+        change_percent = (change / previous_close) * 100 if previous_close else 0
+
+        prices = {
+            "symbol": symbol,
+            "current_price": float(current_price),
+            "previous_close": float(previous_close),
+            "change": float(change),
+            "change_percent": float(change_percent),
+            "volume": int(latest.get('Volume', 0)),
+            "last_updated": datetime.now().isoformat()
+        }
+        return build_quote(prices, info)
+
+    async def fetch_index_quote(self, symbol: str, name: str) -> Optional[Dict[str, Any]]:
+        """Uncached index lookup, used by the background snapshot refresher"""
+        history = await self.provider.get_history(symbol, period="2d")
+        if history.empty:
+            return None
+
+        latest = history.iloc[-1]
+        previous = history.iloc[-2] if len(history) > 1 else latest
+
+        current_price = latest['Close']
+        previous_close = previous['Close']
+        change = current_price - previous_close
+        change_percent = (change / previous_close) * 100
+
+        return {
+            "symbol": symbol,
+            "name": name,
+            "current_price": float(current_price),
+            "change": float(change),
+            "change_percent": float(change_percent),
+            "volume": int(latest.get('Volume', 0)),
+            "last_updated": datetime.now().isoformat()
+        }
@@ -0,0 +1,351 @@
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import asyncio
+import math
+import time
+import structlog
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.database import AsyncSessionLocal
+from app.models.market_data import MarketData
+from app.models.price_observation import PriceObservation
+
+logger = structlog.get_logger()
+
+# Postgres check_violation; price_observations has no CHECK constraints, so it means "no partition for this row"
+NO_PARTITION_SQLSTATE = "23514"
+# SQLSTATE classes caused by the row itself (data exception, constraint violation), not the connection
+ROW_ERROR_CLASSES = ("22", "23")
+# market_data.change_percent is Numeric(5, 2)
+MAX_CHANGE_PERCENT = 999.99
+
+
+class SnapshotWriterStats:
+    """Flush counts and sizes plus write lag (oldest buffered quote's age at write, seconds)"""
+
+    def __init__(self):
+        self.recorded = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.failures = 0
+        self.rows_written = 0
+        self.rows_rejected = 0
+        self.rows_dropped = 0
+        self.observations_written = 0
+        self.observations_rejected = 0
+        self.observations_dropped = 0
+        self.last_flush_rows = 0
+        self.max_flush_rows = 0
+        self.flush_time_total = 0.0
+        self.flush_time_max = 0.0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.last_flush_at: Optional[datetime] = None
+
+    def record(self, rows: int, observations: int, flush_time: float, lag: float) -> None:
+        self.flushes += 1
+        self.rows_written += rows
+        self.observations_written += observations
+        self.last_flush_rows = rows
+        self.max_flush_rows = max(self.max_flush_rows, rows)
+        self.flush_time_total += flush_time
+        self.flush_time_max = max(self.flush_time_max, flush_time)
+        self.lag_total += lag
+        self.lag_max = max(self.lag_max, lag)
+        self.last_flush_at = datetime.now(timezone.utc)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "recorded": self.recorded,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "rows_written": self.rows_written,
+            "rows_rejected": self.rows_rejected,
+            "rows_dropped": self.rows_dropped,
+            "observations_written": self.observations_written,
+            "observations_rejected": self.observations_rejected,
+            "observations_dropped": self.observations_dropped,
+            "last_flush_rows": self.last_flush_rows,
+            "max_flush_rows": self.max_flush_rows,
+            "avg_flush_rows": self.rows_written / self.flushes if self.flushes else 0.0,
+            "flush_time_avg_ms": self.flush_time_total / self.flushes * 1000 if self.flushes else 0.0,
+            "flush_time_max_ms": self.flush_time_max * 1000,
+            "lag_avg_ms": self.lag_total / self.flushes * 1000 if self.flushes else 0.0,
+            "lag_max_ms": self.lag_max * 1000,
+            "last_flush_at": self.last_flush_at.isoformat() if self.last_flush_at else None,
+        }
+
+
+class MarketSnapshotWriter:
+    """Write-behind buffer for the latest quote per symbol in market_data
+
+    Quote reads only record into an in-memory dict keyed by symbol, so
+    repeated reads of a symbol between flushes collapse into one row. A
+    background task writes the buffer every ``interval`` seconds (or as
+    soon as ``max_pending`` symbols are waiting) as one multi-row
+    INSERT ... ON CONFLICT (symbol) DO UPDATE, and ``stop`` flushes what is
+    left. Rows of a failed flush go back into the buffer unless a newer
+    quote for the symbol arrived meanwhile.
+
+    A row the database rejects (a value out of range, say) is isolated by
+    bisecting its chunk under savepoints and dropped, so one bad quote
+    never blocks the others. While the database is unreachable the buffers
+    keep at most ``max_buffered`` symbols and ``max_observations``
+    observations, dropping the oldest.
+
+    With ``observations`` enabled, every distinct upstream quote (symbol
+    and fetch time) is also appended to price_observations after the
+    snapshot commits, one savepoint per UTC day; re-reads of a cached quote
+    add nothing. A day with no partition of its own lands in the default
+    partition; should that be missing too, the day is dropped and counted
+    rather than retried, so it can never hold up the snapshot writes.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        max_pending: int,
+        observations: bool = False,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        chunk_size: int = 2000,
+        max_buffered: int = 20000,
+        max_observations: int = 100000,
+    ):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.observations = observations
+        self.max_buffered = max(max_buffered, max_pending)
+        self.max_observations = max_observations
+        self.session_factory = session_factory
+        # 6 bind parameters per row keeps each INSERT well under asyncpg's 32767 limit
+        self.chunk_size = chunk_size
+        self.stats = SnapshotWriterStats()
+        # symbol -> (row, monotonic time the symbol entered the buffer)
+        self._pending: Dict[str, tuple] = {}
+        # (symbol, observed_at) -> price_observations row
+        self._observations: Dict[tuple, Dict[str, Any]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def record(self, quotes: Iterable[Dict[str, Any]], data_source: str) -> None:
+        """Buffer quotes for the next flush; never touches the database"""
+        now = datetime.now(timezone.utc)
+        for quote in quotes:
+            row = _snapshot_row(quote, now, data_source)
+            if row is None:
+                self.stats.rows_rejected += 1
+                continue
+            previous = self._pending.get(row["symbol"])
+            if previous is not None:
+                self.stats.coalesced += 1
+            self._pending[row["symbol"]] = (row, previous[1] if previous else time.monotonic())
+            self.stats.recorded += 1
+            if self.observations:
+                observed_at = _observed_at(quote.get("last_updated"), now)
+                self._observations[(row["symbol"], observed_at)] = {
+                    "symbol": row["symbol"],
+                    "observed_at": observed_at,
+                    "price": row["price"],
+                    "volume": row["volume"],
+                    "data_source": data_source,
+                }
+        self._trim()
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    def _requeue(self, batch: Dict[str, tuple], observed: Dict[tuple, Dict[str, Any]]) -> None:
+        """Put a failed flush back in front of what was recorded since (newer quotes win)"""
+        self._pending = {**batch, **self._pending}
+        self._observations = {**observed, **self._observations}
+        self._trim()
+
+    def _trim(self) -> None:
+        while len(self._pending) > self.max_buffered:
+            del self._pending[next(iter(self._pending))]
+            self.stats.rows_dropped += 1
+        while len(self._observations) > self.max_observations:
+            del self._observations[next(iter(self._observations))]
+            self.stats.observations_dropped += 1
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns the number of snapshot rows written"""
+        async with self._flush_lock:
+            if not self._pending and not self._observations:
+                return 0
+            batch, self._pending = self._pending, {}
+            observed, self._observations = self._observations, {}
+            started = time.monotonic()
+            rows = [row for row, _ in batch.values()]
+            rejected: List[Dict[str, Any]] = []
+            try:
+                if rows:
+                    async with self.session_factory() as session:
+                        for offset in range(0, len(rows), self.chunk_size):
+                            rejected += await _execute_isolating(session, _upsert, rows[offset:offset + self.chunk_size])
+                        await session.commit()
+            except Exception:
+                self.stats.failures += 1
+                self._requeue(batch, observed)
+                raise
+            if rejected:
+                self.stats.rows_rejected += len(rejected)
+                logger.warning(
+                    "market_data rejected snapshot rows, dropping them",
+                    symbols=[row["symbol"] for row in rejected[:20]],
+                    count=len(rejected),
+                )
+
+            written = 0
+            if observed:
+                try:
+                    written = await self._write_observations(list(observed.values()))
+                except Exception as e:
+                    # The snapshot is committed; keep the observations for the next flush
+                    self.stats.failures += 1
+                    self._requeue({}, observed)
+                    logger.error("Price observation write failed", pending=len(observed), error=str(e))
+
+            finished = time.monotonic()
+            oldest = min((entered for _, entered in batch.values()), default=finished)
+            self.stats.record(len(rows) - len(rejected), written, finished - started, finished - oldest)
+            return len(rows) - len(rejected)
+
+    async def _write_observations(self, observations: List[Dict[str, Any]]) -> int:
+        """Insert observations day by day; returns how many were written"""
+        by_day: Dict[date, List[Dict[str, Any]]] = {}
+        for observation in observations:
+            by_day.setdefault(observation["observed_at"].date(), []).append(observation)
+        written = 0
+        async with self.session_factory() as session:
+            for day, rows in sorted(by_day.items()):
+                rejected: List[Dict[str, Any]] = []
+                try:
+                    async with session.begin_nested():
+                        for offset in range(0, len(rows), self.chunk_size):
+                            chunk = rows[offset:offset + self.chunk_size]
+                            rejected += await _execute_isolating(session, _insert_observations, chunk)
+                except DBAPIError as e:
+                    if _sqlstate(e) != NO_PARTITION_SQLSTATE:
+                        raise
+                    self.stats.observations_dropped += len(rows)
+                    logger.warning("No price_observations partition, dropping observations", day=day.isoformat(), count=len(rows))
+                    continue
+                if rejected:
+                    self.stats.observations_rejected += len(rejected)
+                    logger.warning("price_observations rejected rows, dropping them", day=day.isoformat(), count=len(rejected))
+                written += len(rows) - len(rejected)
+            await session.commit()
+        return written
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Market data snapshot flush failed", pending=len(self._pending), error=str(e))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="market-snapshot-writer")
+            logger.info("Market data snapshot writer started", interval=self.interval)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            written = await self.flush()
+            logger.info("Market data snapshot writer stopped", flushed=written)
+        except Exception as e:
+            logger.error("Final market data snapshot flush failed", dropped=len(self._pending), error=str(e))
+
+
+def _observed_at(last_updated: Optional[str], default: datetime) -> datetime:
+    """Upstream fetch time of a quote (naive ISO timestamps are local time)"""
+    if not last_updated:
+        return default
+    try:
+        return datetime.fromisoformat(last_updated).astimezone(timezone.utc)
+    except (TypeError, ValueError):
+        return default
+
+
+def _snapshot_row(quote: Dict[str, Any], now: datetime, data_source: str) -> Optional[Dict[str, Any]]:
+    """market_data row for a quote, or None if its price is unusable; change_percent is clamped to the column"""
+    price = quote["current_price"]
+    if price is None or not math.isfinite(price) or price < 0:
+        return None
+    change_percent = quote["change_percent"]
+    if change_percent is not None:
+        change_percent = (
+            max(-MAX_CHANGE_PERCENT, min(MAX_CHANGE_PERCENT, change_percent)) if math.isfinite(change_percent) else None
+        )
+    return {
+        "symbol": quote["symbol"],
+        "price": price,
+        "volume": quote["volume"],
+        "change_percent": change_percent,
+        "last_updated": now,
+        "data_source": data_source,
+    }
+
+
+def _sqlstate(error: DBAPIError) -> Optional[str]:
+    return getattr(error.orig, "sqlstate", None)
+
+
+async def _execute_isolating(session, statement: Callable[[List[Dict[str, Any]]], Any], rows: List[Dict[str, Any]]):
+    """Execute ``statement(rows)`` under a savepoint, bisecting around rows the database rejects
+
+    Returns the rejected rows. Errors that are not about a row's data
+    (connection lost, missing partition) are raised.
+    """
+    try:
+        async with session.begin_nested():
+            await session.execute(statement(rows))
+        return []
+    except DBAPIError as e:
+        state = _sqlstate(e) or ""
+        if e.connection_invalidated or state == NO_PARTITION_SQLSTATE or not state.startswith(ROW_ERROR_CLASSES):
+            raise
+    if len(rows) == 1:
+        return rows
+    middle = len(rows) // 2
+    return (
+        await _execute_isolating(session, statement, rows[:middle])
+        + await _execute_isolating(session, statement, rows[middle:])
+    )
+
+
+def _insert_observations(rows: List[Dict[str, Any]]):
+    return insert(PriceObservation).values(rows).on_conflict_do_nothing()
+
+
+def _upsert(rows: List[Dict[str, Any]]):
+    stmt = insert(MarketData).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[MarketData.symbol],
+        set_={
+            "price": stmt.excluded.price,
+            "volume": stmt.excluded.volume,
+            "change_percent": stmt.excluded.change_percent,
+            "last_updated": stmt.excluded.last_updated,
+            "data_source": stmt.excluded.data_source,
+        }
+    )
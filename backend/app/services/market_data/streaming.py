@@ -0,0 +1,146 @@
+from typing import Any, Dict, Iterable, Optional, Set
+import asyncio
+import itertools
+import structlog
+
+from app.services.market_data.upstream_context import Priority, upstream_priority
+from app.services.market_data.service import MarketDataService
+
+logger = structlog.get_logger()
+
+
+class QuoteSubscriber:
+    """One streaming client: its symbols and a bounded queue of pending updates
+
+    When the client falls behind, the oldest pending update is dropped to
+    make room (only the latest price matters); a client that keeps falling
+    behind is marked slow and disconnected by its endpoint.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, max_queue: int, max_dropped: int):
+        self.id = next(self._ids)
+        self.symbols: Set[str] = set()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.max_dropped = max_dropped
+        self.dropped = 0
+        self.closed = asyncio.Event()
+
+    def publish(self, update: Dict[str, Any]) -> None:
+        if self.closed.is_set():
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            if self.dropped >= self.max_dropped:
+                logger.warning("Disconnecting slow stream consumer", subscriber=self.id, dropped=self.dropped)
+                self.closed.set()
+                return
+        self.queue.put_nowait(update)
+
+    async def next_update(self) -> Optional[Dict[str, Any]]:
+        """Next update, or None once the subscriber has been closed"""
+        if self.closed.is_set():
+            return None
+        get = asyncio.ensure_future(self.queue.get())
+        closed = asyncio.ensure_future(self.closed.wait())
+        done, pending = await asyncio.wait({get, closed}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        return get.result() if get in done else None
+
+
+class QuoteHub:
+    """Fans quote updates out to subscribers with one poller per subscribed symbol
+
+    However many clients watch a symbol, it is fetched once per tick. The
+    poll goes through the service's quote cache but refetches any quote
+    older than the tick, so updates arrive every ``interval`` rather than
+    every cache TTL, and each fresh quote is written back for /quote
+    readers. A poller stops when its last subscriber goes away.
+    """
+
+    def __init__(
+        self,
+        service: MarketDataService,
+        interval: float,
+        max_queue: int = 100,
+        max_dropped: int = 500,
+    ):
+        self.service = service
+        self.interval = interval
+        self.max_queue = max_queue
+        self.max_dropped = max_dropped
+        self._subscribers: Dict[str, Set[QuoteSubscriber]] = {}
+        self._pollers: Dict[str, asyncio.Task] = {}
+        self._latest: Dict[str, Dict[str, Any]] = {}
+
+    def connect(self) -> QuoteSubscriber:
+        return QuoteSubscriber(self.max_queue, self.max_dropped)
+
+    def subscribe(self, subscriber: QuoteSubscriber, symbols: Iterable[str]) -> None:
+        for symbol in {symbol.upper() for symbol in symbols} - subscriber.symbols:
+            subscriber.symbols.add(symbol)
+            self._subscribers.setdefault(symbol, set()).add(subscriber)
+            if symbol in self._latest:
+                subscriber.publish(self._latest[symbol])
+            if symbol not in self._pollers:
+                self._pollers[symbol] = asyncio.create_task(self._poll(symbol), name=f"quote-poller-{symbol}")
+
+    def unsubscribe(self, subscriber: QuoteSubscriber, symbols: Iterable[str]) -> None:
+        for symbol in {symbol.upper() for symbol in symbols} & subscriber.symbols:
+            subscriber.symbols.discard(symbol)
+            watchers = self._subscribers.get(symbol)
+            if watchers is not None:
+                watchers.discard(subscriber)
+                if not watchers:
+                    self._stop_poller(symbol)
+
+    def disconnect(self, subscriber: QuoteSubscriber) -> None:
+        self.unsubscribe(subscriber, list(subscriber.symbols))
+        subscriber.closed.set()
+
+    def _stop_poller(self, symbol: str) -> None:
+        self._subscribers.pop(symbol, None)
+        self._latest.pop(symbol, None)
+        task = self._pollers.pop(symbol, None)
+        if task is not None:
+            task.cancel()
+
+    async def _poll(self, symbol: str) -> None:
+        while True:
+            try:
+                with upstream_priority(Priority.BACKGROUND):
+                    quote = await self.service.get_quote(symbol, max_age=self.interval)
+                if quote is not None:
+                    self._publish(symbol, {"type": "quote", "data": quote})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Quote poll failed", symbol=symbol, error=str(e))
+                self._publish(symbol, {"type": "error", "symbol": symbol, "detail": "Failed to fetch stock data"})
+            await asyncio.sleep(self.interval)
+
+    def _publish(self, symbol: str, update: Dict[str, Any]) -> None:
+        previous = self._latest.get(symbol)
+        if update["type"] == "quote" and previous is not None and _same_quote(previous["data"], update["data"]):
+            return
+        if update["type"] == "quote":
+            self._latest[symbol] = update
+        for subscriber in list(self._subscribers.get(symbol, ())):
+            subscriber.publish(update)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "symbols": len(self._pollers),
+            "subscriptions": sum(len(watchers) for watchers in self._subscribers.values()),
+        }
+
+    async def close(self) -> None:
+        for symbol in list(self._pollers):
+            self._stop_poller(symbol)
+
+
+def _same_quote(previous: Dict[str, Any], current: Dict[str, Any]) -> bool:
+    return previous["current_price"] == current["current_price"] and previous["volume"] == current["volume"]
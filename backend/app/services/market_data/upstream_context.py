@@ -0,0 +1,133 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Awaitable, Callable, Iterator, List, NamedTuple, Optional
+import contextvars
+
+
+class Priority(IntEnum):
+    """Upstream call classes; lower values are served first"""
+
+    INTERACTIVE = 0  # quotes and lookups a user is waiting on
+    HISTORY = 1  # chart history and analytics backfills of user requests
+    BACKGROUND = 2  # periodic refreshes, stream polls, bulk backfills
+
+
+# Class used when the caller has not set one
+METHOD_PRIORITY = {
+    "get_info": Priority.INTERACTIVE,
+    "download": Priority.INTERACTIVE,
+    "get_history": Priority.HISTORY,
+}
+
+
+class UpstreamContext(NamedTuple):
+    """Per-task scheduling hints: priority class, absolute deadline (loop time), client liveness check
+
+    ``flight`` is set inside a load shared by several callers (UpstreamSingleFlight).
+    """
+
+    priority: Optional[Priority] = None
+    deadline: Optional[float] = None
+    disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    flight: Optional["FlightPriority"] = None
+
+
+_context: ContextVar[UpstreamContext] = ContextVar("upstream_context", default=UpstreamContext())
+
+
+def set_upstream_context(
+    deadline: Optional[float] = None,
+    disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> None:
+    """Attach a deadline and liveness check to every upstream call made by the current task"""
+    _context.set(_context.get()._replace(deadline=deadline, disconnected=disconnected))
+
+
+@contextmanager
+def upstream_priority(priority: Priority, override: bool = True) -> Iterator[None]:
+    """Run upstream calls in the block at ``priority`` (unless one is already set and not ``override``)
+
+    Tasks started inside the block (gather, create_task) inherit it.
+    """
+    current = _context.get()
+    if not override and current.priority is not None:
+        yield
+        return
+    token = _context.set(current._replace(priority=priority))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class FlightPriority:
+    """Scheduling state of a coalesced upstream load, shared by every caller waiting on it
+
+    The load runs at the highest priority among its callers. A caller that
+    set no priority counts as whatever class the load's own code picks, as
+    if it had made the call alone. A caller joining later promotes calls
+    already queued in the scheduler. The load counts as disconnected only
+    once every caller with a liveness check has gone.
+    """
+
+    def __init__(self):
+        self.priority: Optional[Priority] = None
+        self.inherit = False
+        self._checks: List[Callable[[], Awaitable[bool]]] = []
+        self._unchecked = False
+        self._listeners: List[Callable[[], None]] = []
+
+    def join(self, context: UpstreamContext) -> None:
+        priority, inherit = context.priority, context.priority is None
+        if context.flight is not None:
+            # Started from inside another shared load: it serves that load's callers
+            if priority is not None:
+                priority, inherit = context.flight.resolve(priority), False
+            else:
+                priority, inherit = context.flight.priority, context.flight.inherit
+        changed = False
+        if priority is not None and (self.priority is None or priority < self.priority):
+            self.priority = priority
+            changed = True
+        if inherit and not self.inherit:
+            self.inherit = True
+            changed = True
+        if context.disconnected is None:
+            self._unchecked = True
+        else:
+            self._checks.append(context.disconnected)
+        if changed:
+            for listener in list(self._listeners):
+                listener()
+
+    def resolve(self, own: Priority) -> Priority:
+        """Class for a call the load's code would make at ``own``"""
+        if self.priority is None:
+            return own
+        return min(self.priority, own) if self.inherit else self.priority
+
+    def watch(self, listener: Callable[[], None]) -> None:
+        self._listeners.append(listener)
+
+    def unwatch(self, listener: Callable[[], None]) -> None:
+        self._listeners.remove(listener)
+
+    async def disconnected(self) -> bool:
+        if self._unchecked or not self._checks:
+            return False
+        for check in self._checks:
+            if not await check():
+                return False
+        return True
+
+
+def get_upstream_context() -> UpstreamContext:
+    return _context.get()
+
+
+def flight_context(flight: FlightPriority) -> contextvars.Context:
+    """Copy of the current context in which upstream calls belong to ``flight`` and no single caller"""
+    context = contextvars.copy_context()
+    context.run(_context.set, UpstreamContext(disconnected=flight.disconnected, flight=flight))
+    return context
@@ -0,0 +1,46 @@
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+
+from app.core.singleflight import SingleFlight
+from app.services.market_data.base import MarketDataTimeout
+from app.services.market_data.upstream_context import FlightPriority, flight_context, get_upstream_context
+
+
+class UpstreamSingleFlight(SingleFlight):
+    """SingleFlight for loads that call upstream: the shared load belongs to no single request
+
+    The load runs without any caller's deadline, at the highest priority
+    among the callers waiting on it (FlightPriority), and is dropped from
+    the scheduler queue only when all of them have disconnected. Each
+    caller stops waiting at its own deadline with MarketDataTimeout; the
+    load carries on for the others and still fills the cache.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._flights: Dict[asyncio.Task, FlightPriority] = {}
+
+    def _start(self, func: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        flight = FlightPriority()
+        flight.join(get_upstream_context())
+        # The task copies the context it is created in
+        task = flight_context(flight).run(asyncio.ensure_future, func())
+        self._flights[task] = flight
+        task.add_done_callback(self._flights.pop)
+        return task
+
+    def _join(self, task: asyncio.Task) -> None:
+        flight = self._flights.get(task)
+        if flight is not None:
+            flight.join(get_upstream_context())
+
+    async def _wait(self, task: asyncio.Task) -> Any:
+        deadline = get_upstream_context().deadline
+        if deadline is None:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), deadline - asyncio.get_running_loop().time())
+        except asyncio.TimeoutError:
+            if task.done():
+                raise
+            raise MarketDataTimeout("Deadline passed while waiting for a shared upstream call")
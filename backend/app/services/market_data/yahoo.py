@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import threading
+import yfinance as yf
+import pandas as pd
+
+from app.services.market_data.base import ThreadPoolMarketDataProvider
+
+
+class YahooFinanceProvider(ThreadPoolMarketDataProvider):
+    """Yahoo Finance via yfinance, run off the event loop"""
+
+    name = "yahoo_finance"
+
+    # yf.download collects results in module-level state, so concurrent
+    # downloads from different worker threads must not overlap.
+    _download_lock = threading.Lock()
+
+    def is_throttling(self, error: Exception) -> bool:
+        # yfinance surfaces HTTP 429 as a generic exception (newer releases as YFRateLimitError)
+        message = str(error)
+        return "RateLimit" in type(error).__name__ or "Too Many Requests" in message or "429" in message
+
+    async def get_info(self, symbol: str) -> Dict[str, Any]:
+        return await self._run("get_info", self._fetch_info, symbol)
+
+    async def get_history(
+        self,
+        symbol: str,
+        period: str = "1mo",
+        interval: str = "1d",
+        start: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        return await self._run("get_history", self._fetch_history, symbol, period, interval, start)
+
+    async def download(
+        self,
+        symbols: List[str],
+        period: str = "5d",
+        interval: str = "1d",
+    ) -> pd.DataFrame:
+        return await self._run("download", self._fetch_download, list(symbols), period, interval)
+
+    @staticmethod
+    def _fetch_info(symbol: str) -> Dict[str, Any]:
+        return yf.Ticker(symbol).info or {}
+
+    @staticmethod
+    def _fetch_history(symbol: str, period: str, interval: str, start: Optional[datetime]) -> pd.DataFrame:
+        if start is not None:
+            return yf.Ticker(symbol).history(start=start, interval=interval)
+        return yf.Ticker(symbol).history(period=period, interval=interval)
+
+    @classmethod
+    def _fetch_download(cls, symbols: List[str], period: str, interval: str) -> pd.DataFrame:
+        with cls._download_lock:
+            frame = yf.download(
+                symbols,
+                period=period,
+                interval=interval,
+                group_by="column",
+                auto_adjust=True,
+                progress=False,
+            )
+        if frame is None or frame.empty:
+            return pd.DataFrame()
+        if not isinstance(frame.columns, pd.MultiIndex):
+            frame.columns = pd.MultiIndex.from_product([frame.columns, symbols])
+        # Symbols yfinance failed on come back as all-NaN columns
+        return frame.dropna(axis=1, how="all")
@@ -0,0 +1,77 @@
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+from app.services.symbols.index import SymbolIndex, SymbolRecord, normalize
+from app.services.symbols.master import (
+    SymbolIndexReloader,
+    SymbolMasterError,
+    read_master,
+    write_master,
+)
+from app.services.symbols.mirror import ElasticsearchSymbolMirror
+
+# backend/
+BASE_DIR = Path(__file__).resolve().parents[3]
+
+_reloader: Optional[SymbolIndexReloader] = None
+_mirror: Optional[ElasticsearchSymbolMirror] = None
+
+
+def symbol_master_path() -> Path:
+    path = Path(settings.SYMBOL_MASTER_PATH)
+    return path if path.is_absolute() else BASE_DIR / path
+
+
+def get_symbol_mirror() -> ElasticsearchSymbolMirror:
+    global _mirror
+    if _mirror is None:
+        _mirror = ElasticsearchSymbolMirror(settings.ELASTICSEARCH_URL, alias=settings.SYMBOL_SEARCH_ES_ALIAS)
+    return _mirror
+
+
+def get_symbol_reloader() -> SymbolIndexReloader:
+    """Process-wide symbol master watcher; started from the app lifespan"""
+    global _reloader
+    if _reloader is None:
+        _reloader = SymbolIndexReloader(
+            symbol_master_path(),
+            interval=settings.SYMBOL_MASTER_RELOAD_SECONDS,
+            on_reload=get_symbol_mirror().sync if settings.SYMBOL_SEARCH_ES_MIRROR else None,
+        )
+    return _reloader
+
+
+def get_symbol_index() -> SymbolIndex:
+    """Current symbol index (loaded on first use outside the app); also usable as a FastAPI dependency"""
+    reloader = get_symbol_reloader()
+    if reloader.reloads == 0:
+        reloader.load()
+    return reloader.index
+
+
+async def close_symbol_search() -> None:
+    global _reloader, _mirror
+    if _reloader is not None:
+        await _reloader.stop()
+        _reloader = None
+    if _mirror is not None:
+        await _mirror.close()
+        _mirror = None
+
+
+__all__ = [
+    "ElasticsearchSymbolMirror",
+    "SymbolIndex",
+    "SymbolIndexReloader",
+    "SymbolMasterError",
+    "SymbolRecord",
+    "normalize",
+    "read_master",
+    "write_master",
+    "symbol_master_path",
+    "get_symbol_mirror",
+    "get_symbol_reloader",
+    "get_symbol_index",
+    "close_symbol_search",
+]
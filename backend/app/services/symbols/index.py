@@ -0,0 +1,214 @@
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import heapq
+import unicodedata
+
+# Prefixes up to this length hit a precomputed top-N table instead of a range scan
+SHORT_PREFIX = 2
+SHORT_PREFIX_TOP = 200
+# Shorter queries only match by prefix or substring; a typo in 3 characters is noise
+FUZZY_MIN_LENGTH = 4
+
+# Katakana -> hiragana so either script (and half-width kana, via NFKC) finds the other
+_KANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+# Match kinds, best first
+EXACT, SYMBOL_PREFIX, NAME_PREFIX, CONTAINS, FUZZY = range(5)
+MATCH_NAMES = ["exact", "symbol_prefix", "name_prefix", "contains", "fuzzy"]
+
+
+def normalize(text: str) -> str:
+    """NFKC, case-folded, katakana as hiragana, single spaces"""
+    text = unicodedata.normalize("NFKC", text).casefold().translate(_KANA)
+    return " ".join(text.split())
+
+
+def bigrams(text: str) -> Set[str]:
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, or ``limit + 1`` as soon as it must exceed ``limit``"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, start=1):
+        current = [i]
+        for j, other in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def allowed_typos(query: str) -> int:
+    return 1 if len(query) <= 6 else 2
+
+
+class SymbolRecord(NamedTuple):
+    """One row of the symbol master; market_cap is in USD so listings rank across currencies"""
+
+    symbol: str
+    name: str
+    name_ja: str = ""
+    exchange: str = ""
+    sector: str = ""
+    industry: str = ""
+    currency: str = ""
+    market_cap: Optional[int] = None
+    aliases: Tuple[str, ...] = ()
+
+    @property
+    def base_symbol(self) -> str:
+        """Ticker without the exchange suffix (7203.T -> 7203)"""
+        return self.symbol.rsplit(".", 1)[0] if "." in self.symbol else self.symbol
+
+    def names(self) -> List[str]:
+        return [name for name in (self.name, self.name_ja, *self.aliases) if name]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "name": self.name,
+            "name_ja": self.name_ja,
+            "exchange": self.exchange,
+            "sector": self.sector,
+            "industry": self.industry,
+            "currency": self.currency,
+            "market_cap": self.market_cap,
+        }
+
+
+class _PrefixTable:
+    """Sorted (term, id) arrays for prefix range scans plus a top-N table for short prefixes
+
+    Ids are market-cap ranks, so the best matches are the smallest ids.
+    """
+
+    def __init__(self, terms: Iterable[Tuple[str, int]]):
+        pairs = sorted(set(terms))
+        self.keys = [term for term, _ in pairs]
+        self.ids = [record_id for _, record_id in pairs]
+        short: Dict[str, Set[int]] = {}
+        for term, record_id in pairs:
+            for length in range(1, min(len(term), SHORT_PREFIX) + 1):
+                short.setdefault(term[:length], set()).add(record_id)
+        self.short = {prefix: sorted(ids)[:SHORT_PREFIX_TOP] for prefix, ids in short.items()}
+
+    def best(self, prefix: str, limit: int) -> List[int]:
+        if len(prefix) <= SHORT_PREFIX:
+            return self.short.get(prefix, [])[:limit]
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        return heapq.nsmallest(limit, set(self.ids[lo:hi]))
+
+
+class SymbolIndex:
+    """Immutable in-memory search index over the symbol master
+
+    Matches are tiered: exact ticker (with or without exchange suffix),
+    ticker prefix, prefix of a name word / full name / alias (English or
+    Japanese), substring of a name, then fuzzy matches within one or two
+    edits of a name word (candidates come from a character-bigram index).
+    Within a tier results are ordered by market cap (fuzzy: by edit
+    distance first).
+    Normalization makes full-/half-width, case and katakana/hiragana
+    differences irrelevant, so トヨタ, とよた and ﾄﾖﾀ all find 7203.T.
+
+    Prefix tiers cost a dict lookup or a bisect; the n-gram tiers only run
+    when they are needed to fill ``limit``.
+    """
+
+    def __init__(self, records: Iterable[SymbolRecord]):
+        # Position doubles as rank: largest market cap first
+        self.records = sorted(records, key=lambda record: (-(record.market_cap or 0), record.symbol))
+        self._exact: Dict[str, int] = {}
+        symbol_terms = []
+        name_terms = []
+        # Every full name and name word, for substring and typo matching via a bigram index
+        self._terms: List[str] = []
+        self._term_records: List[int] = []
+        grams: Dict[str, List[int]] = {}
+
+        for record_id, record in enumerate(self.records):
+            symbol = normalize(record.symbol)
+            base = normalize(record.base_symbol)
+            self._exact.setdefault(symbol, record_id)
+            self._exact.setdefault(base, record_id)
+            symbol_terms += [(symbol, record_id), (base, record_id)]
+
+            terms = {symbol}
+            for name in (normalize(name) for name in record.names()):
+                name_terms.append((name, record_id))
+                words = name.split(" ")
+                name_terms += [(" ".join(words[i:]), record_id) for i in range(1, len(words))]
+                terms.add(name)
+                terms.update(word for word in words if len(word) > 1)
+            for term in terms:
+                term_id = len(self._terms)
+                self._terms.append(term)
+                self._term_records.append(record_id)
+                for gram in bigrams(term):
+                    grams.setdefault(gram, []).append(term_id)
+
+        self._symbols = _PrefixTable(symbol_terms)
+        self._names = _PrefixTable(name_terms)
+        self._grams = grams
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[SymbolRecord, str]]:
+        """Best ``limit`` (record, match kind) pairs for a search-box query"""
+        q = normalize(query)
+        if not q or limit <= 0:
+            return []
+
+        ranked: Dict[int, Tuple[int, float]] = {}
+
+        def add(record_id: int, tier: int, similarity: float = 1.0) -> None:
+            best = ranked.get(record_id)
+            if best is None or (tier, -similarity) < (best[0], -best[1]):
+                ranked[record_id] = (tier, similarity)
+
+        exact = self._exact.get(q)
+        if exact is not None:
+            add(exact, EXACT)
+        for record_id in self._symbols.best(q, limit):
+            add(record_id, SYMBOL_PREFIX)
+        for record_id in self._names.best(q, limit):
+            add(record_id, NAME_PREFIX)
+
+        if len(ranked) < limit:
+            self._search_grams(q, add)
+
+        order = sorted(ranked.items(), key=lambda item: (item[1][0], -item[1][1], item[0]))[:limit]
+        return [(self.records[record_id], MATCH_NAMES[tier]) for record_id, (tier, _) in order]
+
+    def _search_grams(self, q: str, add: Callable[[int, int, float], None]) -> None:
+        query_grams = bigrams(q)
+        if not query_grams:
+            return
+        counts: Counter = Counter()
+        for gram in query_grams:
+            counts.update(self._grams.get(gram, ()))
+        typos = allowed_typos(q) if len(q) >= FUZZY_MIN_LENGTH else 0
+        # Each edit breaks at most two bigrams, so fewer shared bigrams rules a term out
+        needed = max(1, len(query_grams) - 2 * typos)
+        for term_id, matched in counts.items():
+            if matched < needed:
+                continue
+            term = self._terms[term_id]
+            if matched == len(query_grams) and q in term:
+                add(self._term_records[term_id], CONTAINS)
+            elif typos:
+                # Compare with the whole term and with its start, so partially typed words match too
+                distance = min(edit_distance(q, term, typos), edit_distance(q, term[:len(q)], typos))
+                if distance <= typos:
+                    add(self._term_records[term_id], FUZZY, 1 - distance / len(q))
+
+    def get(self, symbol: str) -> Optional[SymbolRecord]:
+        record_id = self._exact.get(normalize(symbol))
+        return self.records[record_id] if record_id is not None else None
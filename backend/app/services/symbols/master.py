@@ -0,0 +1,179 @@
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, List, Optional, Union
+import asyncio
+import csv
+import os
+import tempfile
+import structlog
+
+from app.services.symbols.index import SymbolIndex, SymbolRecord
+
+logger = structlog.get_logger()
+
+MASTER_COLUMNS = ["symbol", "name", "name_ja", "exchange", "sector", "industry", "currency", "market_cap", "aliases"]
+# Aliases (alternate names, readings, abbreviations) share one column
+ALIAS_SEPARATOR = "|"
+
+
+class SymbolMasterError(ValueError):
+    """Raised when a symbol master file has a missing column or an invalid row"""
+
+
+def _parse_row(row: dict, line: int) -> SymbolRecord:
+    symbol = (row.get("symbol") or "").strip().upper()
+    name = (row.get("name") or "").strip()
+    if not symbol or not name:
+        raise SymbolMasterError(f"line {line}: symbol and name are required")
+    market_cap = (row.get("market_cap") or "").strip()
+    try:
+        market_cap = int(float(market_cap)) if market_cap else None
+    except ValueError:
+        raise SymbolMasterError(f"line {line}: invalid market_cap {market_cap!r}")
+    aliases = tuple(
+        alias.strip() for alias in (row.get("aliases") or "").split(ALIAS_SEPARATOR) if alias.strip()
+    )
+    return SymbolRecord(
+        symbol=symbol,
+        name=name,
+        name_ja=(row.get("name_ja") or "").strip(),
+        exchange=(row.get("exchange") or "").strip(),
+        sector=(row.get("sector") or "").strip(),
+        industry=(row.get("industry") or "").strip(),
+        currency=(row.get("currency") or "").strip().upper(),
+        market_cap=market_cap,
+        aliases=aliases,
+    )
+
+
+def read_master(path: Union[str, Path]) -> List[SymbolRecord]:
+    """Parse and validate a symbol master CSV (UTF-8, optional BOM); later duplicates replace earlier rows"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        missing = {"symbol", "name"} - set(reader.fieldnames or ())
+        if missing:
+            raise SymbolMasterError(f"missing columns: {', '.join(sorted(missing))}")
+        records = {}
+        for line, row in enumerate(reader, start=2):
+            record = _parse_row(row, line)
+            records[record.symbol] = record
+    return list(records.values())
+
+
+def write_master(path: Union[str, Path], records: Iterable[SymbolRecord]) -> int:
+    """Write records sorted by symbol; the file is replaced atomically so a hot reload never sees half of it"""
+    path = Path(path)
+    rows = sorted(records, key=lambda record: record.symbol)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(MASTER_COLUMNS)
+            for record in rows:
+                writer.writerow([
+                    record.symbol, record.name, record.name_ja, record.exchange, record.sector,
+                    record.industry, record.currency,
+                    record.market_cap if record.market_cap is not None else "",
+                    ALIAS_SEPARATOR.join(record.aliases),
+                ])
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return len(rows)
+
+
+class SymbolIndexReloader:
+    """Holds the current SymbolIndex and rebuilds it when the master file changes
+
+    The file's mtime and size are polled every ``interval`` seconds; a
+    changed file is parsed and indexed on a worker thread and swapped in
+    with one assignment, so searches never wait on a reload. An invalid
+    file is logged and the previous index keeps serving. ``on_reload``
+    (e.g. the Elasticsearch mirror) runs after each successful swap.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        interval: float,
+        on_reload: Optional[Callable[[List[SymbolRecord]], Awaitable[None]]] = None,
+    ):
+        self.path = Path(path)
+        self.interval = interval
+        self.on_reload = on_reload
+        self.index = SymbolIndex([])
+        self.reloads = 0
+        self._signature: Optional[tuple] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _stat(self) -> Optional[tuple]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _build(self) -> tuple:
+        records = read_master(self.path)
+        return records, SymbolIndex(records)
+
+    def load(self) -> bool:
+        """Synchronous (re)load for startup and scripts; returns whether the index changed"""
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        records, self.index = self._build()
+        self._signature = signature
+        self.reloads += 1
+        logger.info("Symbol master loaded", path=str(self.path), symbols=len(records))
+        return True
+
+    async def reload(self, force: bool = False) -> bool:
+        signature = self._stat()
+        if signature is None:
+            if force or self._signature is not None:
+                logger.warning("Symbol master not found, keeping the current index", path=str(self.path))
+            return False
+        if signature == self._signature and not force:
+            return False
+        try:
+            records, index = await asyncio.to_thread(self._build)
+        except (OSError, SymbolMasterError) as e:
+            # Remember the bad version so it is not re-parsed every poll
+            self._signature = signature
+            logger.error("Symbol master reload failed", path=str(self.path), error=str(e))
+            return False
+        self.index = index
+        self._signature = signature
+        self.reloads += 1
+        logger.info("Symbol master loaded", path=str(self.path), symbols=len(records))
+        if self.on_reload is not None:
+            try:
+                await self.on_reload(records)
+            except Exception as e:
+                logger.warning("Symbol master reload hook failed", error=str(e))
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error("Symbol master reload failed", error=str(e))
+
+    async def start(self) -> None:
+        """Load the master now, then watch it for changes (interval 0 disables watching)"""
+        await self.reload(force=True)
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run(), name="symbol-master-reloader")
+            logger.info("Symbol master reloader started", path=str(self.path), interval=self.interval)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
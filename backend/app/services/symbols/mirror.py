@@ -0,0 +1,95 @@
+from typing import Any, Dict, List
+import time
+import structlog
+
+from app.services.symbols.index import SymbolRecord
+
+logger = structlog.get_logger()
+
+INDEX_SETTINGS = {
+    "analysis": {
+        "tokenizer": {
+            # Japanese names have no spaces; character bigrams give substring search without a plugin
+            "cjk_bigram": {"type": "ngram", "min_gram": 1, "max_gram": 2, "token_chars": ["letter", "digit"]},
+        },
+        "analyzer": {
+            "name_ja": {"type": "custom", "tokenizer": "cjk_bigram", "filter": ["cjk_width", "lowercase"]},
+        },
+    },
+}
+INDEX_MAPPINGS = {
+    "properties": {
+        "symbol": {"type": "keyword", "fields": {"prefix": {"type": "search_as_you_type"}}},
+        "name": {"type": "search_as_you_type"},
+        "name_ja": {"type": "text", "analyzer": "name_ja"},
+        "aliases": {"type": "text", "analyzer": "name_ja", "fields": {"prefix": {"type": "search_as_you_type"}}},
+        "exchange": {"type": "keyword"},
+        "sector": {"type": "keyword"},
+        "industry": {"type": "keyword"},
+        "currency": {"type": "keyword"},
+        "market_cap": {"type": "long"},
+    },
+}
+
+
+class ElasticsearchSymbolMirror:
+    """Copies the symbol master into Elasticsearch for other services (news search, RAG)
+
+    Each sync bulk-loads a fresh timestamped index and then moves
+    ``alias`` onto it in one atomic alias update, so readers of the alias
+    never see a half-loaded or empty index; the previous indices are
+    deleted afterwards. The API itself always searches in memory.
+    """
+
+    def __init__(self, url: str, alias: str = "symbols"):
+        self.url = url
+        self.alias = alias
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from elasticsearch import AsyncElasticsearch
+            self._client = AsyncElasticsearch(self.url)
+        return self._client
+
+    @staticmethod
+    def document(record: SymbolRecord) -> Dict[str, Any]:
+        return {**record.as_dict(), "aliases": list(record.aliases)}
+
+    async def _aliased_indices(self) -> List[str]:
+        from elasticsearch import NotFoundError
+        try:
+            return list((await self.client.indices.get_alias(name=self.alias)).keys())
+        except NotFoundError:
+            return []
+
+    async def sync(self, records: List[SymbolRecord]) -> str:
+        """Load records into a new index, point the alias at it and drop the old ones; returns the index name"""
+        from elasticsearch.helpers import async_bulk
+
+        name = f"{self.alias}-{time.strftime('%Y%m%d%H%M%S')}-{time.time_ns() % 1_000_000:06d}"
+        await self.client.indices.create(index=name, settings=INDEX_SETTINGS, mappings=INDEX_MAPPINGS)
+        try:
+            await async_bulk(
+                self.client,
+                ({"_index": name, "_id": record.symbol, "_source": self.document(record)} for record in records),
+            )
+            await self.client.indices.refresh(index=name)
+            previous = await self._aliased_indices()
+            await self.client.indices.update_aliases(actions=[
+                *({"remove": {"index": index, "alias": self.alias}} for index in previous),
+                {"add": {"index": name, "alias": self.alias}},
+            ])
+        except Exception:
+            await self.client.indices.delete(index=name, ignore_unavailable=True)
+            raise
+        if previous:
+            await self.client.indices.delete(index=",".join(previous), ignore_unavailable=True)
+        logger.info("Symbol master mirrored to Elasticsearch", index=name, alias=self.alias, symbols=len(records))
+        return name
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
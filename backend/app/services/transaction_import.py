@@ -0,0 +1,232 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+import codecs
+import csv
+import time
+import uuid
+import structlog
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = structlog.get_logger()
+
+# Accepted header names for each investment_history column
+COLUMN_ALIASES = {
+    "symbol": ("symbol", "ticker"),
+    "transaction_type": ("transaction_type", "type", "side", "action"),
+    "quantity": ("quantity", "qty", "shares"),
+    "price": ("price",),
+    "transaction_date": ("transaction_date", "date", "trade_date"),
+}
+COPY_COLUMNS = ["transaction_id", "user_id", "symbol", "transaction_type", "quantity", "price", "transaction_date"]
+TRANSACTION_TYPES = {"buy": "BUY", "sell": "SELL"}
+MAX_NUMERIC = 1e11  # Numeric(15, 4)
+MAX_REPORTED_ERRORS = 100
+
+# Rebuild the imported symbols' portfolio rows from the user's full history in
+# one statement: net quantity, buy-weighted average price and first trade date
+REBUILD_PORTFOLIOS = text("""
+    WITH net AS (
+        SELECT
+            symbol,
+            SUM(CASE WHEN transaction_type = 'BUY' THEN quantity ELSE -quantity END) AS quantity,
+            COALESCE(
+                SUM(quantity * price) FILTER (WHERE transaction_type = 'BUY')
+                / NULLIF(SUM(quantity) FILTER (WHERE transaction_type = 'BUY'), 0),
+                0
+            ) AS average_price,
+            MIN(transaction_date)::date AS purchase_date
+        FROM investment_history
+        WHERE user_id = :user_id AND symbol = ANY(:symbols)
+        GROUP BY symbol
+    ),
+    removed AS (
+        DELETE FROM portfolios p
+        USING net n
+        WHERE p.user_id = :user_id AND p.symbol = n.symbol AND n.quantity <= 0
+        RETURNING p.symbol
+    ),
+    upserted AS (
+        INSERT INTO portfolios (portfolio_id, user_id, symbol, quantity, average_price, purchase_date, created_at, updated_at)
+        SELECT gen_random_uuid(), :user_id, n.symbol, n.quantity, n.average_price, n.purchase_date, now(), now()
+        FROM net n
+        WHERE n.quantity > 0
+        ON CONFLICT ON CONSTRAINT uq_portfolios_user_symbol DO UPDATE
+        SET quantity = excluded.quantity, average_price = excluded.average_price,
+            purchase_date = excluded.purchase_date, updated_at = now()
+        RETURNING xmax = 0 AS inserted
+    )
+    SELECT
+        (SELECT count(*) FROM upserted WHERE NOT inserted) AS updated,
+        (SELECT count(*) FROM upserted WHERE inserted) AS inserted,
+        (SELECT count(*) FROM removed) AS removed
+""")
+
+
+class ImportValidationError(Exception):
+    """Raised when the CSV is malformed or contains invalid rows; nothing is imported"""
+
+    def __init__(self, message: str, errors: Optional[List[Dict[str, Any]]] = None):
+        super().__init__(message)
+        self.errors = errors or []
+
+
+async def iter_lines(blocks: AsyncIterator[bytes], encoding: str = "utf-8-sig") -> AsyncIterator[str]:
+    """Decode a byte stream into lines without holding more than one block
+
+    Quoted fields containing line breaks are not supported.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    async for block in blocks:
+        pending += decoder.decode(block)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def _resolve_header(header: List[str]) -> List[int]:
+    names = [name.strip().lower() for name in header]
+    positions = []
+    for column, aliases in COLUMN_ALIASES.items():
+        matches = [i for i, name in enumerate(names) if name in aliases]
+        if not matches:
+            raise ImportValidationError(f"Missing column: {column} (accepted: {', '.join(aliases)})")
+        positions.append(matches[0])
+    return positions
+
+
+def validate_chunk(rows: List[List[str]], line_numbers: List[int], user_id: uuid.UUID):
+    """Validate one chunk of rows in a vectorized pass
+
+    Returns (COPY records, error dicts); rows are already projected onto
+    the COLUMN_ALIASES order and ``line_numbers`` are their file lines.
+    """
+    if not rows:
+        return [], []
+    frame = pd.DataFrame(rows, columns=list(COLUMN_ALIASES))
+    symbol = frame["symbol"].str.strip().str.upper()
+    transaction_type = frame["transaction_type"].str.strip().str.lower().map(TRANSACTION_TYPES)
+    quantity_text = frame["quantity"].str.strip().str.replace(",", "", regex=False)
+    price_text = frame["price"].str.strip().str.replace(",", "", regex=False)
+    quantity = pd.to_numeric(quantity_text, errors="coerce")
+    price = pd.to_numeric(price_text, errors="coerce")
+    transaction_date = pd.to_datetime(frame["transaction_date"].str.strip(), errors="coerce", utc=True, format="ISO8601")
+
+    checks = {
+        "symbol": (symbol.str.len() > 0) & (symbol.str.len() <= 20),
+        "transaction_type": transaction_type.notna(),
+        "quantity": (quantity > 0) & (quantity < MAX_NUMERIC),
+        "price": (price >= 0) & (price < MAX_NUMERIC),
+        "transaction_date": transaction_date.notna(),
+    }
+    valid = np.logical_and.reduce([check.to_numpy() for check in checks.values()])
+
+    errors = []
+    for i in np.flatnonzero(~valid)[:MAX_REPORTED_ERRORS]:
+        fields = [column for column, check in checks.items() if not check.iat[i]]
+        errors.append({"line": line_numbers[i], "fields": fields, "row": rows[i]})
+
+    ids = [uuid.uuid4() for _ in range(int(valid.sum()))]
+    records = list(zip(
+        ids,
+        [user_id] * len(ids),
+        symbol[valid].tolist(),
+        transaction_type[valid].tolist(),
+        quantity_text[valid].tolist(),
+        price_text[valid].tolist(),
+        transaction_date[valid].dt.to_pydatetime().tolist(),
+    ))
+    return records, errors
+
+
+async def import_transactions(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    blocks: AsyncIterator[bytes],
+    chunk_size: int = 10000,
+) -> Dict[str, Any]:
+    """Stream a transactions CSV into investment_history and rebuild portfolios
+
+    Rows are parsed and validated chunk by chunk and each valid chunk is
+    written with asyncpg COPY, so memory stays bounded by ``chunk_size``
+    whatever the file size. Everything runs in the session's transaction:
+    if any row is invalid, the whole import is rolled back and
+    ImportValidationError lists the offending lines. Otherwise the
+    portfolios of every imported symbol are rebuilt set-based before the
+    commit.
+    """
+    started = time.perf_counter()
+    connection = await session.connection()
+    raw = (await connection.get_raw_connection()).driver_connection
+
+    lines = iter_lines(blocks)
+    try:
+        header = next(csv.reader([await lines.__anext__()]))
+    except (StopAsyncIteration, StopIteration):
+        raise ImportValidationError("Empty CSV")
+    positions = _resolve_header(header)
+    width = max(positions) + 1
+
+    imported = 0
+    chunks = 0
+    symbols = set()
+    errors: List[Dict[str, Any]] = []
+
+    async def load(batch: List[str], line_numbers: List[int]) -> None:
+        nonlocal imported, chunks
+        rows = []
+        for line_number, fields in zip(line_numbers, csv.reader(batch)):
+            if len(fields) < width:
+                errors.append({"line": line_number, "fields": ["columns"], "row": fields})
+            else:
+                rows.append(([fields[position] for position in positions], line_number))
+        records, chunk_errors = validate_chunk([row for row, _ in rows], [line for _, line in rows], user_id)
+        errors.extend(chunk_errors)
+        if not errors and records:
+            await raw.copy_records_to_table("investment_history", records=records, columns=COPY_COLUMNS)
+            imported += len(records)
+            symbols.update(record[2] for record in records)
+        chunks += 1
+
+    batch: List[str] = []
+    line_numbers: List[int] = []
+    line_number = 1
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        batch.append(line)
+        line_numbers.append(line_number)
+        if len(batch) >= chunk_size:
+            await load(batch, line_numbers)
+            batch, line_numbers = [], []
+            if len(errors) >= MAX_REPORTED_ERRORS:
+                break
+    if batch and len(errors) < MAX_REPORTED_ERRORS:
+        await load(batch, line_numbers)
+
+    if errors:
+        await session.rollback()
+        errors.sort(key=lambda error: error["line"])
+        raise ImportValidationError("Invalid rows; nothing was imported", errors[:MAX_REPORTED_ERRORS])
+
+    result = await session.execute(REBUILD_PORTFOLIOS, {"user_id": user_id, "symbols": sorted(symbols)})
+    portfolios = result.one()._asdict()
+    await session.commit()
+
+    elapsed = time.perf_counter() - started
+    report = {
+        "imported": imported,
+        "chunks": chunks,
+        "symbols": len(symbols),
+        "portfolios": portfolios,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(imported / elapsed) if elapsed > 0 else None,
+    }
+    logger.info("Transactions imported", user_id=str(user_id), **{k: v for k, v in report.items() if k != "portfolios"})
+    return report
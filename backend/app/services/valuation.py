@@ -0,0 +1,99 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+
+from app.models.portfolio import Portfolio
+
+QUANTUM = Decimal("0.0001")  # matches Numeric(15, 4) on portfolios
+
+
+def _decimal(value: float) -> Decimal:
+    return Decimal(repr(value)).quantize(QUANTUM)
+
+
+def _decimals(values: np.ndarray) -> List[Optional[Decimal]]:
+    return [None if np.isnan(value) else _decimal(value) for value in values.tolist()]
+
+
+def _totals(cost: np.ndarray, value: np.ndarray, pnl: np.ndarray, priced: np.ndarray) -> Dict[str, Any]:
+    """Cost over all the given positions; value and P&L over the priced ones"""
+    priced_cost = float(cost[priced].sum())
+    total_pnl = float(pnl[priced].sum())
+    return {
+        "cost": _decimal(float(cost.sum())),
+        "value": _decimal(float(value[priced].sum())),
+        "unrealized_pnl": _decimal(total_pnl),
+        "unrealized_pnl_percent": _decimal(total_pnl / priced_cost * 100) if priced_cost else None,
+        "priced_positions": int(priced.sum()),
+    }
+
+
+def value_portfolio(
+    positions: Sequence[Portfolio],
+    quotes: Dict[str, Dict[str, Any]],
+    errors: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """Value every position and the portfolio totals in one vectorized pass
+
+    Positions without a quote keep their cost basis but have no price,
+    value or P&L, and are left out of the value and P&L totals. Amounts
+    are only summed within a currency: ``totals_by_currency`` has one
+    entry per quoted currency, and the overall totals are None when the
+    priced positions span several (a quote without a currency is assumed
+    to share the others').
+    """
+    quantity = np.array([float(position.quantity) for position in positions], dtype=float)
+    average_price = np.array([float(position.average_price) for position in positions], dtype=float)
+    price = np.array(
+        [quotes[position.symbol]["current_price"] if position.symbol in quotes else np.nan for position in positions],
+        dtype=float,
+    )
+    currencies = [
+        quotes[position.symbol].get("currency") if position.symbol in quotes else None for position in positions
+    ]
+
+    cost = quantity * average_price
+    value = quantity * price
+    pnl = value - cost
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pnl_percent = np.where(cost != 0, pnl / cost * 100, np.nan)
+
+    priced = ~np.isnan(price)
+    overall = _totals(cost, value, pnl, priced)
+    by_currency = {}
+    for currency in sorted({currency for currency in currencies if currency is not None}):
+        mask = np.array([code == currency for code in currencies], dtype=bool)
+        by_currency[currency] = _totals(cost[mask], value[mask], pnl[mask], priced[mask])
+    single = len(by_currency) <= 1
+
+    rows = zip(positions, currencies, _decimals(price), _decimals(value), _decimals(pnl), _decimals(pnl_percent))
+    return {
+        "positions": [
+            {
+                "portfolio_id": position.portfolio_id,
+                "user_id": position.user_id,
+                "symbol": position.symbol,
+                "quantity": position.quantity,
+                "average_price": position.average_price,
+                "purchase_date": position.purchase_date,
+                "created_at": position.created_at,
+                "updated_at": position.updated_at,
+                "currency": currency,
+                "current_price": current_price,
+                "current_value": current_value,
+                "unrealized_pnl": unrealized_pnl,
+                "unrealized_pnl_percent": unrealized_pnl_percent,
+            }
+            for position, currency, current_price, current_value, unrealized_pnl, unrealized_pnl_percent in rows
+        ],
+        "currency": next(iter(by_currency), None) if single else None,
+        "total_cost": overall["cost"] if single else None,
+        "total_value": overall["value"] if single else None,
+        "total_unrealized_pnl": overall["unrealized_pnl"] if single else None,
+        "total_unrealized_pnl_percent": overall["unrealized_pnl_percent"] if single else None,
+        "totals_by_currency": by_currency,
+        "priced_positions": overall["priced_positions"],
+        "errors": errors or {},
+        "as_of": datetime.now(timezone.utc),
+    }
@@ -1,8 +1,11 @@
 from datetime import datetime, timedelta
 from typing import Optional, Union
+import hashlib
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
+from app.core.cache import MISSING, TTLCache
 from app.core.config import settings
 
 # Password hashing
@@ -36,10 +39,24 @@ def create_refresh_token(data: dict) -> str:
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
+# Verified token payloads keyed by SHA-256 of the token, each expiring at its
+# own exp claim; the LRU bound caps memory (entries are a few hundred bytes)
+verified_tokens = TTLCache(max_entries=settings.AUTH_TOKEN_CACHE_MAX_ENTRIES, default_ttl=0)
+
 def verify_token(token: str) -> Optional[dict]:
     """Verify and decode a JWT token"""
+    key = hashlib.sha256(token.encode()).hexdigest()
+    payload = verified_tokens.get(key)
+    if payload is not MISSING:
+        return dict(payload)
+
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+    # Only tokens with an exp are cached, and never beyond it
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        verified_tokens.set(key, payload, ttl=exp - time.time())
+    return dict(payload)
\ No newline at end of file
@@ -1,11 +1,21 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import structlog
 from app.core.config import settings
-from app.core.database import engine
-from app.core.logging import setup_logging
+from app.core.database import engine, pool_status
+from app.core.logging import close_logging, setup_logging
+from app.core.metrics import CONTENT_TYPE_LATEST, MetricsMiddleware, render_metrics
+from app.core.rate_limit import RateLimitMiddleware, close_rate_limiter, get_rate_limiter
 from app.api.v1.api import api_router
+from app.core.password_hasher import close_password_hasher
+from app.services.market_data import (
+    close_market_data_provider,
+    get_index_refresher,
+    get_observation_store,
+    get_snapshot_writer,
+)
+from app.services.symbols import close_symbol_search, get_symbol_reloader
 
 # Setup logging
 setup_logging()
@@ -15,9 +25,19 @@ logger = structlog.get_logger()
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Personal Investment Assistant API")
+    get_index_refresher().start()
+    if settings.PRICE_OBSERVATIONS_ENABLED:
+        get_observation_store().start()
+    get_snapshot_writer().start()
+    await get_symbol_reloader().start()
     yield
     # Shutdown
     logger.info("Shutting down Personal Investment Assistant API")
+    await close_symbol_search()
+    await close_market_data_provider()
+    close_password_hasher()
+    await close_rate_limiter()
+    close_logging()
 
 app = FastAPI(
     title="Personal Investment Assistant API",
@@ -28,6 +48,10 @@ app = FastAPI(
     redoc_url="/redoc" if settings.DEBUG else None,
 )
 
+# Token-bucket rate limiting per user / client IP (innermost, so 429s get CORS headers and metrics)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, limiter=get_rate_limiter())
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -37,6 +61,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency and in-flight metrics (outermost, so CORS and errors are included)
+app.add_middleware(MetricsMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
@@ -48,6 +75,11 @@ async def root():
         "status": "running"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/health")
 async def health_check():
     try:
@@ -60,6 +92,7 @@ async def health_check():
         return {
             "status": "healthy",
             "database": "connected",
+            "pool": pool_status(),
             "timestamp": "2024-01-01T00:00:00Z"
         }
     except Exception as e:
@@ -0,0 +1,68 @@
+"""
+Backfill and compact the local OHLCV bar store (price_bars)
+
+Usage:
+    python scripts/bar_store.py backfill AAPL MSFT 7203.T --interval 1d --period max
+    python scripts/bar_store.py compact --intraday-retention-days 30
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.market_data import BarStore, close_market_data_provider, get_market_data_provider
+
+async def backfill(symbols, interval: str, period: str, concurrency: int):
+    """Re-download full history for each symbol"""
+    store = BarStore(get_market_data_provider())
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(symbol: str):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                bars = await store.backfill(symbol, interval=interval, period=period)
+                print(f"  {symbol.upper():<12} {bars:>7} bars  {time.perf_counter() - started:.1f}s")
+                return True
+            except Exception as e:
+                print(f"  {symbol.upper():<12} failed: {e}")
+                return False
+
+    print(f"📥 Backfilling {len(symbols)} symbols ({interval}, {period})...")
+    results = await asyncio.gather(*(run(symbol) for symbol in symbols))
+    print(f"✅ {sum(results)}/{len(results)} symbols backfilled")
+
+async def compact(intraday_retention_days):
+    """Drop expired intraday bars and resync series metadata"""
+    store = BarStore(get_market_data_provider())
+    deleted = await store.compact(intraday_retention_days=intraday_retention_days)
+    print(f"✅ Compaction completed ({deleted} intraday bars deleted)")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill_parser = commands.add_parser("backfill", help="download full history into the store")
+    backfill_parser.add_argument("symbols", nargs="+")
+    backfill_parser.add_argument("--interval", default="1d")
+    backfill_parser.add_argument("--period", default="max")
+    backfill_parser.add_argument("--concurrency", type=int, default=4)
+
+    compact_parser = commands.add_parser("compact", help="apply retention and resync series metadata")
+    compact_parser.add_argument("--intraday-retention-days", type=int, default=None)
+
+    args = parser.parse_args()
+    try:
+        if args.command == "backfill":
+            await backfill(args.symbols, args.interval, args.period, args.concurrency)
+        else:
+            await compact(args.intraday_retention_days)
+    finally:
+        await close_market_data_provider()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""
+Performance reconstruction time for large transaction histories: full rebuild vs incremental update
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from app.services.analytics.performance import Closes, Transactions, reconstruct, summarize
+
+SIZES = [10_000, 100_000]
+SYMBOLS = 200
+YEARS = 10
+REPEAT = 3
+
+def make_history(transactions: int):
+    rng = np.random.default_rng(42)
+    first = np.datetime64("2015-01-01", "D")
+    days = np.arange(first, first + np.timedelta64(365 * YEARS, "D"))
+    days = days[np.is_busday(days)]
+    symbols = np.array([f"S{i:03d}" for i in range(SYMBOLS)], dtype=str)
+
+    walk = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(days), SYMBOLS)), axis=0))
+    closes = Closes(np.repeat(days, SYMBOLS), np.tile(symbols, len(days)), walk.ravel(), {})
+
+    picks = np.sort(rng.integers(0, len(days), transactions))
+    columns = rng.integers(0, SYMBOLS, transactions)
+    quantity = rng.integers(1, 20, transactions).astype(float)
+    quantity[rng.random(transactions) < 0.3] *= -0.5
+    txns = Transactions(days[picks], symbols[columns], quantity, walk[picks, columns])
+    return txns, closes, days
+
+def best(func) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    for size in SIZES:
+        txns, closes, days = make_history(size)
+        full = reconstruct(txns, closes, txns.dates.min())
+        # A new trade dated last week only recomputes the days since then
+        start = days[-5]
+        recent = closes.dates >= start
+        tail = Closes(closes.dates[recent], closes.symbols[recent], closes.close[recent], {})
+        new = Transactions(np.array([start]), np.array(["S000"], dtype=str), np.array([5.0]), np.array([100.0]))
+        updated = txns.append(new)
+
+        full_time = best(lambda: reconstruct(updated, closes, updated.dates.min()))
+        incremental_time = best(lambda: reconstruct(updated, tail, start, prefix=full))
+        summary_time = best(lambda: summarize(full))
+        print(f"\n{size} transactions, {SYMBOLS} symbols, {len(days)} days")
+        print(f"  full rebuild   {full_time * 1000:8.1f} ms")
+        print(f"  incremental    {incremental_time * 1000:8.1f} ms")
+        print(f"  summary        {summary_time * 1000:8.1f} ms (TWR, XIRR, drawdown)")
+
+if __name__ == "__main__":
+    main()
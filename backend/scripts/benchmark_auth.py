@@ -0,0 +1,64 @@
+"""
+Requests per second on an authenticated endpoint with and without the principal cache
+
+Runs the app in-process against the configured database; the user must exist
+(e.g. created by seed_data.py).
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import httpx
+
+from app.core import principal_cache
+from app.core.config import settings
+from app.core.database import engine
+from app.utils.security import create_access_token
+from main import app
+
+def use_principal_cache(ttl: int) -> None:
+    settings.AUTH_PRINCIPAL_CACHE_TTL = ttl
+    principal_cache._principal_cache = None
+
+async def run(client: httpx.AsyncClient, headers, requests: int, concurrency: int) -> float:
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            response = await client.get("/api/v1/users/profile", headers=headers)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--email", default="demo@example.com")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--ttl", type=int, default=30, help="principal cache TTL for the cached run")
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': args.email})}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        results = {}
+        for label, ttl in (("uncached", 0), ("cached", args.ttl)):
+            use_principal_cache(ttl)
+            await run(client, headers, min(200, args.requests), args.concurrency)  # warm up
+            results[label] = await run(client, headers, args.requests, args.concurrency)
+
+    await engine.dispose()
+    print(f"{args.requests} requests, concurrency {args.concurrency}")
+    for label, rps in results.items():
+        print(f"  {label:<9} {rps:>9.0f} req/s")
+    print(f"  speedup   {results['cached'] / results['uncached']:>9.2f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
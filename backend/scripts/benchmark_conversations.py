@@ -0,0 +1,89 @@
+"""
+Conversation list latency by page depth: OFFSET pagination vs the keyset cursor
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import select, text
+
+from app.core.database import AsyncSessionLocal
+from app.models.user import User
+
+EMAIL = "demo@example.com"
+MESSAGES = 100_000
+PAGE_SIZE = 50
+PAGES = [1, 100, 1000, 1999]
+REPEAT = 5
+
+SEED = text("""
+    INSERT INTO conversations (conversation_id, user_id, message_type, content, message_metadata, created_at)
+    SELECT gen_random_uuid(), :user_id,
+           (CASE WHEN i % 2 = 0 THEN 'USER' ELSE 'ASSISTANT' END)::messagetype,
+           'message ' || i || repeat(' lorem ipsum', 20),
+           jsonb_build_object('tokens', i % 900, 'context', repeat('x', 2000)),
+           now() - make_interval(secs => :messages - i)
+    FROM generate_series(1, :messages) AS i
+""")
+OFFSET = text("""
+    SELECT conversation_id, user_id, message_type, content, created_at FROM conversations
+    WHERE user_id = :user_id ORDER BY created_at DESC, conversation_id DESC
+    LIMIT :limit OFFSET :offset
+""")
+KEYSET = text("""
+    SELECT conversation_id, user_id, message_type, content, created_at FROM conversations
+    WHERE user_id = :user_id AND (created_at, conversation_id) < (:created_at, :conversation_id)
+    ORDER BY created_at DESC, conversation_id DESC
+    LIMIT :limit
+""")
+
+async def best(session, stmt, params) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        (await session.execute(stmt, params)).all()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+async def main():
+    async with AsyncSessionLocal() as session:
+        user_id = (await session.execute(select(User.user_id).where(User.email == EMAIL))).scalar_one()
+        count = (await session.execute(
+            text("SELECT count(*) FROM conversations WHERE user_id = :user_id"), {"user_id": user_id}
+        )).scalar_one()
+        if count < MESSAGES:
+            print(f"Seeding {MESSAGES - count} messages for {EMAIL}...")
+            await session.execute(SEED, {"user_id": user_id, "messages": MESSAGES - count})
+            await session.commit()
+            await session.execute(text("ANALYZE conversations"))
+
+        print(f"{max(count, MESSAGES)} messages, {PAGE_SIZE} per page")
+        for page in PAGES:
+            offset = (page - 1) * PAGE_SIZE
+            # The row the previous page ended on, i.e. what the cursor encodes
+            boundary = (await session.execute(
+                text("SELECT created_at, conversation_id FROM conversations WHERE user_id = :user_id "
+                     "ORDER BY created_at DESC, conversation_id DESC LIMIT 1 OFFSET :offset"),
+                {"user_id": user_id, "offset": max(offset - 1, 0)},
+            )).one()
+            offset_time = await best(session, OFFSET, {"user_id": user_id, "limit": PAGE_SIZE, "offset": offset})
+            keyset_time = await best(session, KEYSET, {
+                "user_id": user_id, "limit": PAGE_SIZE,
+                "created_at": boundary.created_at, "conversation_id": boundary.conversation_id,
+            })
+            print(f"  page {page:5d}   offset {offset_time * 1000:7.2f} ms   keyset {keyset_time * 1000:7.2f} ms")
+
+        plan = await session.execute(text("EXPLAIN " + KEYSET.text), {
+            "user_id": user_id, "limit": PAGE_SIZE,
+            "created_at": boundary.created_at, "conversation_id": boundary.conversation_id,
+        })
+        print("\nKeyset plan:")
+        for (line,) in plan.all():
+            print(f"  {line}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
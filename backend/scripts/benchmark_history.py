@@ -0,0 +1,71 @@
+"""
+Micro-benchmark for /market/history serialization: legacy iterrows vs vectorized rows vs columnar
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+from app.services.market_data.serialization import history_columns, history_rows
+
+SIZES = [1_000, 10_000, 100_000]
+REPEAT = 5
+
+def make_frame(bars: int) -> pd.DataFrame:
+    """Synthetic 1-minute bars in exchange local time"""
+    index = pd.date_range("2020-01-01 09:00", periods=bars, freq="1min", tz="America/New_York")
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 0.1, bars))
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close + 0.05,
+            "Low": close - 0.05,
+            "Close": close,
+            "Volume": np.full(bars, 1000.0),
+        },
+        index=index,
+    )
+
+def iterrows_rows(frame: pd.DataFrame):
+    """Previous implementation, kept here as the baseline"""
+    data = []
+    for date, row in frame.iterrows():
+        data.append({
+            "date": date.isoformat(),
+            "open": float(row['Open']),
+            "high": float(row['High']),
+            "low": float(row['Low']),
+            "close": float(row['Close']),
+            "volume": int(row['Volume']) if not pd.isna(row['Volume']) else 0
+        })
+    return data
+
+def best_of(func, frame) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        json.dumps(func(frame))
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    print(f"{'bars':>8} {'iterrows ms':>12} {'rows ms':>10} {'columns ms':>11} {'rows x':>7} {'columns x':>10}")
+    for bars in SIZES:
+        frame = make_frame(bars)
+        assert iterrows_rows(frame[:100]) == history_rows(frame[:100])
+
+        baseline = best_of(iterrows_rows, frame)
+        rows = best_of(history_rows, frame)
+        columns = best_of(history_columns, frame)
+        print(
+            f"{bars:>8} {baseline * 1000:>12.1f} {rows * 1000:>10.1f} {columns * 1000:>11.1f}"
+            f" {baseline / rows:>7.1f} {baseline / columns:>10.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Payload size and encode time for /market/history encodings (JSON, Arrow IPC, MessagePack, NDJSON)
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.market_data.serialization import (
+    encode_arrow,
+    encode_msgpack,
+    history_columns,
+    history_rows,
+    iter_ndjson,
+)
+from benchmark_history import make_frame
+
+SIZES = [1_000, 10_000, 100_000]
+REPEAT = 5
+METADATA = {"symbol": "BENCH", "period": "max", "interval": "1m"}
+
+ENCODERS = {
+    "json rows": lambda frame: json.dumps({**METADATA, "data": history_rows(frame)}).encode(),
+    "json columns": lambda frame: json.dumps({**METADATA, "data": history_columns(frame)}).encode(),
+    "arrow ipc": lambda frame: encode_arrow(frame, METADATA),
+    "msgpack": lambda frame: encode_msgpack(frame, METADATA),
+    "ndjson": lambda frame: b"".join(iter_ndjson(frame, METADATA)),
+}
+
+def measure(encode, frame):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        payload = encode(frame)
+        timings.append(time.perf_counter() - start)
+    return len(payload), min(timings)
+
+def first_chunk_latency(frame) -> float:
+    """Time until NDJSON has its first data chunk ready to send"""
+    start = time.perf_counter()
+    chunks = iter_ndjson(frame, METADATA)
+    next(chunks)
+    next(chunks)
+    return time.perf_counter() - start
+
+def main():
+    for bars in SIZES:
+        frame = make_frame(bars)
+        results = {name: measure(encode, frame) for name, encode in ENCODERS.items()}
+        baseline_size, baseline_time = results["json rows"]
+        print(f"\n{bars} bars")
+        print(f"  {'format':<13} {'bytes':>12} {'vs json':>8} {'encode ms':>10} {'vs json':>8}")
+        for name, (size, elapsed) in results.items():
+            print(
+                f"  {name:<13} {size:>12,} {size / baseline_size:>8.2f}"
+                f" {elapsed * 1000:>10.1f} {elapsed / baseline_time:>8.2f}"
+            )
+        print(f"  ndjson first data chunk after {first_chunk_latency(frame) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
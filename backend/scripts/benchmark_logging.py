@@ -0,0 +1,110 @@
+"""
+Caller-side cost of a log call: stdlib JSON logging vs the orjson + background writer pipeline
+"""
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import structlog
+
+from app.core import logging as app_logging
+from app.core.config import settings
+
+RECORDS = 50_000
+SLOW_RECORDS = 2_000
+REPEAT = 3
+
+class SlowStream:
+    """stdout behind a congested pipe: every write blocks for 1 ms"""
+
+    def __init__(self):
+        self.buffer = self
+
+    def write(self, data):
+        time.sleep(0.001)
+        return len(data)
+
+    def flush(self):
+        pass
+
+def emit(logger, records: int = RECORDS) -> float:
+    start = time.perf_counter()
+    for i in range(records):
+        logger.info("Portfolio item added", symbol="AAPL", user_id="c95ef626-6ff4-4085-b4e9-9569ccfd547c", n=i)
+    return (time.perf_counter() - start) / records
+
+def sampled(logger) -> float:
+    start = time.perf_counter()
+    for i in range(RECORDS):
+        logger.info("Quote fetched", provider="fake", symbol="AAPL")
+    return (time.perf_counter() - start) / RECORDS
+
+def configure_stdlib(stream) -> None:
+    """The previous non-DEBUG setup: stdlib handler, json.dumps, synchronous write"""
+    root = logging.getLogger()
+    root.handlers = [logging.StreamHandler(stream)]
+    root.setLevel(logging.INFO)
+    structlog.reset_defaults()
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.processors.UnicodeDecoder(),
+            structlog.processors.JSONRenderer(),
+        ],
+        context_class=dict,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        cache_logger_on_first_use=True,
+    )
+
+def main():
+    devnull = open(os.devnull, "w")
+    stdout = sys.stdout
+
+    configure_stdlib(devnull)
+    baseline = min(emit(structlog.get_logger()) for _ in range(REPEAT))
+
+    settings.LOG_FORMAT = "json"
+    settings.LOG_LEVEL = "INFO"
+    sys.stdout = devnull
+    try:
+        results = {}
+        for threaded in (False, True):
+            settings.LOG_ASYNC = threaded
+            app_logging.setup_logging()
+            logger = structlog.get_logger()
+            results[threaded] = min(emit(logger) for _ in range(REPEAT))
+            results["sampled"] = min(sampled(logger) for _ in range(REPEAT))
+            app_logging.close_logging()
+
+        sys.stdout = SlowStream()
+        for threaded in (False, True):
+            settings.LOG_ASYNC = threaded
+            app_logging.setup_logging()
+            results[("slow", threaded)] = emit(structlog.get_logger(), SLOW_RECORDS)
+            dropped = app_logging._writer.dropped
+            app_logging.close_logging()
+    finally:
+        sys.stdout = stdout
+
+    print(f"{RECORDS} records per run, best of {REPEAT}")
+    print(f"  stdlib + json, sync        {baseline * 1e6:6.2f} us/record")
+    print(f"  orjson, inline write       {results[False] * 1e6:6.2f} us/record")
+    print(f"  orjson, background writer  {results[True] * 1e6:6.2f} us/record")
+    print(f"  sampled event (1%)         {results['sampled'] * 1e6:6.2f} us/record")
+    print(f"Blocking stdout (1 ms per write), {SLOW_RECORDS} records")
+    print(f"  orjson, inline write       {results[('slow', False)] * 1e6:8.1f} us/record")
+    print(f"  orjson, background writer  {results[('slow', True)] * 1e6:8.1f} us/record ({dropped} dropped)")
+
+if __name__ == "__main__":
+    main()
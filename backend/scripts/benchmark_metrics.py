@@ -0,0 +1,67 @@
+"""
+Per-request cost of the Prometheus metrics middleware and of the /metrics scrape
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from fastapi import FastAPI
+
+from app.core.metrics import MetricsMiddleware, render_metrics
+
+REQUESTS = 20_000
+ROUTES = 40  # roughly the API's route count, for label cardinality
+REPEAT = 3
+
+def make_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+    for i in range(ROUTES):
+        app.add_api_route(f"/items{i}/{{item_id}}", lambda item_id: {"ok": True}, methods=["GET"])
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+async def drive(app) -> float:
+    """Call the ASGI app directly so only framework + middleware time is measured"""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for i in range(REQUESTS):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": f"/items{i % ROUTES}/{i}", "raw_path": b"", "query_string": b"",
+            "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80), "root_path": "",
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / REQUESTS
+
+async def best(app) -> float:
+    return min([await drive(app) for _ in range(REPEAT)])
+
+async def main():
+    plain = make_app(instrumented=False)
+    instrumented = make_app(instrumented=True)
+    # Build the middleware stacks before timing
+    await drive(plain)
+    await drive(instrumented)
+
+    baseline = await best(plain)
+    measured = await best(instrumented)
+    print(f"{REQUESTS} requests over {ROUTES} routes")
+    print(f"  without middleware  {baseline * 1e6:8.1f} us/request")
+    print(f"  with middleware     {measured * 1e6:8.1f} us/request (+{(measured - baseline) * 1e6:.1f} us)")
+
+    started = time.perf_counter()
+    body = render_metrics()
+    print(f"  /metrics scrape     {(time.perf_counter() - started) * 1000:8.1f} ms ({len(body) / 1024:.0f} KiB)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+"""
+Per-request cost of the rate limit middleware, and how a client hammering
+/market/history?period=max is throttled compared with a quote poller
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from fastapi import FastAPI
+
+from app.core.config import settings
+from app.core.rate_limit import MemoryBucketStore, RateLimiter, RateLimitMiddleware, RouteCosts
+from app.utils.security import create_access_token
+
+REQUESTS = 20_000
+CLIENTS = 1_000
+REPEAT = 3
+
+def make_app(limiter=None) -> FastAPI:
+    app = FastAPI()
+    app.add_api_route("/api/v1/market/quote/{symbol}", lambda symbol: {"ok": True}, methods=["GET"])
+    app.add_api_route("/api/v1/market/history/{symbol}", lambda symbol: {"ok": True}, methods=["GET"])
+    if limiter is not None:
+        app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    return app
+
+def scope(path: str, query: bytes = b"", client: str = "10.0.0.1", token: str = "") -> dict:
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": b"", "query_string": query,
+        "headers": headers, "client": (client, 1), "server": ("test", 80), "root_path": "",
+    }
+
+async def call(app, request: dict) -> int:
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(request, receive, send)
+    return status
+
+async def drive(app, tokens) -> float:
+    """Quote requests spread over CLIENTS users (valid tokens) so every check is a real bucket update"""
+    started = time.perf_counter()
+    for i in range(REQUESTS):
+        await call(app, scope(f"/api/v1/market/quote/S{i}", token=tokens[i % CLIENTS]))
+    return (time.perf_counter() - started) / REQUESTS
+
+async def best(app, tokens) -> float:
+    return min([await drive(app, tokens) for _ in range(REPEAT)])
+
+async def hammer(limiter: RateLimiter, tokens) -> None:
+    """One second of a 500 req/s history script next to a 5 req/s quote poller,
+    and a script rotating quote requests over many accounts from one address"""
+    app = make_app(limiter)
+    counts = {"history": [0, 0], "quote": [0, 0], "rotating": [0, 0]}
+    for i in range(500):
+        status = await call(app, scope("/api/v1/market/history/AAPL", b"period=max", client="10.0.0.66"))
+        counts["history"][status == 429] += 1
+        status = await call(app, scope("/api/v1/market/quote/AAPL", client="10.0.0.99", token=tokens[i % 50]))
+        counts["rotating"][status == 429] += 1
+        if i % 100 == 0:
+            status = await call(app, scope("/api/v1/market/quote/AAPL", client="10.0.0.7"))
+            counts["quote"][status == 429] += 1
+    for name, (allowed, rejected) in counts.items():
+        print(f"  {name:8s} allowed {allowed:4d}  rejected {rejected:4d}")
+
+async def main():
+    # Generous limit so the overhead run measures accepted requests only
+    limiter = RateLimiter(MemoryBucketStore(settings.RATE_LIMIT_MAX_KEYS), 10**9, 60, RouteCosts(settings.RATE_LIMIT_ROUTE_COSTS))
+    tokens = [create_access_token({"sub": f"user{i}@example.com"}) for i in range(CLIENTS)]
+    plain = make_app()
+    limited = make_app(limiter)
+    await drive(plain, tokens)
+    await drive(limited, tokens)
+
+    baseline = await best(plain, tokens)
+    measured = await best(limited, tokens)
+    print(f"{REQUESTS} requests from {CLIENTS} users")
+    print(f"  without middleware  {baseline * 1e6:8.1f} us/request")
+    print(f"  with middleware     {measured * 1e6:8.1f} us/request (+{(measured - baseline) * 1e6:.1f} us)")
+
+    print(f"{settings.RATE_LIMIT_REQUESTS} tokens per {settings.RATE_LIMIT_WINDOW}s, route costs {settings.RATE_LIMIT_ROUTE_COSTS}")
+    await hammer(RateLimiter(
+        MemoryBucketStore(settings.RATE_LIMIT_MAX_KEYS),
+        settings.RATE_LIMIT_REQUESTS,
+        settings.RATE_LIMIT_WINDOW,
+        RouteCosts(settings.RATE_LIMIT_ROUTE_COSTS),
+        ip_requests=settings.RATE_LIMIT_IP_REQUESTS,
+    ), tokens)
+
+if __name__ == "__main__":
+    asyncio.run(main())
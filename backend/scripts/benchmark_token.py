@@ -0,0 +1,40 @@
+"""
+Per-request JWT verification cost with and without the verified-token cache
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from jose import jwt
+
+from app.core.config import settings
+from app.utils.security import create_access_token, verified_tokens, verify_token
+
+ITERATIONS = 20_000
+TOKENS = 100  # distinct users sending their token repeatedly
+
+def uncached(token: str) -> dict:
+    return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+
+def measure(verify, tokens) -> float:
+    start = time.perf_counter()
+    for i in range(ITERATIONS):
+        verify(tokens[i % len(tokens)])
+    return (time.perf_counter() - start) / ITERATIONS
+
+def main():
+    tokens = [create_access_token({"sub": f"user{i}@example.com"}) for i in range(TOKENS)]
+    verified_tokens.clear()
+
+    baseline = measure(uncached, tokens)
+    cached = measure(verify_token, tokens)
+    print(f"{ITERATIONS} verifications over {TOKENS} tokens")
+    print(f"  jose decode      {baseline * 1e6:8.1f} us/request")
+    print(f"  verify_token     {cached * 1e6:8.1f} us/request ({baseline / cached:.1f}x)")
+    print(f"  cached tokens    {len(verified_tokens):8d}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Bulk import a broker transactions CSV into investment_history and rebuild the user's portfolios
+
+Usage:
+    python scripts/import_transactions.py user@example.com trades.csv --chunk-size 20000
+
+Columns: symbol, transaction_type (buy/sell), quantity, price, transaction_date (ISO 8601)
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.user import User
+from app.services.transaction_import import ImportValidationError, import_transactions
+
+BLOCK_SIZE = 1 << 20
+
+async def read_blocks(path: Path):
+    with path.open("rb") as handle:
+        while True:
+            block = await asyncio.to_thread(handle.read, BLOCK_SIZE)
+            if not block:
+                return
+            yield block
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("email")
+    parser.add_argument("csv", type=Path)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    try:
+        async with AsyncSessionLocal() as session:
+            user = (await session.execute(select(User).where(User.email == args.email))).scalar_one_or_none()
+            if user is None:
+                print(f"❌ No user with email {args.email}")
+                return 1
+
+            print(f"📥 Importing {args.csv} for {args.email}...")
+            try:
+                report = await import_transactions(session, user.user_id, read_blocks(args.csv), chunk_size=args.chunk_size)
+            except ImportValidationError as e:
+                print(f"❌ {e}")
+                for error in e.errors:
+                    print(f"  line {error['line']}: {', '.join(error['fields'])} {error['row']}")
+                return 1
+
+        portfolios = report["portfolios"]
+        print(f"✅ {report['imported']:,} transactions in {report['seconds']}s ({report['rows_per_second']:,} rows/s)")
+        print(
+            f"   {report['symbols']} symbols; portfolios: {portfolios['inserted']} added,"
+            f" {portfolios['updated']} updated, {portfolios['removed']} closed"
+        )
+        return 0
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
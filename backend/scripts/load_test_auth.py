@@ -0,0 +1,103 @@
+"""
+Quote latency while a login storm is running, with bcrypt on the hashing pool vs on the event loop
+
+Runs the app in-process against the configured database; the user must exist
+(e.g. created by seed_data.py). Use MARKET_DATA_PROVIDER=fake to keep
+upstream latency out of the numbers.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import httpx
+
+from app.core import password_hasher
+from app.core.database import engine
+from app.utils.security import create_access_token
+from main import app
+
+class InlineHasher(password_hasher.PasswordHasher):
+    """The pre-pool behaviour: bcrypt runs directly on the event loop"""
+
+    async def _run(self, func, *args):
+        return func(*args)
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+
+async def sample_quotes(client, headers, stop: asyncio.Event, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/api/v1/market/quote/AAPL", headers=headers)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.005)
+
+async def login_storm(client, email, password, logins, concurrency):
+    remaining = iter(range(logins))
+    statuses = []
+
+    async def worker():
+        for _ in remaining:
+            response = await client.post("/api/v1/auth/login", json={"email": email, "password": password})
+            statuses.append(response.status_code)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return statuses
+
+async def phase(client, headers, args, with_logins: bool):
+    latencies = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_quotes(client, headers, stop, latencies))
+    statuses = []
+    if with_logins:
+        statuses = await login_storm(client, args.email, args.password, args.logins, args.concurrency)
+    else:
+        await asyncio.sleep(args.baseline_seconds)
+    stop.set()
+    await sampler
+    return latencies, statuses
+
+def report(label, latencies, statuses):
+    codes = {code: statuses.count(code) for code in sorted(set(statuses))}
+    print(
+        f"  {label:<22} quotes={len(latencies):>5} p50={percentile(latencies, 0.5):7.1f}ms"
+        f" p99={percentile(latencies, 0.99):7.1f}ms max={max(latencies) * 1000:7.1f}ms"
+        f" mean={statistics.mean(latencies) * 1000:6.1f}ms logins={codes}"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--email", default="demo@example.com")
+    parser.add_argument("--password", default="demo123")
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--baseline-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': args.email})}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        await client.get("/api/v1/market/quote/AAPL", headers=headers)  # warm up
+
+        print("bcrypt on the hashing pool")
+        report("no logins", *await phase(client, headers, args, with_logins=False))
+        report("during logins", *await phase(client, headers, args, with_logins=True))
+        print(f"  hasher: {password_hasher.get_password_hasher().stats.as_dict()}")
+
+        password_hasher._password_hasher = InlineHasher(max_workers=1, max_queue=0)
+        print("bcrypt on the event loop")
+        report("during logins", *await phase(client, headers, args, with_logins=True))
+
+    password_hasher.close_password_hasher()
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
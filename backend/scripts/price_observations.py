@@ -0,0 +1,72 @@
+"""
+Maintain the price observation log (price_observations) and its rollups
+
+Usage:
+    python scripts/price_observations.py maintain
+    python scripts/price_observations.py rollup --hours 48
+    python scripts/price_observations.py explain AAPL --date 2024-03-15
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+
+from app.core.database import AsyncSessionLocal
+from app.services.market_data import get_observation_store
+
+async def maintain():
+    """Create upcoming partitions, refresh recent rollups and apply retention"""
+    report = await get_observation_store().maintain()
+    print(f"✅ Partitions created: {', '.join(report['created']) or 'none'}")
+    print(f"   Rollup rows upserted: {report['rollups']}")
+    print(f"   Partitions dropped: {', '.join(report['dropped']) or 'none'}")
+    print(f"   Rollup rows trimmed: {report['trimmed']}")
+
+async def rollup(hours: int):
+    """Re-aggregate every rollup bucket of the last N hours"""
+    counts = await get_observation_store().rollup(since=datetime.now(timezone.utc) - timedelta(hours=hours))
+    print(f"✅ Rollup rows upserted: {counts}")
+
+async def explain(symbol: str, day: date):
+    """Show the plan of a one-day range scan (should touch a single partition)"""
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text(
+                "EXPLAIN SELECT observed_at, price, volume FROM price_observations "
+                "WHERE symbol = :symbol AND observed_at >= :start AND observed_at < :end ORDER BY observed_at"
+            ),
+            {"symbol": symbol.upper(), "start": start, "end": start + timedelta(days=1)},
+        )
+        for (line,) in result.all():
+            print(line)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("maintain", help="partitions, rollups and retention (what the app runs periodically)")
+
+    rollup_parser = commands.add_parser("rollup", help="rebuild rollups over a longer window")
+    rollup_parser.add_argument("--hours", type=int, default=24)
+
+    explain_parser = commands.add_parser("explain", help="show partition pruning for a one-day scan")
+    explain_parser.add_argument("symbol")
+    explain_parser.add_argument("--date", type=date.fromisoformat, default=datetime.now(timezone.utc).date())
+
+    args = parser.parse_args()
+    if args.command == "maintain":
+        await maintain()
+    elif args.command == "rollup":
+        await rollup(args.hours)
+    else:
+        await explain(args.symbol, args.date)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+Mixed upstream load against the fake provider with simulated throttling
+
+A background backfill floods the upstream while users request quotes and
+charts. Without the scheduler every class fails alike once the fake
+upstream's quota is exhausted; with it the budget stays under the quota
+and interactive calls are served first.
+
+Usage:
+    python scripts/simulate_upstream_throttling.py --upstream-rate 10 --budget 8 --seconds 10
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.market_data import (
+    FakeMarketDataProvider,
+    MarketDataError,
+    Priority,
+    ScheduledProvider,
+    UpstreamScheduler,
+    upstream_priority,
+)
+
+# Arrivals per second by class
+LOAD = {Priority.INTERACTIVE: 4, Priority.HISTORY: 3, Priority.BACKGROUND: 20}
+DEADLINES = {Priority.INTERACTIVE: 5.0, Priority.HISTORY: 15.0, Priority.BACKGROUND: 60.0}
+
+async def run(provider, seconds: float):
+    results = defaultdict(list)  # priority -> [(ok, latency)]
+    loop = asyncio.get_running_loop()
+
+    async def one(priority: Priority, i: int):
+        started = time.perf_counter()
+        try:
+            with upstream_priority(priority):
+                if priority == Priority.INTERACTIVE:
+                    await provider.get_info(f"Q{i}")
+                else:
+                    await provider.get_history(f"H{i}", period="1mo")
+            results[priority].append((True, time.perf_counter() - started))
+        except MarketDataError:
+            results[priority].append((False, time.perf_counter() - started))
+
+    async def arrivals(priority: Priority, rate: float):
+        tasks = []
+        for i in range(int(seconds * rate)):
+            tasks.append(asyncio.create_task(one(priority, i)))
+            await asyncio.sleep(1 / rate)
+        await asyncio.gather(*tasks)
+
+    started = loop.time()
+    await asyncio.gather(*(arrivals(priority, rate) for priority, rate in LOAD.items()))
+    return results, loop.time() - started
+
+def report(title: str, results, elapsed: float, provider: FakeMarketDataProvider):
+    print(f"{title} ({elapsed:.1f}s, upstream calls {sum(provider.calls.values()) - provider.calls['throttled']}, "
+          f"throttled {provider.calls['throttled']})")
+    for priority in Priority:
+        outcomes = results[priority]
+        ok = [latency for success, latency in outcomes if success]
+        p50 = statistics.median(ok) * 1000 if ok else 0.0
+        print(f"  {priority.name.lower():12s} ok {len(ok):4d}/{len(outcomes):<4d}  p50 {p50:8.1f} ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--upstream-rate", type=float, default=10.0, help="fake upstream quota, calls/second")
+    parser.add_argument("--budget", type=float, default=8.0, help="scheduler budget, calls/second")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    fake = FakeMarketDataProvider(latency=0.05, rate_limit=args.upstream_rate)
+    results, elapsed = await run(fake, args.seconds)
+    report("Without scheduler", results, elapsed, fake)
+
+    fake = FakeMarketDataProvider(latency=0.05, rate_limit=args.upstream_rate)
+    scheduler = UpstreamScheduler(
+        rate=args.budget,
+        burst=int(args.budget),
+        queue_limits={Priority.INTERACTIVE: 200, Priority.HISTORY: 100, Priority.BACKGROUND: 500},
+        queue_timeouts=DEADLINES,
+    )
+    provider = ScheduledProvider(fake, scheduler)
+    results, elapsed = await run(provider, args.seconds)
+    report(f"With scheduler at {args.budget:g}/s", results, elapsed, fake)
+    print(f"  shed {dict((p.name.lower(), s) for p, s in scheduler.stats.shed.items() if s)}")
+    await provider.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""
+Load, inspect and search the symbol master behind /market/search
+
+The running API watches the master file and picks up changes within
+SYMBOL_MASTER_RELOAD_SECONDS; no restart is needed after a load.
+
+Usage:
+    python scripts/symbols.py load exchange_listings.csv            # merge into the master
+    python scripts/symbols.py load exchange_listings.csv --replace  # replace the master
+    python scripts/symbols.py search トヨタ --limit 5
+    python scripts/symbols.py stats
+    python scripts/symbols.py mirror                                # copy into Elasticsearch
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.symbols import (
+    SymbolIndex,
+    SymbolMasterError,
+    close_symbol_search,
+    get_symbol_mirror,
+    read_master,
+    symbol_master_path,
+    write_master,
+)
+
+def current_records(path: Path):
+    return read_master(path) if path.exists() else []
+
+def load(source: str, replace: bool):
+    """Validate a CSV in the master format and write it into the master"""
+    path = symbol_master_path()
+    try:
+        incoming = read_master(source)
+    except (OSError, SymbolMasterError) as e:
+        print(f"❌ {source}: {e}")
+        return False
+    records = {} if replace else {record.symbol: record for record in current_records(path)}
+    added = sum(record.symbol not in records for record in incoming)
+    records.update((record.symbol, record) for record in incoming)
+    count = write_master(path, records.values())
+    print(f"✅ {path}: {count} symbols ({added} added, {len(incoming) - added} updated)")
+    return True
+
+def search(query: str, limit: int):
+    started = time.perf_counter()
+    index = SymbolIndex(current_records(symbol_master_path()))
+    built = time.perf_counter() - started
+
+    runs = 1000
+    started = time.perf_counter()
+    for _ in range(runs):
+        results = index.search(query, limit)
+    per_search = (time.perf_counter() - started) / runs
+
+    for record, match in results:
+        print(f"  {record.symbol:<10} {match:<14} {record.name}  {record.name_ja}")
+    print(f"🔎 {len(results)} results, {per_search * 1e6:.1f} µs/search (index of {len(index)} built in {built * 1000:.1f} ms)")
+
+def stats():
+    records = current_records(symbol_master_path())
+    print(f"📊 {symbol_master_path()}: {len(records)} symbols")
+    for exchange, count in Counter(record.exchange or "-" for record in records).most_common():
+        print(f"  {exchange:<10} {count:>6}")
+    print(f"  with Japanese name {sum(bool(record.name_ja) for record in records)}, "
+          f"with market cap {sum(record.market_cap is not None for record in records)}")
+
+async def mirror():
+    """Bulk-load the master into a fresh Elasticsearch index and swap the alias onto it"""
+    records = current_records(symbol_master_path())
+    try:
+        name = await get_symbol_mirror().sync(records)
+        print(f"✅ {len(records)} symbols mirrored to {name}")
+    finally:
+        await close_symbol_search()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load_parser = commands.add_parser("load", help="merge (or replace) the master with a CSV file")
+    load_parser.add_argument("source")
+    load_parser.add_argument("--replace", action="store_true", help="drop symbols missing from SOURCE")
+
+    search_parser = commands.add_parser("search", help="query the index the API would build")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=10)
+
+    commands.add_parser("stats", help="summarize the master file")
+    commands.add_parser("mirror", help="copy the master into Elasticsearch")
+
+    args = parser.parse_args()
+    if args.command == "load":
+        sys.exit(0 if load(args.source, args.replace) else 1)
+    elif args.command == "search":
+        search(args.query, args.limit)
+    elif args.command == "stats":
+        stats()
+    else:
+        asyncio.run(mirror())
+
+if __name__ == "__main__":
+    main()
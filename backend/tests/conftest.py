@@ -0,0 +1,8 @@
+import os
+
+# Settings are read on import: run against the deterministic fake provider,
+# without Redis. The database still comes from DATABASE_URL (integration tests only).
+os.environ.setdefault("MARKET_DATA_PROVIDER", "fake")
+os.environ.setdefault("CACHE_REDIS_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_STORE", "memory")
+os.environ.setdefault("SYMBOL_SEARCH_ES_MIRROR", "false")
@@ -0,0 +1,80 @@
+"""Integration tests run the app in-process against the database in DATABASE_URL"""
+from pathlib import Path
+import asyncio
+import uuid
+
+import asyncpg
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.models.conversation import Conversation
+from app.models.investment_history import InvestmentHistory
+from app.models.portfolio import Portfolio
+from app.models.user import User
+from app.utils.security import create_access_token
+from main import app
+
+
+def _database_available() -> bool:
+    async def ping() -> None:
+        connection = await asyncpg.connect(settings.DATABASE_URL, timeout=2)
+        await connection.close()
+
+    try:
+        asyncio.run(ping())
+    except Exception:
+        return False
+    return True
+
+
+requires_database = pytest.mark.skipif(not _database_available(), reason="DATABASE_URL is not reachable")
+
+
+def pytest_collection_modifyitems(config, items):
+    here = Path(__file__).parent
+    for item in items:
+        if here in Path(item.fspath).parents:
+            item.add_marker(requires_database)
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    # One loop per module: pooled asyncpg connections are bound to the loop that opened them
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest_asyncio.fixture(scope="module", autouse=True)
+async def database():
+    yield
+    # Close this module's pooled connections before its loop goes away
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture(scope="module")
+async def client():
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+
+
+@pytest_asyncio.fixture
+async def user():
+    """A throwaway user (removed with everything it owns afterwards) and its auth headers"""
+    user = User(email=f"test-{uuid.uuid4().hex}@example.com", password_hash="!")
+    async with AsyncSessionLocal() as session:
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user.email})}"}
+    yield user, headers
+    async with AsyncSessionLocal() as session:
+        for model in (Conversation, InvestmentHistory, Portfolio):
+            await session.execute(delete(model).where(model.user_id == user.user_id))
+        await session.execute(delete(User).where(User.user_id == user.user_id))
+        await session.commit()
@@ -0,0 +1,56 @@
+import pytest
+
+
+async def post_messages(client, headers, count):
+    for i in range(count):
+        response = await client.post(
+            "/api/v1/conversations/",
+            json={"message_type": "user", "content": f"message {i}", "message_metadata": {"i": i}},
+            headers=headers,
+        )
+        assert response.status_code == 201
+
+
+async def read_all(client, headers, **params):
+    contents, cursor = [], None
+    while True:
+        query = {**params, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/api/v1/conversations/", params=query, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        contents.extend(item["content"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return contents
+
+
+@pytest.mark.asyncio
+async def test_keyset_pagination_visits_every_message_once(client, user):
+    _, headers = user
+    await post_messages(client, headers, 7)
+    expected = [f"message {i}" for i in range(7)]
+
+    assert await read_all(client, headers, limit=3, order="asc") == expected
+    assert await read_all(client, headers, limit=3) == expected[::-1]
+    assert await read_all(client, headers, limit=7) == expected[::-1]
+
+
+@pytest.mark.asyncio
+async def test_metadata_is_opt_in(client, user):
+    _, headers = user
+    await post_messages(client, headers, 1)
+
+    plain = (await client.get("/api/v1/conversations/", headers=headers)).json()
+    full = (await client.get("/api/v1/conversations/", params={"include_metadata": True}, headers=headers)).json()
+
+    assert plain["items"][0]["message_metadata"] is None
+    assert full["items"][0]["message_metadata"] == {"i": 0}
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_is_rejected(client, user):
+    _, headers = user
+
+    response = await client.get("/api/v1/conversations/", params={"cursor": "garbage"}, headers=headers)
+
+    assert response.status_code == 400
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+import uuid
+
+import pytest
+from sqlalchemy import delete, insert, select, text
+
+from app.core.database import AsyncSessionLocal
+from app.models.price_observation import PriceObservation
+from app.services.market_data.observations import MAINTENANCE_LOCK, PriceObservationStore
+
+
+def make_store():
+    return PriceObservationStore(
+        interval=60,
+        lookback=timedelta(hours=1),
+        retention_days=30,
+        rollup_retention_days={},
+        partitions_ahead=1,
+    )
+
+
+async def partition_of(symbol):
+    async with AsyncSessionLocal() as session:
+        return (await session.execute(
+            select(text("tableoid::regclass::text")).select_from(PriceObservation).where(PriceObservation.symbol == symbol)
+        )).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_partitions_take_over_rows_from_the_default_partition():
+    symbol = f"T{uuid.uuid4().hex[:8].upper()}"
+    # Far enough back that no other test or maintenance run has created its partition
+    observed_at = datetime.now(timezone.utc) - timedelta(days=20)
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(PriceObservation).values(symbol=symbol, observed_at=observed_at, price=1))
+        await session.commit()
+
+    try:
+        assert await partition_of(symbol) == "price_observations_default"
+        created = await make_store().ensure_partitions()
+
+        name = f"price_observations_p{observed_at:%Y%m%d}"
+        assert name in created
+        assert await partition_of(symbol) == name
+    finally:
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(PriceObservation).where(PriceObservation.symbol == symbol))
+            await session.execute(text(f"DROP TABLE IF EXISTS price_observations_p{observed_at:%Y%m%d}"))
+            await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_maintenance_skips_while_another_worker_holds_the_lock():
+    store = make_store()
+    async with AsyncSessionLocal() as other_worker:
+        assert (await other_worker.execute(MAINTENANCE_LOCK)).scalar()
+        assert await store.maintain() is None
+
+    assert (await store.maintain())["dropped"] == []
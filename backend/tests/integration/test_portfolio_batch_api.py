@@ -0,0 +1,31 @@
+import pytest
+
+PORTFOLIO_URL = "/api/v1/portfolio/"
+
+
+@pytest.mark.asyncio
+async def test_batch_normalizes_symbols(client, user):
+    _, headers = user
+    batch = {"upsert": [{"symbol": " aapl ", "quantity": "10", "average_price": "150"}]}
+
+    response = await client.patch(PORTFOLIO_URL, json=batch, headers=headers)
+    assert response.status_code == 200
+    assert [position["symbol"] for position in response.json()["created"]] == ["AAPL"]
+
+    # The same symbol in another case overwrites rather than adding a second position
+    batch = {"upsert": [{"symbol": "Aapl", "quantity": "5", "average_price": "160"}]}
+    response = await client.patch(PORTFOLIO_URL, json=batch, headers=headers)
+    assert [position["symbol"] for position in response.json()["updated"]] == ["AAPL"]
+
+    response = await client.patch(PORTFOLIO_URL, json={"delete": ["aapl"]}, headers=headers)
+    assert response.json()["deleted"] == ["AAPL"]
+    assert (await client.get(PORTFOLIO_URL, headers=headers)).json() == []
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_blank_symbols(client, user):
+    _, headers = user
+
+    response = await client.patch(PORTFOLIO_URL, json={"delete": ["  "]}, headers=headers)
+
+    assert response.status_code == 422
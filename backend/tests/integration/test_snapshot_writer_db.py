@@ -0,0 +1,37 @@
+import uuid
+
+import pytest
+from sqlalchemy import delete, select
+
+from app.core.database import AsyncSessionLocal
+from app.models.market_data import MarketData
+from app.services.market_data.snapshot_writer import MarketSnapshotWriter
+
+
+def quote(symbol, change_percent=1.0):
+    return {"symbol": symbol, "current_price": 100.0, "volume": 1000, "change_percent": change_percent}
+
+
+@pytest.mark.asyncio
+async def test_rejected_rows_do_not_block_the_flush():
+    prefix = f"T{uuid.uuid4().hex[:8].upper()}"
+    good = [f"{prefix}{i}" for i in range(5)]
+    # Longer than market_data.symbol (20 characters): the database rejects just this row
+    bad = f"{prefix}-TOO-LONG-FOR-THE-COLUMN"
+    writer = MarketSnapshotWriter(interval=60, max_pending=100, chunk_size=4)
+    writer.record([quote(good[0], change_percent=1500.0), *map(quote, good[1:3]), quote(bad), *map(quote, good[3:])], "test")
+
+    try:
+        assert await writer.flush() == 5
+        assert len(writer) == 0
+        assert writer.stats.rows_rejected == 1
+        async with AsyncSessionLocal() as session:
+            stored = dict((await session.execute(
+                select(MarketData.symbol, MarketData.change_percent).where(MarketData.symbol.like(f"{prefix}%"))
+            )).all())
+        assert sorted(stored) == good
+        assert float(stored[good[0]]) == 999.99
+    finally:
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(MarketData).where(MarketData.symbol.like(f"{prefix}%")))
+            await session.commit()
@@ -0,0 +1,60 @@
+import pytest
+
+IMPORT_URL = "/api/v1/transactions/import"
+
+
+@pytest.mark.asyncio
+async def test_import_rebuilds_portfolio(client, user):
+    _, headers = user
+    body = (
+        "date,ticker,side,qty,price\n"
+        "2024-01-02,aapl,buy,10,100\n"
+        "2024-01-03,AAPL,buy,10,200\n"
+        "2024-01-04,AAPL,sell,5,210\n"
+        "2024-01-05,MSFT,buy,1,300\n"
+    )
+
+    response = await client.post(IMPORT_URL, content=body, headers={**headers, "Content-Type": "text/csv"})
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == 4
+    assert report["symbols"] == 2
+
+    positions = (await client.get("/api/v1/portfolio/", headers=headers)).json()
+    by_symbol = {position["symbol"]: position for position in positions}
+    assert set(by_symbol) == {"AAPL", "MSFT"}
+    assert float(by_symbol["AAPL"]["quantity"]) == 15
+    assert float(by_symbol["AAPL"]["average_price"]) == 150
+
+
+@pytest.mark.asyncio
+async def test_invalid_rows_import_nothing(client, user):
+    _, headers = user
+    body = (
+        "symbol,transaction_type,quantity,price,transaction_date\n"
+        "AAPL,buy,10,100,2024-01-02\n"
+        "\n"
+        "AAPL,hold,10,100,2024-01-03\n"
+        "AAPL,buy,10\n"
+    )
+
+    response = await client.post(IMPORT_URL, content=body, headers={**headers, "Content-Type": "text/csv"})
+
+    assert response.status_code == 422
+    errors = response.json()["detail"]["errors"]
+    assert [(error["line"], error["fields"]) for error in errors] == [
+        (4, ["transaction_type"]),
+        (5, ["columns"]),
+    ]
+    assert (await client.get("/api/v1/portfolio/", headers=headers)).json() == []
+
+
+@pytest.mark.asyncio
+async def test_missing_column_is_reported(client, user):
+    _, headers = user
+
+    response = await client.post(IMPORT_URL, content="symbol,quantity\nAAPL,1\n", headers=headers)
+
+    assert response.status_code == 422
+    assert response.json()["detail"]["message"].startswith("Missing column: transaction_type")
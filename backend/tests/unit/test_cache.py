@@ -0,0 +1,66 @@
+import pytest
+
+from app.core.cache import MISSING, TieredCache, TTLCache
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(max_entries=10, default_ttl=5)
+
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    now[0] += 5
+    assert cache.get("a") is MISSING
+    assert cache.stats.expirations == 1
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, default_ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats.evictions == 1
+
+
+def test_ttl_cache_ignores_non_positive_ttl():
+    cache = TTLCache(max_entries=2, default_ttl=60)
+    cache.set("a", 1, ttl=0)
+    assert cache.get("a") is MISSING
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_loads_once_then_hits_local():
+    cache = TieredCache(TTLCache(max_entries=10, default_ttl=60))
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        return {"price": 1}
+
+    assert await cache.get_or_load("k", loader, ttl=60) == {"price": 1}
+    assert await cache.get_or_load("k", loader, ttl=60) == {"price": 1}
+    assert calls == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.local_hits == 1
+
+    await cache.invalidate("k")
+    await cache.get_or_load("k", loader, ttl=60)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_get_many_and_set_many():
+    cache = TieredCache(TTLCache(max_entries=10, default_ttl=60))
+    await cache.set_many({"a": 1, "b": 2}, ttl=60)
+
+    assert await cache.get_many(["a", "b", "c"], ttl=60) == {"a": 1, "b": 2}
+    assert cache.stats.local_hits == 2
+    assert cache.stats.misses == 1
@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.endpoints.conversations import _decode_cursor, _encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    conversation_id = uuid.uuid4()
+
+    cursor = _encode_cursor(created_at, conversation_id)
+
+    assert "=" not in cursor
+    assert _decode_cursor(cursor) == (created_at, conversation_id)
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bm90IGpzb24", "WyJ4IiwgInkiXQ", "WzFd"])
+def test_invalid_cursor_is_a_bad_request(cursor):
+    with pytest.raises(HTTPException) as excinfo:
+        _decode_cursor(cursor)
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,37 @@
+import pytest
+
+from app.services.market_data.base import MarketDataError, MarketDataThrottled
+from app.services.market_data.fake import FakeMarketDataProvider
+
+
+@pytest.mark.asyncio
+async def test_fake_provider_is_deterministic():
+    provider = FakeMarketDataProvider()
+
+    first = await provider.get_history("AAPL", period="1mo")
+    second = await provider.get_history("aapl", period="1mo")
+
+    assert not first.empty
+    assert first["Close"].equals(second["Close"])
+    assert provider.calls["get_history"] == 2
+
+
+@pytest.mark.asyncio
+async def test_fake_provider_failing_symbols():
+    provider = FakeMarketDataProvider(failing_symbols=["BAD"])
+
+    with pytest.raises(MarketDataError):
+        await provider.get_info("bad")
+    frame = await provider.download(["AAPL", "BAD"])
+    assert set(frame.columns.get_level_values(1)) == {"AAPL"}
+
+
+@pytest.mark.asyncio
+async def test_fake_provider_throttles_beyond_rate_limit():
+    provider = FakeMarketDataProvider(rate_limit=2)
+
+    await provider.get_info("AAPL")
+    await provider.get_info("AAPL")
+    with pytest.raises(MarketDataThrottled):
+        await provider.get_info("AAPL")
+    assert provider.calls["throttled"] == 1
@@ -0,0 +1,65 @@
+import pytest
+
+from app.core.cache import TieredCache, TTLCache
+from app.core.singleflight import SingleFlight
+from app.services.market_data.fake import FakeMarketDataProvider
+from app.services.market_data.service import MarketDataService
+
+
+def make_service():
+    provider = FakeMarketDataProvider()
+    return MarketDataService(provider, TieredCache(TTLCache(max_entries=100, default_ttl=60), flights=SingleFlight()))
+
+
+@pytest.mark.asyncio
+async def test_batch_quotes_fill_the_single_quote_cache():
+    service = make_service()
+
+    quotes, errors = await service.get_quotes(["aapl", "MSFT"])
+    quote = await service.get_quote("AAPL")
+
+    assert errors == {}
+    assert quote == quotes["AAPL"]
+    assert quote["name"] == "AAPL"
+    assert quote["market_cap"] is None
+    assert service.provider.calls["download"] == 1
+    assert service.provider.calls["get_info"] == 0
+
+
+@pytest.mark.asyncio
+async def test_single_quotes_serve_batches_with_the_same_shape():
+    service = make_service()
+
+    quote = await service.get_quote("AAPL")
+    quotes, _ = await service.get_quotes(["AAPL", "MSFT"])
+
+    assert quotes["AAPL"] == quote
+    assert quote["name"] == "AAPL Holdings"
+    assert quotes["MSFT"].keys() == quote.keys()
+    # MSFT was downloaded alone; AAPL came from the cache
+    assert service.provider.calls["download"] == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_quotes_reuse_cached_info():
+    service = make_service()
+    await service.get_info("MSFT")
+
+    quotes, _ = await service.get_quotes(["MSFT"])
+
+    assert quotes["MSFT"]["name"] == "MSFT Holdings"
+    assert quotes["MSFT"]["market_cap"] is not None
+
+
+@pytest.mark.asyncio
+async def test_max_age_refetches_stale_quotes_and_updates_the_cache():
+    service = make_service()
+    first = await service.get_quote("AAPL")
+
+    assert await service.get_quote("AAPL", max_age=60) is first
+    assert service.provider.calls["get_history"] == 1
+
+    fresh = await service.get_quote("AAPL", max_age=0)
+    assert fresh is not first
+    assert service.provider.calls["get_history"] == 2
+    assert await service.get_quote("AAPL") is fresh
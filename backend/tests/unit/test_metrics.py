@@ -0,0 +1,34 @@
+from prometheus_client import CollectorRegistry, generate_latest
+
+from app.core.metrics import StatsCollector
+
+
+def scrape(collector):
+    registry = CollectorRegistry()
+    registry.register(collector)
+    return generate_latest(registry).decode()
+
+
+def test_stats_collector_exports_totals_as_counters():
+    collector = StatsCollector("cache", lambda: {"hits": 3, "entries": 7, "last": None}, counters=("hits",))
+
+    types = {family.name: family.type for family in collector.collect()}
+    output = scrape(collector)
+
+    assert types == {"cache_hits": "counter", "cache_entries": "gauge"}
+    assert "cache_hits_total 3.0" in output
+    assert "cache_entries 7.0" in output
+
+
+def test_stats_collector_labels_rows():
+    stats = {"interactive": {"granted": 2}, "background": {"granted": 5}}
+    collector = StatsCollector("scheduler", lambda: stats, label="priority", counters=("granted",))
+
+    output = scrape(collector)
+
+    assert 'scheduler_granted_total{priority="interactive"} 2.0' in output
+    assert 'scheduler_granted_total{priority="background"} 5.0' in output
+
+
+def test_stats_collector_skips_missing_component():
+    assert scrape(StatsCollector("cache", lambda: None)) == ""
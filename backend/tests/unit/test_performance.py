@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from app.services.analytics.performance import Closes, Transactions, reconstruct, summarize, xirr
+
+
+def days(*offsets):
+    return np.datetime64("2024-01-01") + np.array(offsets, dtype="timedelta64[D]")
+
+
+def make_transactions():
+    # Buy 10 @ 100 on day 0, add 10 @ 110 on day 2
+    return Transactions(days(0, 2), np.array(["AAPL", "AAPL"]), np.array([10.0, 10.0]), np.array([100.0, 110.0]))
+
+
+def make_closes():
+    return Closes(days(1, 2, 3), np.array(["AAPL"] * 3), np.array([110.0, 110.0, 121.0]), {})
+
+
+def test_twr_ignores_cash_flows():
+    series = reconstruct(make_transactions(), make_closes(), days(0)[0])
+
+    assert series.value.tolist() == [1000.0, 1100.0, 2200.0, 2420.0]
+    assert series.flows.tolist() == [1000.0, 0.0, 1100.0, 0.0]
+    assert series.wealth[-1] == pytest.approx(1.21)
+    assert series.drawdown.min() == 0.0
+
+
+def test_incremental_rebuild_matches_full_rebuild():
+    full = reconstruct(make_transactions(), make_closes(), days(0)[0])
+    start = days(2)[0]
+    closes = Closes(days(2, 3), np.array(["AAPL"] * 2), np.array([110.0, 121.0]), {"AAPL": 110.0})
+
+    incremental = reconstruct(make_transactions(), closes, start, prefix=full.before(start))
+
+    assert incremental.dates.tolist() == full.dates.tolist()
+    np.testing.assert_allclose(incremental.wealth, full.wealth)
+    np.testing.assert_allclose(incremental.value, full.value)
+
+
+def test_drawdown_tracks_peak():
+    transactions = Transactions(days(0), np.array(["AAPL"]), np.array([1.0]), np.array([100.0]))
+    closes = Closes(days(1, 2, 3), np.array(["AAPL"] * 3), np.array([120.0, 90.0, 108.0]), {})
+
+    series = reconstruct(transactions, closes, days(0)[0])
+
+    assert series.drawdown.min() == pytest.approx(-0.25)
+    assert series.drawdown[-1] == pytest.approx(-0.1)
+
+
+def test_xirr_of_one_year_round_trip():
+    dates = np.array(["2023-01-01", "2024-01-01"], dtype="datetime64[D]")
+
+    assert xirr(dates, np.array([-100.0, 110.0])) == pytest.approx(0.10, abs=1e-3)
+    assert xirr(dates, np.array([-100.0, 50.0])) == pytest.approx(-0.5, abs=1e-3)
+
+
+def test_xirr_needs_a_sign_change():
+    dates = np.array(["2023-01-01", "2024-01-01"], dtype="datetime64[D]")
+
+    assert xirr(dates, np.array([-100.0, -10.0])) is None
+    assert xirr(dates[:1], np.array([-100.0])) is None
+
+
+def test_summarize_annualizes_only_a_year_or_more():
+    short = summarize(reconstruct(make_transactions(), make_closes(), days(0)[0]))
+    assert short["twr"] == pytest.approx(0.21)
+    assert short["twr_annualized"] is None
+    assert short["net_invested"] == 2100.0
+    assert short["current_value"] == 2420.0
+
+    transactions = Transactions(days(0), np.array(["AAPL"]), np.array([1.0]), np.array([100.0]))
+    closes = Closes(days(365), np.array(["AAPL"]), np.array([110.0]), {})
+    year = summarize(reconstruct(transactions, closes, days(0)[0]))
+    assert year["twr_annualized"] == pytest.approx(0.10)
+    assert year["xirr"] == pytest.approx(0.10, abs=1e-3)
+
+
+def test_summarize_empty_series():
+    series = reconstruct(Transactions.empty(), make_closes(), days(0)[0])
+
+    assert summarize(series)["twr"] is None
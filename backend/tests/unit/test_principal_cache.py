@@ -0,0 +1,122 @@
+import uuid
+
+import pytest
+
+from app.core.cache import RedisCache, TieredCache, TTLCache
+from app.core.principal_cache import PrincipalCache
+from app.core.singleflight import SingleFlight
+from app.models.user import RiskTolerance, User
+
+
+def make_user(email):
+    return User(user_id=uuid.uuid4(), email=email, risk_tolerance=RiskTolerance.MEDIUM, is_active=True)
+
+
+class MemoryRemote(RedisCache):
+    """Redis tier backed by a dict, shared between caches like workers share Redis"""
+
+    def __init__(self):
+        super().__init__("redis://unused")
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key), 0.0
+
+    async def set(self, key, value, ttl):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+def make_principal_cache(ttl=30, remote=None):
+    local_ttl = 0 if remote is not None else None
+    return PrincipalCache(
+        ttl,
+        TieredCache(TTLCache(max_entries=10, default_ttl=ttl), remote, flights=SingleFlight(), local_ttl=local_ttl),
+    )
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_serves_fresh_instances():
+    cache = make_principal_cache()
+    user = make_user("a@example.com")
+    loads = 0
+
+    async def loader():
+        nonlocal loads
+        loads += 1
+        return user
+
+    first = await cache.get_user("a@example.com", loader)
+    second = await cache.get_user("a@example.com", loader)
+
+    assert loads == 1
+    assert first is not second
+    assert first.user_id == second.user_id == user.user_id
+    assert second.risk_tolerance is RiskTolerance.MEDIUM
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_invalidate_reloads():
+    cache = make_principal_cache()
+    user = make_user("a@example.com")
+
+    async def loader():
+        return user
+
+    await cache.get_user(user.email, loader)
+    user.is_active = False
+    assert (await cache.get_user(user.email, loader)).is_active is True
+
+    await cache.invalidate(user.email)
+    assert (await cache.get_user(user.email, loader)).is_active is False
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_caches_unknown_users_and_can_be_disabled():
+    cache = make_principal_cache()
+    loads = 0
+
+    async def loader():
+        nonlocal loads
+        loads += 1
+        return None
+
+    assert await cache.get_user("ghost@example.com", loader) is None
+    assert await cache.get_user("ghost@example.com", loader) is None
+    assert loads == 1
+
+    disabled = make_principal_cache(ttl=0)
+    await disabled.get_user("ghost@example.com", loader)
+    await disabled.get_user("ghost@example.com", loader)
+    assert loads == 3
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_keys_on_the_exact_email():
+    cache = make_principal_cache()
+    users = {email: make_user(email) for email in ("Alice@example.com", "alice@example.com")}
+
+    for email in users:
+        async def loader(email=email):
+            return users[email]
+
+        loaded = await cache.get_user(email, loader)
+        assert loaded.user_id == users[email].user_id
+
+
+@pytest.mark.asyncio
+async def test_principal_invalidation_reaches_other_workers_through_redis():
+    remote = MemoryRemote()
+    worker, other = make_principal_cache(remote=remote), make_principal_cache(remote=remote)
+    user = make_user("a@example.com")
+
+    async def loader():
+        return user
+
+    await worker.get_user(user.email, loader)
+    user.is_active = False
+    await other.invalidate(user.email)
+
+    assert (await worker.get_user(user.email, loader)).is_active is False
@@ -0,0 +1,153 @@
+from datetime import timedelta
+
+import pytest
+
+from app.core.rate_limit import MemoryBucketStore, RateLimiter, RateLimitMiddleware, RouteCosts, _take
+from app.utils.security import create_access_token
+
+
+def test_take_refills_up_to_capacity():
+    tokens, decision = _take(0.0, 10.0, capacity=5, rate=1, cost=1)
+    assert (tokens, decision) == (4.0, (True, 4.0, 0.0))
+
+    tokens, decision = _take(0.5, 0.0, capacity=5, rate=2, cost=1)
+    assert tokens == 0.5
+    assert decision == (False, 0.5, 0.25)
+
+
+@pytest.mark.asyncio
+async def test_memory_store_bursts_then_refills(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.core.rate_limit.time.monotonic", lambda: now[0])
+    store = MemoryBucketStore(max_keys=10)
+
+    for _ in range(3):
+        assert (await store.take("k", 1, capacity=3, rate=1))[0]
+    allowed, remaining, retry_after = await store.take("k", 1, capacity=3, rate=1)
+    assert not allowed and remaining == 0 and retry_after == 1
+
+    now[0] += 1
+    assert (await store.take("k", 1, capacity=3, rate=1))[0]
+
+
+@pytest.mark.asyncio
+async def test_memory_store_evicts_least_recently_used():
+    store = MemoryBucketStore(max_keys=2)
+    await store.take("a", 1, capacity=1, rate=0.001)
+    await store.take("b", 1, capacity=1, rate=0.001)
+    await store.take("a", 1, capacity=1, rate=0.001)
+    await store.take("c", 1, capacity=1, rate=0.001)
+
+    assert len(store) == 2
+    # "b" was evicted and starts with a full bucket again
+    assert (await store.take("b", 1, capacity=1, rate=0.001))[0]
+
+
+def test_route_costs_longest_prefix_and_condition_win():
+    costs = RouteCosts({
+        "/api/v1/market/": 2,
+        "/api/v1/market/history/": 5,
+        "/api/v1/market/history/?period=max": 20,
+    })
+
+    assert costs.cost("/api/v1/auth/login") == 1.0
+    assert costs.cost("/api/v1/market/quote/AAPL") == 2
+    assert costs.cost("/api/v1/market/history/AAPL", b"period=1y") == 5
+    assert costs.cost("/api/v1/market/history/AAPL", b"interval=1d&period=max") == 20
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def request(app, path="/api/v1/portfolios/", token=None, client="10.0.0.1"):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": b"",
+        "headers": headers,
+        "client": (client, 1234),
+    }
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, None, send)
+    return messages[0]["status"], dict(messages[0]["headers"])
+
+
+def make_middleware(requests=2, ip_requests=None):
+    limiter = RateLimiter(MemoryBucketStore(100), requests, 60, RouteCosts({}), ip_requests=ip_requests)
+    return RateLimitMiddleware(ok_app, limiter)
+
+
+def token_for(email):
+    return create_access_token({"sub": email}, expires_delta=timedelta(minutes=5))
+
+
+@pytest.mark.asyncio
+async def test_middleware_rejects_with_retry_after():
+    app = make_middleware(requests=2)
+
+    assert (await request(app))[0] == 200
+    status, headers = await request(app)
+    assert status == 200
+    assert headers[b"x-ratelimit-limit"] == b"2"
+    assert headers[b"x-ratelimit-remaining"] == b"0"
+
+    status, headers = await request(app)
+    assert status == 429
+    assert headers[b"retry-after"] == b"30"
+
+
+@pytest.mark.asyncio
+async def test_middleware_charges_user_and_address():
+    app = make_middleware(requests=2, ip_requests=3)
+
+    # Rotating accounts from one address share the address bucket
+    statuses = [(await request(app, token=token_for(f"user{i}@example.com")))[0] for i in range(4)]
+    assert statuses == [200, 200, 200, 429]
+
+    # One account spread over many addresses is held to its own bucket
+    token = token_for("roamer@example.com")
+    statuses = [(await request(app, token=token, client=f"10.0.1.{i}"))[0] for i in range(3)]
+    assert statuses == [200, 200, 429]
+
+
+@pytest.mark.asyncio
+async def test_middleware_refunds_the_user_when_the_address_rejects():
+    app = make_middleware(requests=2, ip_requests=1)
+    token = token_for("commuter@example.com")
+
+    assert (await request(app, token=token))[0] == 200
+    status, headers = await request(app, token=token)
+    assert status == 429
+    assert headers[b"x-ratelimit-limit"] == b"1"
+
+    # The rejected request did not spend the user's second token
+    assert (await request(app, token=token, client="10.0.0.2"))[0] == 200
+    assert (await request(app, token=token, client="10.0.0.3"))[0] == 429
+
+
+@pytest.mark.asyncio
+async def test_memory_store_refund_is_capped_at_capacity():
+    store = MemoryBucketStore(max_keys=10)
+    await store.take("k", 1, capacity=2, rate=0.001)
+    await store.refund("k", 5, capacity=2)
+    await store.refund("unknown", 1, capacity=2)
+
+    assert (await store.take("k", 2, capacity=2, rate=0.001))[0]
+    assert len(store) == 1
+
+
+@pytest.mark.asyncio
+async def test_middleware_skips_excluded_paths():
+    app = make_middleware(requests=1)
+
+    for _ in range(3):
+        assert (await request(app, path="/health"))[0] == 200
+    assert (await request(app))[0] == 200
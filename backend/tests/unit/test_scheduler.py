@@ -0,0 +1,198 @@
+import asyncio
+
+import pytest
+
+import app.services.market_data as market_data
+from app.services.market_data.base import MarketDataThrottled, MarketDataTimeout, MarketDataUnavailable
+from app.services.market_data.fake import FakeMarketDataProvider
+from app.services.market_data.scheduler import ScheduledProvider, UpstreamScheduler
+from app.services.market_data.upstream_context import Priority, set_upstream_context, upstream_priority
+from app.services.market_data.upstream_flight import UpstreamSingleFlight
+
+
+def make_scheduler(rate=20.0, burst=1, limit=10, timeout=5.0, **kwargs):
+    return UpstreamScheduler(
+        rate=rate,
+        burst=burst,
+        queue_limits={priority: limit for priority in Priority},
+        queue_timeouts={priority: timeout for priority in Priority},
+        **kwargs,
+    )
+
+
+async def gone():
+    return True
+
+
+async def here():
+    return False
+
+
+@pytest.mark.asyncio
+async def test_scheduler_serves_higher_priority_first():
+    scheduler = make_scheduler()
+    order = []
+
+    async def call(priority):
+        await scheduler.acquire(priority)
+        order.append(priority)
+
+    await scheduler.acquire(Priority.INTERACTIVE)  # spends the only token
+    tasks = []
+    for priority in (Priority.BACKGROUND, Priority.HISTORY, Priority.INTERACTIVE):
+        tasks.append(asyncio.create_task(call(priority)))
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    await scheduler.close()
+
+    assert order == [Priority.INTERACTIVE, Priority.HISTORY, Priority.BACKGROUND]
+    assert scheduler.stats.granted[Priority.INTERACTIVE] == 2
+
+
+@pytest.mark.asyncio
+async def test_scheduler_rejects_when_queue_is_full():
+    scheduler = make_scheduler(limit=1)
+    await scheduler.acquire(Priority.BACKGROUND)
+    queued = asyncio.create_task(scheduler.acquire(Priority.BACKGROUND))
+    await asyncio.sleep(0)
+
+    with pytest.raises(MarketDataUnavailable):
+        await scheduler.acquire(Priority.BACKGROUND)
+    assert scheduler.stats.shed[Priority.BACKGROUND] == {"queue_full": 1}
+    await queued
+    await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_times_out_at_deadline():
+    scheduler = make_scheduler(rate=0.5)
+    await scheduler.acquire(Priority.INTERACTIVE)
+    deadline = asyncio.get_running_loop().time() + 0.05
+
+    with pytest.raises(MarketDataTimeout):
+        await scheduler.acquire(Priority.INTERACTIVE, deadline=deadline)
+    assert scheduler.stats.shed[Priority.INTERACTIVE] == {"deadline": 1}
+    assert scheduler.queue_depths()["interactive"] == 0
+    await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_drops_disconnected_waiters():
+    scheduler = make_scheduler()
+    await scheduler.acquire(Priority.INTERACTIVE)
+
+    with pytest.raises(MarketDataUnavailable):
+        await scheduler.acquire(Priority.INTERACTIVE, disconnected=gone)
+    # The dropped waiter did not spend the token
+    await scheduler.acquire(Priority.INTERACTIVE, disconnected=here)
+    assert scheduler.stats.shed[Priority.INTERACTIVE] == {"disconnected": 1}
+    assert scheduler.stats.granted[Priority.INTERACTIVE] == 2
+    await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_scheduled_provider_retries_throttled_calls():
+    scheduler = make_scheduler(rate=1000.0, burst=10, backoff_base=0.1, backoff_max=0.1)
+    upstream = FakeMarketDataProvider(rate_limit=20)
+    provider = ScheduledProvider(upstream, scheduler, retries=3)
+
+    for _ in range(20):
+        await provider.get_info("AAPL")
+    info = await provider.get_info("AAPL")
+
+    assert info["symbol"] == "AAPL"
+    assert upstream.calls["throttled"] >= 1
+    assert scheduler.stats.retries[Priority.INTERACTIVE] == upstream.calls["throttled"]
+    await provider.close()
+
+
+@pytest.mark.asyncio
+async def test_scheduled_provider_gives_up_after_retries():
+    scheduler = make_scheduler(rate=1000.0, burst=10, backoff_base=0.001, backoff_max=0.001)
+    upstream = FakeMarketDataProvider(rate_limit=0.001)
+    provider = ScheduledProvider(upstream, scheduler, retries=1)
+
+    await provider.get_info("AAPL")
+    with pytest.raises(MarketDataThrottled):
+        await provider.get_info("AAPL")
+    assert upstream.calls["throttled"] == 2
+    await provider.close()
+
+
+@pytest.mark.asyncio
+async def test_single_flight_runs_at_highest_waiter_priority():
+    scheduler = make_scheduler(rate=10.0)
+    provider = ScheduledProvider(FakeMarketDataProvider(), scheduler)
+    flights = UpstreamSingleFlight()
+    await scheduler.acquire(Priority.INTERACTIVE)
+
+    async def caller(priority):
+        with upstream_priority(priority):
+            return await flights.do("AAPL", lambda: provider.get_info("AAPL"))
+
+    background = asyncio.create_task(caller(Priority.BACKGROUND))
+    await asyncio.sleep(0.01)
+    assert scheduler.queue_depths()["background"] == 1
+    interactive = asyncio.create_task(caller(Priority.INTERACTIVE))
+    await asyncio.sleep(0)
+
+    assert scheduler.queue_depths() == {"interactive": 1, "history": 0, "background": 0}
+    assert (await background) == (await interactive)
+    assert scheduler.stats.granted[Priority.INTERACTIVE] == 2
+    await provider.close()
+
+
+@pytest.mark.asyncio
+async def test_single_flight_deadline_is_per_waiter():
+    flights = UpstreamSingleFlight()
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        return "quote"
+
+    async def caller(timeout):
+        set_upstream_context(deadline=asyncio.get_running_loop().time() + timeout)
+        return await flights.do("k", load)
+
+    impatient = asyncio.create_task(caller(0.01))
+    patient = asyncio.create_task(caller(5.0))
+    with pytest.raises(MarketDataTimeout):
+        await impatient
+    release.set()
+
+    assert await patient == "quote"
+
+
+@pytest.mark.asyncio
+async def test_single_flight_dropped_only_when_every_caller_is_gone():
+    scheduler = make_scheduler()
+    provider = ScheduledProvider(FakeMarketDataProvider(), scheduler)
+    flights = UpstreamSingleFlight()
+    await scheduler.acquire(Priority.INTERACTIVE)
+
+    async def caller(disconnected):
+        set_upstream_context(disconnected=disconnected)
+        return await flights.do("AAPL", lambda: provider.get_info("AAPL"))
+
+    left = asyncio.create_task(caller(gone))
+    stayed = asyncio.create_task(caller(here))
+    assert (await left)["symbol"] == (await stayed)["symbol"] == "AAPL"
+
+    await scheduler.acquire(Priority.INTERACTIVE)
+    with pytest.raises(MarketDataUnavailable):
+        await asyncio.gather(caller(gone), caller(gone))
+    await provider.close()
+
+
+def test_queue_depth_metric_reads_the_active_scheduler(monkeypatch):
+    active = make_scheduler()
+    monkeypatch.setattr(market_data, "_provider", ScheduledProvider(FakeMarketDataProvider(), active))
+    active._queues[Priority.BACKGROUND].append(object())
+
+    # A scheduler built later (another worker's test, a script) does not take over the metric
+    make_scheduler()
+
+    stats = market_data._upstream_queue_stats()
+    assert stats["background"] == {"queue_depth": 1}
+    assert stats["interactive"] == {"queue_depth": 0}
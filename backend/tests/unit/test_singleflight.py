@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from app.core.cache import TieredCache, TTLCache
+from app.core.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_coalesces_concurrent_misses():
+    cache = TieredCache(TTLCache(max_entries=10, default_ttl=60), flights=SingleFlight())
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(cache.get_or_load("k", loader, ttl=60) for _ in range(5)))
+
+    assert results == [1] * 5
+    assert calls == 1
+    assert cache.flights.coalesced == 4
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_exceptions_and_forgets_key():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(flights.do("k", fail), flights.do("k", fail), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flights.executions == 1
+    assert flights.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_cancelled_caller():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(flights.do("k", load))
+    second = asyncio.create_task(flights.do("k", load))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
@@ -0,0 +1,50 @@
+import pytest
+
+from app.services.market_data.snapshot_writer import MAX_CHANGE_PERCENT, MarketSnapshotWriter
+
+
+def quote(symbol, price=100.0, change_percent=1.0):
+    return {
+        "symbol": symbol,
+        "current_price": price,
+        "volume": 1000,
+        "change_percent": change_percent,
+        "last_updated": "2024-01-02T15:00:00+00:00",
+    }
+
+
+def database_down():
+    raise OSError("database unavailable")
+
+
+def test_record_clamps_change_percent_and_rejects_unusable_prices():
+    writer = MarketSnapshotWriter(interval=60, max_pending=100)
+
+    writer.record(
+        [quote("UP", change_percent=2500.0), quote("NAN", change_percent=float("nan")), quote("BAD", price=float("inf"))],
+        "fake",
+    )
+
+    assert writer._pending["UP"][0]["change_percent"] == MAX_CHANGE_PERCENT
+    assert writer._pending["NAN"][0]["change_percent"] is None
+    assert "BAD" not in writer._pending
+    assert writer.stats.rows_rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_newer_quotes_and_bounds_the_buffers():
+    writer = MarketSnapshotWriter(
+        interval=60, max_pending=2, observations=True, session_factory=database_down, max_buffered=3, max_observations=3
+    )
+    writer.record([quote("A"), quote("B")], "fake")
+
+    with pytest.raises(OSError):
+        await writer.flush()
+    writer.record([quote("B", price=101.0), quote("C"), quote("D")], "fake")
+
+    assert list(writer._pending) == ["B", "C", "D"]
+    assert writer._pending["B"][0]["price"] == 101.0
+    assert writer.stats.rows_dropped == 1
+    assert len(writer._observations) == 3
+    assert writer.stats.observations_dropped == 1
+    assert writer.stats.failures == 1
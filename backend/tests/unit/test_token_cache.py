@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+import pytest
+
+from app.core.cache import MISSING
+from app.utils import security
+from app.utils.security import create_access_token, verify_token
+
+
+@pytest.fixture(autouse=True)
+def clear_verified_tokens():
+    security.verified_tokens.clear()
+    yield
+    security.verified_tokens.clear()
+
+
+def test_verify_token_caches_payload_until_exp(monkeypatch):
+    token = create_access_token({"sub": "a@example.com"}, expires_delta=timedelta(minutes=5))
+    assert verify_token(token)["sub"] == "a@example.com"
+    assert len(security.verified_tokens) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached token decoded again")
+
+    monkeypatch.setattr(security.jwt, "decode", fail)
+    payload = verify_token(token)
+    payload["sub"] = "mallory@example.com"
+    assert verify_token(token)["sub"] == "a@example.com"
+
+
+def test_verify_token_does_not_cache_expired_or_invalid_tokens():
+    expired = create_access_token({"sub": "a@example.com"}, expires_delta=timedelta(seconds=-1))
+    assert verify_token(expired) is None
+    assert verify_token("not-a-token") is None
+    assert len(security.verified_tokens) == 0
+
+
+def test_verified_token_entry_expires_with_token(monkeypatch):
+    token = create_access_token({"sub": "a@example.com"}, expires_delta=timedelta(minutes=5))
+    verify_token(token)
+    (key,) = list(security.verified_tokens._data)
+    expires_at, _ = security.verified_tokens._data[key]
+
+    now = security.time.monotonic()
+    assert 290 < expires_at - now <= 300
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: expires_at)
+    assert security.verified_tokens.get(key) is MISSING
@@ -0,0 +1,62 @@
+import uuid
+
+import pytest
+
+from app.services.transaction_import import ImportValidationError, _resolve_header, iter_lines, validate_chunk
+
+
+async def blocks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(lines):
+    return [line async for line in lines]
+
+
+def test_resolve_header_accepts_aliases_in_any_order():
+    header = ["Date", "Ticker", "notes", "Side", "Qty", "Price"]
+
+    assert _resolve_header(header) == [1, 3, 4, 5, 0]
+
+
+def test_resolve_header_reports_missing_column():
+    with pytest.raises(ImportValidationError, match="Missing column: price"):
+        _resolve_header(["symbol", "type", "quantity", "date"])
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_across_blocks():
+    data = "\ufeffsymbol,price\r\nAAPL,1\r\nMSFT,2".encode()
+    # Split inside a line and inside the multi-byte BOM
+    chunks = [data[:2], data[2:17], data[17:]]
+
+    assert await collect(iter_lines(blocks(*chunks))) == ["symbol,price", "AAPL,1", "MSFT,2"]
+
+
+def test_validate_chunk_normalizes_valid_rows():
+    user_id = uuid.uuid4()
+    rows = [[" aapl ", "Buy", "1,000", "150.25", "2024-01-02"]]
+
+    records, errors = validate_chunk(rows, [2], user_id)
+
+    assert errors == []
+    (record,) = records
+    assert record[1:6] == (user_id, "AAPL", "BUY", "1000", "150.25")
+    assert record[6].isoformat() == "2024-01-02T00:00:00+00:00"
+
+
+def test_validate_chunk_reports_each_bad_field_with_its_line():
+    rows = [
+        ["AAPL", "buy", "10", "100", "2024-01-02"],
+        ["", "hold", "-1", "abc", "yesterday"],
+        ["MSFT", "sell", "5", "-2", "2024-01-03"],
+    ]
+
+    records, errors = validate_chunk(rows, [2, 3, 5], uuid.uuid4())
+
+    assert len(records) == 1
+    assert errors == [
+        {"line": 3, "fields": ["symbol", "transaction_type", "quantity", "price", "transaction_date"], "row": rows[1]},
+        {"line": 5, "fields": ["price"], "row": rows[2]},
+    ]
@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+from app.models.portfolio import Portfolio
+from app.services.valuation import value_portfolio
+
+
+def position(symbol, quantity, average_price):
+    return Portfolio(symbol=symbol, quantity=Decimal(quantity), average_price=Decimal(average_price))
+
+
+def test_value_portfolio_totals_and_unpriced_positions():
+    positions = [position("AAPL", "10", "100"), position("MSFT", "5", "200")]
+    quotes = {"AAPL": {"current_price": 110.123456}}
+
+    result = value_portfolio(positions, quotes, errors={"MSFT": "unavailable"})
+
+    aapl, msft = result["positions"]
+    assert aapl["current_price"] == Decimal("110.1235")
+    assert aapl["current_value"] == Decimal("1101.2346")
+    assert aapl["unrealized_pnl"] == Decimal("101.2346")
+    assert aapl["unrealized_pnl_percent"] == Decimal("10.1235")
+    assert msft["current_price"] is None
+    assert msft["unrealized_pnl"] is None
+
+    assert result["total_cost"] == Decimal("2000.0000")
+    assert result["total_value"] == Decimal("1101.2346")
+    assert result["total_unrealized_pnl"] == Decimal("101.2346")
+    assert result["total_unrealized_pnl_percent"] == Decimal("10.1235")
+    assert result["priced_positions"] == 1
+    assert result["errors"] == {"MSFT": "unavailable"}
+
+
+def test_value_portfolio_without_quotes():
+    result = value_portfolio([position("AAPL", "10", "100")], {})
+
+    assert result["total_value"] == Decimal("0.0000")
+    assert result["total_unrealized_pnl_percent"] is None
+    assert result["priced_positions"] == 0
+
+
+def test_value_portfolio_totals_per_currency():
+    positions = [position("AAPL", "10", "100"), position("SONY", "100", "12000"), position("MSFT", "1", "300")]
+    quotes = {
+        "AAPL": {"current_price": 110.0, "currency": "USD"},
+        "SONY": {"current_price": 13000.0, "currency": "JPY"},
+        "MSFT": {"current_price": 310.0, "currency": "USD"},
+    }
+
+    result = value_portfolio(positions, quotes)
+
+    # Yen and dollars are never added together
+    assert result["currency"] is None
+    assert result["total_value"] is None
+    assert result["total_unrealized_pnl_percent"] is None
+    assert result["totals_by_currency"]["USD"]["value"] == Decimal("1410.0000")
+    assert result["totals_by_currency"]["USD"]["unrealized_pnl"] == Decimal("110.0000")
+    assert result["totals_by_currency"]["JPY"]["value"] == Decimal("1300000.0000")
+    assert [row["currency"] for row in result["positions"]] == ["USD", "JPY", "USD"]
+    assert result["priced_positions"] == 3
+
+
+def test_value_portfolio_single_currency_and_timestamp():
+    quotes = {"AAPL": {"current_price": 110.0, "currency": "USD"}, "MSFT": {"current_price": 310.0}}
+
+    result = value_portfolio([position("AAPL", "10", "100"), position("MSFT", "1", "300")], quotes)
+
+    assert result["currency"] == "USD"
+    assert result["total_value"] == Decimal("1410.0000")
+    assert result["as_of"].tzinfo is not None